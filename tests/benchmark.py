@@ -0,0 +1,575 @@
+"""
+Benchmarks vmn commands over synthetic repositories.
+
+A local bare remote and a clone are generated according to the scale knobs.
+The bulk of the history (stamps, root app stamps, non-vmn tags and plain
+commits) is written with git fast-import, so large repositories are cheap to
+create. Each command is then run through vmn_run and timed, and the number of
+git commands it executed is recorded. The results are written as JSON so runs
+of different vmn versions can be compared:
+
+    python tests/benchmark.py run --apps 20 --tags-per-app 200 -o new.json
+    python tests/benchmark.py compare old.json new.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import git
+import yaml
+
+sys.path.append("{0}/../version_stamp".format(os.path.dirname(__file__)))
+
+import stamp_utils
+import version as version_mod
+import vmn
+
+BENCHMARKED_COMMANDS = ("show", "stamp", "release", "add", "gen", "goto")
+GEN_TEMPLATE = "version: {{version}}\nname: {{name}}\n"
+MAIN_REPO_NAME = "main"
+
+# Counts every git command vmn runs, including ones started with as_process
+git_commands = 0
+
+
+def _install_git_counter():
+    execute = git.cmd.Git.execute
+
+    def counting_execute(self, *args, **kwargs):
+        global git_commands
+
+        git_commands += 1
+        return execute(self, *args, **kwargs)
+
+    git.cmd.Git.execute = counting_execute
+
+
+def _git(cwd, *args):
+    return subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    ).stdout.decode()
+
+
+def _vmn(*args):
+    stamp_utils.VMN_LOGGER = None
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        err, _ = vmn.vmn_run(list(args))
+
+    return err, out.getvalue()
+
+
+def _create_repo(work_dir, name):
+    remote = os.path.join(work_dir, "remote", f"{name}.git")
+    path = os.path.join(work_dir, name)
+    os.makedirs(remote)
+    _git(remote, "init", "-q", "--bare")
+    _git(work_dir, "clone", "-q", remote, path)
+    _git(path, "commit", "-q", "--allow-empty", "-m", "Initial commit")
+    _git(path, "push", "-q", "origin", "HEAD")
+
+    return path
+
+
+def _fast_import_data(data):
+    data = data.encode()
+    return b"data %d\n%s\n" % (len(data), data)
+
+
+def _fast_import(repo_path, stream):
+    marks_path = os.path.join(repo_path, ".git", "benchmark.marks")
+    subprocess.run(
+        ["git", "fast-import", "--quiet", f"--export-marks={marks_path}"],
+        cwd=repo_path,
+        input=stream,
+        check=True,
+    )
+
+    marks = {}
+    with open(marks_path) as f:
+        for line in f:
+            mark, sha = line.split()
+            marks[mark] = sha
+    os.remove(marks_path)
+
+    return marks
+
+
+def _app_names(scale):
+    apps = [f"app{i}" for i in range(scale["apps"])]
+    for i in range(scale["root_apps"]):
+        apps.extend(f"root{i}/service{j}" for j in range(scale["services"]))
+
+    return apps
+
+
+def _plan_history(scale, apps):
+    """
+    The order of the generated commits: a plain commit is None and a stamp is
+    the app name. Stamps of the different apps are interleaved and the plain
+    commits are spread evenly between them.
+    """
+    stamps = apps * scale["tags_per_app"]
+    plain = scale["history_depth"]
+    if not stamps:
+        return [None] * plain
+
+    plan = []
+    for i, app in enumerate(stamps):
+        # The plain commits due before the i-th stamp
+        due = plain * (i + 1) // len(stamps) - plain * i // len(stamps)
+        plan.extend([None] * due)
+        plan.append(app)
+
+    return plan
+
+
+def _write_history(repo_path, scale, apps):
+    branch = _git(repo_path, "rev-parse", "--abbrev-ref", "HEAD").strip()
+    head = _git(repo_path, "rev-parse", "HEAD").strip()
+    remote_url = _git(repo_path, "remote", "get-url", "origin").strip()
+    plan = _plan_history(scale, apps)
+    ident = "vmn <vmn> "
+    timestamp = int(time.time()) - 2 * len(plan) - scale["foreign_tags"] - 10
+
+    # Commits first. Stamp tags reference their parent commit hash
+    stream = []
+    versions = {}
+    for i, app in enumerate(plan):
+        mark = f":{i + 1}"
+        timestamp += 1
+        stream.append(f"commit refs/heads/{branch}\nmark {mark}\n".encode())
+        stream.append(f"committer {ident}{timestamp} +0000\n".encode())
+        if app is None:
+            stream.append(_fast_import_data(f"Commit {i}"))
+            path, content = "history.txt", f"{i}\n"
+        else:
+            versions[app] = versions.get(app, 0) + 1
+            verstr = f"0.0.{versions[app]}"
+            stream.append(_fast_import_data(f"{app}: Stamped version {verstr}\n\n"))
+            path = f".vmn/{app}/last_known_app_version.yml"
+            content = f"version_to_stamp_from: {verstr}\n"
+
+        if i == 0:
+            stream.append(f"from {head}\n".encode())
+        stream.append(f"M 100644 inline {path}\n".encode())
+        stream.append(_fast_import_data(content))
+
+    marks = _fast_import(repo_path, b"".join(stream))
+
+    # Continue from the root app versions created by init-app
+    root_versions = {}
+    root_services = {}
+    for app in apps:
+        root_app = stamp_utils.VMNBackend.get_root_app_name_from_name(app)
+        if root_app is None:
+            continue
+
+        root_services.setdefault(root_app, {})[app] = "0.0.0"
+        root_versions[root_app] = max(
+            int(t.rsplit("_", 1)[1])
+            for t in _git(repo_path, "tag", "--list", f"{root_app}_*").split()
+        )
+
+    stream = []
+    versions = {}
+    vmn_info = {
+        "description_message_version": "1.1",
+        "vmn_version": version_mod.version,
+    }
+    for i, app in enumerate(plan):
+        if app is None:
+            continue
+
+        sha = marks[f":{i + 1}"]
+        parent = marks.get(f":{i}", head)
+        previous = f"0.0.{versions.get(app, 0)}"
+        versions[app] = versions.get(app, 0) + 1
+        verstr = f"0.0.{versions[app]}"
+        ver_info = {
+            "stamping": {
+                "app": {
+                    "_version": verstr,
+                    "changesets": {
+                        ".": {"hash": parent, "remote": remote_url, "vcs_type": "git"}
+                    },
+                    "info": {},
+                    "name": app,
+                    "prerelease": "release",
+                    "prerelease_count": {},
+                    "previous_version": previous,
+                    "release_mode": "patch",
+                    "stamped_on_branch": branch,
+                    "stamped_on_remote_branch": f"origin/{branch}",
+                }
+            },
+            "vmn_info": vmn_info,
+        }
+        tags = [(stamp_utils.VMNBackend.serialize_vmn_tag_name(app, verstr), ver_info)]
+
+        root_app = stamp_utils.VMNBackend.get_root_app_name_from_name(app)
+        if root_app is not None:
+            root_versions[root_app] += 1
+            services = root_services[root_app]
+            services[app] = verstr
+            root_ver_info = {
+                "stamping": {
+                    "root_app": {
+                        "external_services": {},
+                        "latest_service": app,
+                        "name": root_app,
+                        "services": dict(services),
+                        "version": root_versions[root_app],
+                    }
+                },
+                "vmn_info": vmn_info,
+            }
+            tags.append((f"{root_app}_{root_versions[root_app]}", root_ver_info))
+
+        for tag_name, tag_ver_info in tags:
+            timestamp += 1
+            stream.append(f"tag {tag_name}\nfrom {sha}\n".encode())
+            stream.append(f"tagger {ident}{timestamp} +0000\n".encode())
+            stream.append(_fast_import_data(yaml.dump(tag_ver_info, sort_keys=True)))
+
+    # Tags not created by vmn, spread over the history
+    commits = [marks[f":{i + 1}"] for i in range(len(plan))] or [head]
+    for i in range(scale["foreign_tags"]):
+        sha = commits[i * len(commits) // scale["foreign_tags"]]
+        if i % 2:
+            stream.append(f"reset refs/tags/build-{i}\nfrom {sha}\n\n".encode())
+            continue
+
+        timestamp += 1
+        stream.append(f"tag release-{i}\nfrom {sha}\n".encode())
+        stream.append(f"tagger ci <ci> {timestamp} +0000\n".encode())
+        stream.append(_fast_import_data(f"Release {i}"))
+
+    if stream:
+        _fast_import(repo_path, b"".join(stream))
+
+    _git(repo_path, "reset", "-q", "--hard", branch)
+    _git(repo_path, "push", "-q", "--tags", "origin", branch)
+
+
+def _configure_deps(work_dir, repo_path, app_name, deps):
+    conf = {"deps": {"../": {MAIN_REPO_NAME: {"vcs_type": "git"}}}}
+    for i in range(deps):
+        dep_path = _create_repo(work_dir, f"dep{i}")
+        with open(os.path.join(dep_path, "f.txt"), "w") as f:
+            f.write("dep")
+        _git(dep_path, "add", "f.txt")
+        _git(dep_path, "commit", "-q", "-m", "Dep commit")
+        _git(dep_path, "push", "-q", "origin", "HEAD")
+        conf["deps"]["../"][f"dep{i}"] = {"vcs_type": "git"}
+
+    conf_path = os.path.join(repo_path, ".vmn", app_name, "conf.yml")
+    with open(conf_path) as f:
+        data = yaml.safe_load(f)
+    data["conf"].update(conf)
+    with open(conf_path, "w") as f:
+        yaml.dump(data, f, sort_keys=False)
+
+    _git(repo_path, "add", conf_path)
+    _git(repo_path, "commit", "-q", "-m", f"Configure {deps} deps for {app_name}")
+    _git(repo_path, "push", "-q", "origin", "HEAD")
+
+
+def build_repository(work_dir, scale):
+    repo_path = _create_repo(work_dir, MAIN_REPO_NAME)
+    os.environ["VMN_WORKING_DIR"] = repo_path
+
+    apps = _app_names(scale)
+    err, _ = _vmn("init")
+    if err:
+        raise RuntimeError("vmn init failed")
+
+    for app in apps:
+        err, _ = _vmn("init-app", app)
+        if err:
+            raise RuntimeError(f"vmn init-app {app} failed")
+
+    _write_history(repo_path, scale, apps)
+    _configure_deps(work_dir, repo_path, apps[0], scale["deps"])
+
+    return repo_path, apps
+
+
+def _user_commit(repo_path, run):
+    with open(os.path.join(repo_path, "benchmark.txt"), "w") as f:
+        f.write(f"{run}\n")
+    _git(repo_path, "add", "benchmark.txt")
+    _git(repo_path, "commit", "-q", "-m", f"Benchmark commit {run}")
+    _git(repo_path, "push", "-q", "origin", "HEAD")
+
+
+def _current_version(app):
+    err, out = _vmn("show", app)
+    if err:
+        raise RuntimeError(f"vmn show {app} failed")
+
+    return out.strip().splitlines()[-1]
+
+
+def _prepare_command(command, repo_path, work_dir, app, run, state):
+    """
+    Untimed setup of a single run. Returns the vmn command line to time
+    """
+    if command == "show":
+        return ["show", app]
+
+    if command == "stamp":
+        _user_commit(repo_path, f"stamp {run}")
+        return ["stamp", "-r", "patch", app]
+
+    if command == "release":
+        _user_commit(repo_path, f"release {run}")
+        err, _ = _vmn("stamp", "-r", "patch", "--pr", "rc", app)
+        if err:
+            raise RuntimeError(f"vmn stamp of a prerelease of {app} failed")
+
+        return ["release", "-v", _current_version(app), app]
+
+    if command == "add":
+        return ["add", "--bm", f"build{run}", "-v", _current_version(app), app]
+
+    if command == "gen":
+        template = os.path.join(work_dir, "version.j2")
+        with open(template, "w") as f:
+            f.write(GEN_TEMPLATE)
+
+        return ["gen", "-t", template, "-o", os.path.join(work_dir, "version.txt"), app]
+
+    if command == "goto":
+        if "goto_version" not in state:
+            state["goto_version"] = _current_version(app)
+
+        return ["goto", "-v", state["goto_version"], app]
+
+    raise RuntimeError(f"Unknown command {command}")
+
+
+def _restore_command(command, app):
+    if command == "goto":
+        _vmn("goto", app)
+
+
+def run_benchmark(params):
+    global git_commands
+
+    _install_git_counter()
+    os.environ[vmn.DAEMON_DISABLE_ENV] = "1"
+    for var, value in (
+        ("GIT_AUTHOR_NAME", "benchmark"),
+        ("GIT_AUTHOR_EMAIL", "benchmark@vmn"),
+        ("GIT_COMMITTER_NAME", "benchmark"),
+        ("GIT_COMMITTER_EMAIL", "benchmark@vmn"),
+    ):
+        os.environ.setdefault(var, value)
+
+    work_dir = params["work_dir"]
+    if work_dir is None:
+        work_dir = tempfile.mkdtemp(prefix="vmn_benchmark_")
+    else:
+        os.makedirs(work_dir)
+
+    start = time.perf_counter()
+    repo_path, apps = build_repository(work_dir, params["scale"])
+    build_time = time.perf_counter() - start
+    tags = len(_git(repo_path, "tag").split())
+
+    app = apps[0]
+    results = {}
+    state = {}
+    for command in params["commands"]:
+        runs = []
+        for run in range(params["repeat"]):
+            argv = _prepare_command(command, repo_path, work_dir, app, run, state)
+            if params["cold"]:
+                for cache_file in (
+                    stamp_utils.TAG_INDEX_FILENAME,
+                    stamp_utils.FETCH_CACHE_FILENAME,
+                ):
+                    path = os.path.join(repo_path, ".vmn", cache_file)
+                    if os.path.exists(path):
+                        os.remove(path)
+
+            git_commands = 0
+            start = time.perf_counter()
+            err, _ = _vmn(*argv)
+            elapsed = time.perf_counter() - start
+            runs.append(
+                {
+                    "argv": argv,
+                    "seconds": elapsed,
+                    "git_commands": git_commands,
+                    "exit_code": err,
+                }
+            )
+
+            _restore_command(command, app)
+
+        seconds = [r["seconds"] for r in runs]
+        results[command] = {
+            "median_seconds": statistics.median(seconds),
+            "min_seconds": min(seconds),
+            "median_git_commands": statistics.median(r["git_commands"] for r in runs),
+            "failures": sum(1 for r in runs if r["exit_code"]),
+            "runs": runs,
+        }
+
+    if not params["keep"]:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "vmn_version": version_mod.version,
+        "python": sys.version.split()[0],
+        "date": datetime.datetime.now().isoformat(),
+        "params": params,
+        "work_dir": work_dir if params["keep"] else None,
+        "tags": tags,
+        "build_seconds": build_time,
+        "results": results,
+    }
+
+
+def compare_results(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    if old["params"]["scale"] != new["params"]["scale"]:
+        print("Warning: the results were taken with different scale parameters")
+
+    print(
+        f"{'command':<10}{'old s':>10}{'new s':>10}{'ratio':>8}"
+        f"{'old git':>9}{'new git':>9}"
+    )
+    for command, new_res in new["results"].items():
+        old_res = old["results"].get(command)
+        if old_res is None:
+            continue
+
+        ratio = new_res["median_seconds"] / max(old_res["median_seconds"], 1e-9)
+        print(
+            f"{command:<10}"
+            f"{old_res['median_seconds']:>10.3f}"
+            f"{new_res['median_seconds']:>10.3f}"
+            f"{ratio:>8.2f}"
+            f"{old_res['median_git_commands']:>9}"
+            f"{new_res['median_git_commands']:>9}"
+        )
+
+
+def create_arg_parser():
+    parser = argparse.ArgumentParser("benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prun = subparsers.add_parser("run", help="Generate a repository and time vmn")
+    prun.add_argument("--apps", type=int, default=5, help="Number of regular apps")
+    prun.add_argument(
+        "--tags-per-app", type=int, default=50, help="Stamps of each app and service"
+    )
+    prun.add_argument("--root-apps", type=int, default=1, help="Number of root apps")
+    prun.add_argument(
+        "--services", type=int, default=10, help="Number of services per root app"
+    )
+    prun.add_argument(
+        "--foreign-tags", type=int, default=100, help="Number of non-vmn tags"
+    )
+    prun.add_argument(
+        "--history-depth", type=int, default=1000, help="Number of non-vmn commits"
+    )
+    prun.add_argument(
+        "--deps", type=int, default=2, help="Dependency repositories of the first app"
+    )
+    prun.add_argument("--repeat", type=int, default=3, help="Timed runs per command")
+    prun.add_argument(
+        "--commands",
+        nargs="+",
+        choices=BENCHMARKED_COMMANDS,
+        default=list(BENCHMARKED_COMMANDS),
+    )
+    prun.add_argument(
+        "--cold",
+        action="store_true",
+        help="Remove the tag index and fetch cache of .vmn before each run",
+    )
+    prun.add_argument(
+        "--work-dir", default=None, help="Where to generate the repositories"
+    )
+    prun.add_argument(
+        "--keep", action="store_true", help="Do not remove the generated repositories"
+    )
+    prun.add_argument("-o", "--output", default=None, help="Path for the JSON results")
+
+    pcompare = subparsers.add_parser("compare", help="Compare two JSON results")
+    pcompare.add_argument("old")
+    pcompare.add_argument("new")
+
+    return parser
+
+
+def main(command_line=None):
+    args = create_arg_parser().parse_args(command_line)
+    if args.command == "compare":
+        compare_results(args.old, args.new)
+        return 0
+
+    scale = {
+        "apps": args.apps,
+        "tags_per_app": args.tags_per_app,
+        "root_apps": args.root_apps,
+        "services": args.services,
+        "foreign_tags": args.foreign_tags,
+        "history_depth": args.history_depth,
+        "deps": args.deps,
+    }
+    if not _app_names(scale):
+        print("At least one app or root app service is required", file=sys.stderr)
+        return 1
+
+    params = {
+        "scale": scale,
+        "repeat": args.repeat,
+        "commands": args.commands,
+        "cold": args.cold,
+        "work_dir": args.work_dir,
+        "keep": args.keep,
+    }
+
+    res = run_benchmark(params)
+    data = json.dumps(res, indent=2)
+    if args.output is None:
+        print(data)
+    else:
+        with open(args.output, "w") as f:
+            f.write(data)
+
+    for command, cres in res["results"].items():
+        print(
+            f"{command}: {cres['median_seconds']:.3f}s median, "
+            f"{cres['median_git_commands']} git commands, "
+            f"{cres['failures']} failures",
+            file=sys.stderr,
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 import copy
 import json
 import os
+import re
 import shutil
 import stat
 import subprocess
@@ -298,6 +299,28 @@ def test_vmn_init(app_layout, capfd):
     assert "" == captured.out
 
 
+def test_old_vmn_gitignore(app_layout):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+
+    # A .gitignore as written by vmn init before the tag index existed
+    with open(os.path.join(app_layout.repo_path, ".vmn", ".gitignore"), "w") as f:
+        f.write("vmn.lock\nvmn.log*\nvmn.cache\nglobal_vmn.log\n")
+    app_layout.write_file_commit_and_push("test_repo_0", ".vmn/.gitignore", "")
+
+    err, _, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+    assert os.path.isfile(os.path.join(app_layout.repo_path, ".vmn", "vmn.index"))
+
+    git = app_layout._app_backend._git_backend.git
+    assert "verinfo_index" not in git.status("--porcelain", "--untracked-files=all")
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "text")
+    err, ver_info, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.2"
+
+
 def test_double_stamp_no_commit(app_layout):
     _run_vmn_init()
     _init_app(app_layout.app_name)
@@ -427,6 +450,115 @@ def test_git_hooks(app_layout, capfd, hook_name):
     assert "0.0.2\n" == captured.out
 
 
+def test_atomic_push(app_layout, capfd):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content")
+
+    # The remote accepts the branch but rejects the tags
+    hook_path = os.path.join(app_layout.test_app_remote, "hooks", "update")
+    with open(hook_path, "w") as f:
+        f.write('#!/bin/sh\ncase "$1" in refs/tags/*) exit 1;; esac\nexit 0\n')
+    os.chmod(hook_path, os.stat(hook_path).st_mode | stat.S_IEXEC)
+
+    remote_head = subprocess.check_output(
+        ["git", "rev-parse", "HEAD"], cwd=app_layout.test_app_remote
+    )
+
+    capfd.readouterr()
+    err, _, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 1
+    capfd.readouterr()
+
+    # Nothing was published
+    assert remote_head == subprocess.check_output(
+        ["git", "rev-parse", "HEAD"], cwd=app_layout.test_app_remote
+    )
+    remote_tags = subprocess.check_output(
+        ["git", "tag", "--list"], cwd=app_layout.test_app_remote
+    ).decode()
+    assert f"{app_layout.app_name}_0.0.1" not in remote_tags
+
+    os.remove(hook_path)
+
+    err, ver_info, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.1"
+
+    remote_tags = subprocess.check_output(
+        ["git", "tag", "--list"], cwd=app_layout.test_app_remote
+    ).decode()
+    assert f"{app_layout.app_name}_0.0.1" in remote_tags
+
+
+def test_multi_app_stamp(app_layout, capfd):
+    _run_vmn_init()
+    _init_app("root_app/app1")
+    _init_app("root_app/app2")
+    _init_app(app_layout.app_name)
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content")
+
+    remote_head = subprocess.check_output(
+        ["git", "rev-parse", "HEAD"], cwd=app_layout.test_app_remote
+    )
+
+    capfd.readouterr()
+    err, _ = vmn.vmn_run(
+        ["stamp", "-r", "patch", "root_app/app1", "root_app/app2", app_layout.app_name]
+    )
+    assert err == 0
+
+    captured = capfd.readouterr()
+    assert "[INFO] 0.0.1\n[INFO] 0.0.1\n[INFO] 0.0.1\n" == captured.out
+
+    # A single commit was pushed and it holds all of the tags
+    new_remote_head = subprocess.check_output(
+        ["git", "rev-parse", "HEAD"], cwd=app_layout.test_app_remote
+    )
+    assert remote_head == subprocess.check_output(
+        ["git", "rev-parse", "HEAD~1"], cwd=app_layout.test_app_remote
+    )
+    remote_tags = subprocess.check_output(
+        ["git", "tag", "--points-at", "HEAD"], cwd=app_layout.test_app_remote
+    ).decode()
+    assert set(remote_tags.split()) == {
+        "root_app-app1_0.0.1",
+        "root_app-app2_0.0.1",
+        f"{app_layout.app_name}_0.0.1",
+        "root_app_2",
+    }
+
+    for app_name in ("root_app/app1", "root_app/app2", app_layout.app_name):
+        assert _show(app_name) == 0
+        captured = capfd.readouterr()
+        assert "0.0.1\n" == captured.out
+
+    ret = _show("root_app", root=True, verbose=True)
+    assert ret == 0
+    out_dict = yaml.safe_load(capfd.readouterr().out)
+    assert out_dict["version"] == 2
+    assert out_dict["services"] == {
+        "root_app/app1": "0.0.1",
+        "root_app/app2": "0.0.1",
+    }
+
+    # Nothing has changed so nothing is published
+    err, _ = vmn.vmn_run(["stamp", "-r", "patch", "root_app/app1", "root_app/app2"])
+    assert err == 0
+    assert new_remote_head == subprocess.check_output(
+        ["git", "rev-parse", "HEAD"], cwd=app_layout.test_app_remote
+    )
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content2")
+
+    err, ver_info, _ = _stamp_app("root_app/app2", "patch")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.2"
+    assert ver_info["stamping"]["root_app"]["version"] == 3
+
+
 def test_jinja2_gen(app_layout, capfd):
     _run_vmn_init()
     _init_app(app_layout.app_name)
@@ -625,6 +757,69 @@ def test_version_backends_generic_jinja(app_layout, capfd):
         assert data["Custom"] == 5
 
 
+def test_version_backends_generic_jinja_cache(app_layout):
+    _run_vmn_init()
+    _, _, params = _init_app(app_layout.app_name)
+
+    repo_path = app_layout._repos["test_repo_0"]["path"]
+    jinja2_content = "VERSION: {{version}}\n"
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.jinja2", jinja2_content)
+    app_layout.write_file_commit_and_push("test_repo_0", "f2.jinja2", jinja2_content)
+
+    generic_jinja = {
+        "generic_jinja": [
+            {"input_file_path": "f1.jinja2", "output_file_path": "out1.txt"},
+            {"input_file_path": "f2.jinja2", "output_file_path": "out2.txt"},
+        ]
+    }
+    app_layout.write_conf(params["app_conf_path"], version_backends=generic_jinja)
+
+    cache_dir = os.path.join(repo_path, ".vmn", vmn.JINJA2_CACHE_DIRNAME)
+    for i in range(2):
+        app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", f"{i}")
+        err, _, _ = _stamp_app(app_layout.app_name, "patch")
+        assert err == 0
+
+        # Identical templates share their compiled bytecode
+        assert len(os.listdir(cache_dir)) == 1
+
+    for name in ("out1.txt", "out2.txt"):
+        with open(os.path.join(repo_path, name)) as f:
+            assert f.read() == "VERSION: 0.0.2\n"
+
+    app_layout.write_file_commit_and_push(
+        "test_repo_0", "f2.jinja2", "V: {{version}}\n"
+    )
+    err, _, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+    assert len(os.listdir(cache_dir)) == 2
+
+    with open(os.path.join(repo_path, "out2.txt")) as f:
+        assert f.read() == "VERSION: 0.0.3\nV: 0.0.3\n"
+
+    # The cache is ignored by git
+    status = app_layout._app_backend._git_backend.git.status("--porcelain")
+    assert vmn.JINJA2_CACHE_DIRNAME not in status
+
+    # The least recently written bytecode files are removed
+    current = set(os.listdir(cache_dir))
+    for i in range(vmn.JINJA2_CACHE_MAX_ENTRIES):
+        path = os.path.join(cache_dir, f"__jinja2_old{i}.cache")
+        with open(path, "w") as f:
+            f.write("")
+        os.utime(path, (0, 0))
+
+    app_layout.write_file_commit_and_push(
+        "test_repo_0", "f2.jinja2", "R: {{version}}\n"
+    )
+    err, _, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    entries = set(os.listdir(cache_dir))
+    assert len(entries) == vmn.JINJA2_CACHE_MAX_ENTRIES
+    assert current < entries
+
+
 def test_version_backends_generic_selectors(app_layout, capfd):
     _run_vmn_init()
     _, _, params = _init_app(app_layout.app_name)
@@ -750,6 +945,129 @@ def test_version_backends_generic_selectors_no_custom_keys(app_layout, capfd):
         assert data["Custom"] == 3
 
 
+def test_version_backends_generic_selectors_output_files(app_layout):
+    _run_vmn_init()
+    _, _, params = _init_app(app_layout.app_name)
+
+    repo_path = app_layout._repos["test_repo_0"]["path"]
+    for name in ("in.txt", "in2.txt"):
+        app_layout.write_file_commit_and_push(
+            "test_repo_0", name, yaml.safe_dump({"version": "9.3.2", "Custom": 3})
+        )
+    app_layout.write_file_commit_and_push("test_repo_0", "in3.txt", "Custom: 3\n")
+    app_layout.write_file_commit_and_push("test_repo_0", "custom.yml", "k1: 5\n")
+
+    generic_selectors = {
+        "generic_selectors": [
+            {
+                "paths_section": [
+                    {
+                        "input_file_path": f"in{i}.txt",
+                        "output_file_path": f"out{i}.txt",
+                        "custom_keys_path": "custom.yml",
+                    }
+                    for i in ("", "2", "3")
+                ],
+                "selectors_section": [
+                    {
+                        "regex_selector": f"(version: ){stamp_utils._VMN_VERSION_REGEX}",
+                        "regex_sub": r"\1{{version}}",
+                    },
+                    {"regex_selector": "(Custom: )([0-9]+)", "regex_sub": r"\1{{k1}}"},
+                ],
+            },
+        ]
+    }
+    app_layout.write_conf(params["app_conf_path"], version_backends=generic_selectors)
+
+    err, _, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    # All the selectors were applied to each output file
+    for name in ("out.txt", "out2.txt"):
+        with open(os.path.join(repo_path, name)) as f:
+            assert yaml.safe_load(f) == {"version": "0.0.1", "Custom": 5}
+
+    # Nothing but the outputs was written
+    assert not [n for n in os.listdir(repo_path) if n.endswith(".tmp.jinja2")]
+    with open(os.path.join(repo_path, "in.txt")) as f:
+        assert yaml.safe_load(f) == {"version": "9.3.2", "Custom": 3}
+
+    # Outputs that do not change are not rewritten
+    out3 = os.path.join(repo_path, "out3.txt")
+    os.utime(out3, (0, 0))
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content")
+    err, _, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    with open(os.path.join(repo_path, "out.txt")) as f:
+        assert yaml.safe_load(f)["version"] == "0.0.2"
+    assert os.stat(out3).st_mtime == 0
+
+
+def test_version_backends_generic_selectors_streaming(app_layout):
+    _run_vmn_init()
+    _, _, params = _init_app(app_layout.app_name)
+
+    repo_path = app_layout._repos["test_repo_0"]["path"]
+    lines = [f"dep{i}: 1.2.{i}\r\n" for i in range(2000)]
+    lines[1500] = "version: 9.3.2\r\n"
+    lines[1600] = "path: 9.3.2\r\n"
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content")
+    with open(os.path.join(repo_path, "lock.txt"), "w", newline="") as f:
+        f.write("".join(lines))
+    os.chmod(os.path.join(repo_path, "lock.txt"), 0o640)
+
+    generic_selectors = {
+        "generic_selectors": [
+            {
+                "streaming": True,
+                "paths_section": [
+                    {"input_file_path": "lock.txt", "output_file_path": "lock.txt"}
+                ],
+                "selectors_section": [
+                    {
+                        "regex_selector": "(version: ){{VMN_VERSION_REGEX}}",
+                        "regex_sub": r"\1{{version}}",
+                    },
+                    {
+                        "regex_selector": "(path: ){{VMN_VERSION_REGEX}}",
+                        "regex_sub": r"\\\1{{version}}",
+                    },
+                ],
+            },
+        ]
+    }
+    app_layout.write_conf(params["app_conf_path"], version_backends=generic_selectors)
+
+    err, _, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    lines[1500] = "version: 0.0.1\r\n"
+    lines[1600] = "\\path: 0.0.1\r\n"
+    with open(os.path.join(repo_path, "lock.txt"), newline="") as f:
+        assert f.read() == "".join(lines)
+
+    # Replaced through a temporary file which kept the permissions
+    assert stat.S_IMODE(os.stat(os.path.join(repo_path, "lock.txt")).st_mode) == 0o640
+
+    # Matches crossing chunk boundaries are replaced as well
+    src = os.path.join(repo_path, "lock.txt")
+    dst = os.path.join(repo_path, "lock.out")
+    selectors = [(re.compile(r"dep(\d+): 1\.2\.\d+"), r"d\1: x")]
+    assert vmn.stream_regex_sub_file(src, dst, selectors, chunk_size=7, overlap=32)
+
+    with open(dst, newline="") as f:
+        out = f.read()
+
+    with open(src, newline="") as f:
+        assert out == re.sub(r"dep(\d+): 1\.2\.\d+", r"d\1: x", f.read())
+
+    # An unchanged output is left alone
+    assert not vmn.stream_regex_sub_file(src, dst, selectors, chunk_size=7, overlap=32)
+    assert not [n for n in os.listdir(repo_path) if n.endswith(".tmp")]
+
+
 def test_version_backends_generic_selectors_regex_vars(app_layout, capfd):
     _run_vmn_init()
     _, _, params = _init_app(app_layout.app_name)
@@ -1223,6 +1541,59 @@ def test_show_from_file_conf_changed(app_layout, capfd):
     )
 
 
+def test_show_from_file_verinfo_index(app_layout, capfd):
+    _run_vmn_init()
+    _, _, params = _init_app(app_layout.app_name)
+
+    conf = {
+        "template": "[{major}][.{minor}][.{patch}]",
+        "create_verinfo_files": True,
+        "extra_info": False,
+    }
+    app_layout.write_conf(params["app_conf_path"], **conf)
+
+    for i in range(3):
+        app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", f"{i}")
+        err, _, _ = _stamp_app(app_layout.app_name, "patch")
+        assert err == 0
+
+    dir_path = os.path.join(params["app_dir_path"], "verinfo")
+    assert sorted(os.listdir(dir_path)) == ["0.0.1.yml", "0.0.2.yml", "0.0.3.yml"]
+
+    # File timestamps do not matter
+    os.utime(os.path.join(dir_path, "0.0.1.yml"))
+    # Older than the racy window so that the result is cached
+    os.utime(dir_path, ns=(0, 0))
+    # Otherwise the version is read from it
+    os.remove(params["version_file_path"])
+
+    capfd.readouterr()
+    err = _show(app_layout.app_name, from_file=True)
+    assert err == 0
+    assert capfd.readouterr().out == "0.0.3\n"
+
+    index_path = os.path.join(app_layout.repo_path, ".vmn", "vmn.verinfo_index")
+    with open(index_path) as f:
+        assert f.read() == f"{app_layout.app_name}/verinfo\t0\t0.0.3.yml\n"
+
+    # The index is local only
+    git = app_layout._app_backend._git_backend.git
+    assert "verinfo_index" not in git.status("--porcelain", "--untracked-files=all")
+
+    # Trusted as long as the directory did not change
+    with open(index_path, "w") as f:
+        f.write(f"{app_layout.app_name}/verinfo\t0\t0.0.2.yml\n")
+
+    err = _show(app_layout.app_name, from_file=True)
+    assert err == 0
+    assert capfd.readouterr().out == "0.0.2\n"
+
+    os.utime(dir_path, ns=(1, 1))
+    err = _show(app_layout.app_name, from_file=True)
+    assert err == 0
+    assert capfd.readouterr().out == "0.0.3\n"
+
+
 def test_multi_repo_dependency(app_layout, capfd):
     _run_vmn_init()
     _init_app(app_layout.app_name)
@@ -1305,7 +1676,7 @@ def test_multi_repo_dependency(app_layout, capfd):
     assert err == 0
 
 
-def test_goto_deleted_repos(app_layout):
+def test_multi_repo_dependency_status(app_layout, capfd):
     _run_vmn_init()
     _init_app(app_layout.app_name)
 
@@ -1317,73 +1688,193 @@ def test_goto_deleted_repos(app_layout):
     err, _, params = _stamp_app(app_layout.app_name, "patch")
     assert err == 0
 
-    dir_path = app_layout._repos["repo2"]["path"]
-    # deleting repo_b
-    shutil.rmtree(dir_path)
+    for repo in ("repo2", "repo1"):
+        app_layout.write_file_commit_and_push(repo, "f1.file", "msg1")
+        app_layout.write_file_commit_and_push(repo, "f1.file", "msg2", commit=False)
 
-    err = _goto(app_layout.app_name, version="0.0.2")
+    # The dependencies are inspected concurrently but reported in order
+    for _ in range(3):
+        capfd.readouterr()
+        err, _, _ = _stamp_app(app_layout.app_name, "patch")
+        assert err == 1
+
+        captured = capfd.readouterr()
+        assert captured.err.count("Pending changes in") == 2
+        assert captured.err.index("repo1") < captured.err.index("repo2")
+
+    err = _show(app_layout.app_name)
     assert err == 0
 
+    captured = capfd.readouterr()
+    out_dict = yaml.safe_load(captured.out)
+    assert out_dict["out"] == "0.0.2"
+    assert set(out_dict["dirty"]) == {"dirty_deps", "modified"}
+
 
-def test_basic_root_stamp(app_layout):
+def test_show_ignore_dirty_skips_repo_status(app_layout, capfd):
     _run_vmn_init()
+    _init_app(app_layout.app_name)
 
-    app_name = "root_app/app1"
-    _init_app(app_name)
-
-    err, ver_info, params = _stamp_app(app_name, "patch")
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
     assert err == 0
 
-    data = ver_info["stamping"]["app"]
-    assert data["_version"] == "0.0.1"
-
-    data = ver_info["stamping"]["root_app"]
-    assert data["version"] == 1
+    _configure_2_deps(app_layout, params)
 
-    app_name = "root_app/app2"
-    _init_app(app_name)
-    err, ver_info, params = _stamp_app(app_name, "minor")
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
     assert err == 0
 
-    data = ver_info["stamping"]["app"]
-    assert data["_version"] == "0.1.0"
-    data = ver_info["stamping"]["root_app"]
-    assert data["version"] == 3
+    for repo in ("repo1", "test_repo_0"):
+        app_layout.write_file_commit_and_push(repo, "f1.file", "msg1")
+        app_layout.write_file_commit_and_push(repo, "f1.file", "msg2", commit=False)
 
-    app_name = "root_app/app3"
-    _init_app(app_name)
-    err, ver_info, params = _stamp_app(app_name, "patch")
+    trace_path = os.path.join(app_layout.base_dir, "trace.json")
+    capfd.readouterr()
+    stamp_utils.VMN_LOGGER = None
+    err, _ = vmn.vmn_run(
+        ["--profile", trace_path, "show", "--ignore-dirty", app_layout.app_name]
+    )
     assert err == 0
-    data = ver_info["stamping"]["app"]
-    assert data["_version"] == "0.0.1"
-    data = ver_info["stamping"]["root_app"]
-    assert data["version"] == 5
+    assert capfd.readouterr().out == "0.0.2\n"
 
-    app_name = "root_app/app1"
-    err, ver_info, params = _stamp_app(app_name, "major")
+    with open(trace_path) as f:
+        spans = {e["name"] for e in json.load(f)["traceEvents"]}
+
+    # Neither local changes nor the dependencies were inspected
+    assert "get_show_info" in spans
+    assert "check_for_pending_changes" not in spans
+    assert "check_for_outgoing_changes" not in spans
+    assert "_inspect_dep_repo" not in spans
+
+    err = _show(app_layout.app_name, verbose=True, ignore_dirty=True)
     assert err == 0
-    data = ver_info["stamping"]["app"]
-    assert data["_version"] == "0.0.1"
-    data = ver_info["stamping"]["root_app"]
-    assert data["version"] == 1
+    out_dict = yaml.safe_load(capfd.readouterr().out)
+    assert out_dict["_version"] == "0.0.2"
+    assert "dirty" not in out_dict
 
-    app_name = "root_app/app2"
-    err, ver_info, params = _stamp_app(app_name, "major")
+    err = _show(app_layout.app_name)
     assert err == 0
-    data = ver_info["stamping"]["app"]
-    assert data["_version"] == "0.1.0"
-    data = ver_info["stamping"]["root_app"]
-    assert data["version"] == 3
+    out_dict = yaml.safe_load(capfd.readouterr().out)
+    assert set(out_dict["dirty"]) == {"dirty_deps", "modified", "pending"}
 
-    app_layout.write_file_commit_and_push("test_repo_0", "f1.file", "blabla")
+    # Untracked apps are still reported
+    err = _show("untracked_app", ignore_dirty=True)
+    assert err == 1
 
-    app_name = "root_app/app1"
-    err, ver_info, params = _stamp_app(app_name, "major")
-    assert err == 0
-    data = ver_info["stamping"]["app"]
-    assert data["_version"] == "1.0.0"
-    data = ver_info["stamping"]["root_app"]
-    assert data["version"] == 6
+
+def test_goto_deleted_repos(app_layout):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    _configure_2_deps(app_layout, params)
+
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    dir_path = app_layout._repos["repo2"]["path"]
+    # deleting repo_b
+    shutil.rmtree(dir_path)
+
+    err = _goto(app_layout.app_name, version="0.0.2")
+    assert err == 0
+
+
+def test_goto_deps_jobs(app_layout, capfd):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    _configure_2_deps(app_layout, params)
+
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    for repo in ("repo1", "repo2"):
+        shutil.rmtree(app_layout._repos[repo]["path"])
+
+    capfd.readouterr()
+    err = vmn.vmn_run(["goto", "--jobs", "1", "-v", "0.0.2", app_layout.app_name])[0]
+    assert err == 0
+
+    captured = capfd.readouterr()
+    synced = [line for line in captured.out.splitlines() if "Synced" in line]
+    assert len(synced) == 2
+    assert synced[0].endswith("(1/2)")
+    assert synced[1].endswith("(2/2)")
+    assert {line.split()[2] for line in synced} == {
+        os.path.join("..", "repo1"),
+        os.path.join("..", "repo2"),
+    }
+    for repo in ("repo1", "repo2"):
+        assert os.path.isdir(app_layout._repos[repo]["path"])
+
+    err = vmn.vmn_run(["goto", "--jobs", "0", app_layout.app_name])[0]
+    assert err == 1
+
+
+def test_basic_root_stamp(app_layout):
+    _run_vmn_init()
+
+    app_name = "root_app/app1"
+    _init_app(app_name)
+
+    err, ver_info, params = _stamp_app(app_name, "patch")
+    assert err == 0
+
+    data = ver_info["stamping"]["app"]
+    assert data["_version"] == "0.0.1"
+
+    data = ver_info["stamping"]["root_app"]
+    assert data["version"] == 1
+
+    app_name = "root_app/app2"
+    _init_app(app_name)
+    err, ver_info, params = _stamp_app(app_name, "minor")
+    assert err == 0
+
+    data = ver_info["stamping"]["app"]
+    assert data["_version"] == "0.1.0"
+    data = ver_info["stamping"]["root_app"]
+    assert data["version"] == 3
+
+    app_name = "root_app/app3"
+    _init_app(app_name)
+    err, ver_info, params = _stamp_app(app_name, "patch")
+    assert err == 0
+    data = ver_info["stamping"]["app"]
+    assert data["_version"] == "0.0.1"
+    data = ver_info["stamping"]["root_app"]
+    assert data["version"] == 5
+
+    app_name = "root_app/app1"
+    err, ver_info, params = _stamp_app(app_name, "major")
+    assert err == 0
+    data = ver_info["stamping"]["app"]
+    assert data["_version"] == "0.0.1"
+    data = ver_info["stamping"]["root_app"]
+    assert data["version"] == 1
+
+    app_name = "root_app/app2"
+    err, ver_info, params = _stamp_app(app_name, "major")
+    assert err == 0
+    data = ver_info["stamping"]["app"]
+    assert data["_version"] == "0.1.0"
+    data = ver_info["stamping"]["root_app"]
+    assert data["version"] == 3
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.file", "blabla")
+
+    app_name = "root_app/app1"
+    err, ver_info, params = _stamp_app(app_name, "major")
+    assert err == 0
+    data = ver_info["stamping"]["app"]
+    assert data["_version"] == "1.0.0"
+    data = ver_info["stamping"]["root_app"]
+    assert data["version"] == 6
     assert "root_app/app1" in data["services"]
     assert "root_app/app2" in data["services"]
 
@@ -2084,6 +2575,58 @@ def test_basic_root_show(app_layout, capfd):
     assert out_dict["dirty"][0] == "outgoing"
 
 
+def test_multi_app_show(app_layout, capfd):
+    _run_vmn_init()
+    _init_app("root_app/app1", "0.2.1")
+    _init_app("root_app/app2", "1.0.0")
+    _init_app(app_layout.app_name)
+    _stamp_app("root_app/app2", release_mode="minor")
+
+    capfd.readouterr()
+    ret = vmn.vmn_run(["show", "root_app/app1", "root_app/app2"])[0]
+    assert ret == 0
+
+    captured = capfd.readouterr()
+    out_dict = yaml.safe_load(captured.out)
+    assert out_dict == {
+        "root_app/app1": {"out": "0.2.1", "dirty": ["modified"]},
+        "root_app/app2": {"out": "1.1.0"},
+    }
+
+    ret = vmn.vmn_run(["show", "--all", "--format", "json", "--verbose"])[0]
+    assert ret == 0
+
+    captured = capfd.readouterr()
+    out_dict = json.loads(captured.out)
+    assert set(out_dict.keys()) == {
+        app_layout.app_name,
+        "root_app/app1",
+        "root_app/app2",
+    }
+    assert out_dict["root_app/app2"]["_version"] == "1.1.0"
+
+    ret = vmn.vmn_run(["show", "--all", "--root"])[0]
+    assert ret == 0
+
+    captured = capfd.readouterr()
+    out_dict = yaml.safe_load(captured.out)
+    assert out_dict == {"root_app": {"out": 2}}
+
+    app_layout.write_file_commit_and_push("test_repo_0", "abc.txt", "a", push=False)
+
+    ret = vmn.vmn_run(["show", "root_app/app1", "root_app/app2", "root_app/app3"])[0]
+    assert ret == 1
+
+    captured = capfd.readouterr()
+    out_dict = yaml.safe_load(captured.out)
+    assert len(out_dict) == 2
+    assert set(out_dict["root_app/app1"]["dirty"]) == {"modified", "outgoing"}
+    assert set(out_dict["root_app/app2"]["dirty"]) == {"modified", "outgoing"}
+
+    ret = vmn.vmn_run(["show", "root_app/app1", "root_app/app2", "-v", "0.2.1"])[0]
+    assert ret == 1
+
+
 def test_version_backends_cargo(app_layout, capfd):
     _run_vmn_init()
     _init_app(app_layout.app_name)
@@ -2264,6 +2807,76 @@ def test_version_backends_npm(app_layout, capfd):
     assert err == 0
 
 
+def test_version_backends_write_if_changed(app_layout):
+    _run_vmn_init()
+    _, _, params = _init_app(app_layout.app_name)
+
+    err, _, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    # Already holds the version that is about to be stamped
+    app_layout.write_file_commit_and_push(
+        "test_repo_0",
+        "package.json",
+        json.dumps({"name": "test_app", "version": "0.0.2"}, indent=4, sort_keys=True),
+    )
+    conf = {"version_backends": {"npm": {"path": "package.json"}}}
+    app_layout.write_conf(params["app_conf_path"], **conf)
+
+    full_path = os.path.join(app_layout.repo_path, "package.json")
+    os.chmod(full_path, 0o640)
+    os.utime(full_path, (0, 0))
+
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+    assert os.stat(full_path).st_mtime == 0
+    assert params["changed_version_files"] == [params["version_file_path"]]
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content")
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+    assert full_path in params["changed_version_files"]
+
+    with open(full_path, "r") as f:
+        assert json.load(f)["version"] == "0.0.3"
+
+    # Replaced through a temporary file which kept the permissions
+    assert stat.S_IMODE(os.stat(full_path).st_mode) == 0o640
+    assert not [n for n in os.listdir(app_layout.repo_path) if n.endswith(".tmp")]
+
+
+def test_version_backends_write_through_links(app_layout):
+    _run_vmn_init()
+    _, _, params = _init_app(app_layout.app_name)
+
+    app_layout.write_file_commit_and_push(
+        "test_repo_0",
+        "real.json",
+        json.dumps({"name": "test_app", "version": "0.0.0"}, indent=4, sort_keys=True),
+    )
+    os.symlink("real.json", os.path.join(app_layout.repo_path, "package.json"))
+    client = app_layout._app_backend._git_backend
+    client.index.add(["package.json"])
+    client.index.commit("Added a symlink")
+    client.git.push()
+
+    conf = {"version_backends": {"npm": {"path": "package.json"}}}
+    app_layout.write_conf(params["app_conf_path"], **conf)
+
+    real_path = os.path.join(app_layout.repo_path, "real.json")
+    # Untracked, only shares the inode
+    link_path = os.path.join(app_layout.repo_path, "real.link")
+    os.link(real_path, link_path)
+
+    err, _, params = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    assert os.path.islink(os.path.join(app_layout.repo_path, "package.json"))
+    assert os.path.samefile(real_path, link_path)
+    with open(link_path, "r") as f:
+        assert json.load(f)["version"] == "0.0.1"
+
+
 def test_backward_compatability_with_0_3_9_vmn(app_layout, capfd):
     app_layout.stamp_with_previous_vmn("0.3.9")
 
@@ -2579,6 +3192,33 @@ def test_shallow_non_vmn_commit_repo_stamp(app_layout, capfd):
     assert ver_info["stamping"]["app"]["_version"] == "0.0.2"
 
 
+def test_shallow_non_vmn_commit_after_quick_stamps(app_layout, capfd):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+
+    # Faster than one stamp per second, so the tagger dates run ahead
+    for i in range(5):
+        app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", f"{i}")
+        err, ver_info, _ = _stamp_app(app_layout.app_name, "patch")
+        assert err == 0
+
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.5"
+
+    # Committed before the clock caught up with the last tagger date
+    app_layout.write_file_commit_and_push("test_repo_0", "f2.txt", "content")
+
+    clone_path = app_layout.create_new_clone("test_repo_0", depth=1)
+    app_layout.set_working_dir(clone_path)
+    capfd.readouterr()
+    err = _show(app_layout.app_name, verbose=True)
+    assert err == 0
+    assert yaml.safe_load(capfd.readouterr().out)["version"] == "0.0.5"
+
+    err, ver_info, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.6"
+
+
 def test_shallow_vmn_commit_repo_stamp_pr(app_layout):
     _run_vmn_init()
     _init_app(app_layout.app_name)
@@ -2599,6 +3239,83 @@ def test_shallow_vmn_commit_repo_stamp_pr(app_layout):
     assert ver_info["stamping"]["app"]["_version"] == "0.0.1-yuval.2"
 
 
+def test_scoped_tags_fetch(app_layout):
+    _run_vmn_init()
+    _init_app("root_app/app1")
+    _init_app("root_app/app2")
+
+    clone_path = app_layout.create_new_clone("test_repo_0")
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content")
+    _stamp_app("root_app/app1", "patch")
+    _stamp_app("root_app/app2", "patch")
+
+    def _clone_tags():
+        return subprocess.check_output(
+            ["git", "tag", "--list"], cwd=clone_path
+        ).decode().split()
+
+    be, err = stamp_utils.get_client(clone_path, stamp_utils.VMN_BE_TYPE_GIT)
+    assert err is None
+    be.perform_cached_fetch(app_names=["root_app/app1", "root_app"])
+
+    tags = _clone_tags()
+    assert "root_app-app1_0.0.1" in tags
+    assert "root_app_3" in tags
+    assert "root_app-app2_0.0.1" not in tags
+
+    # The remote tracking branch is fetched as well
+    remote_head = subprocess.check_output(
+        ["git", "rev-parse", "HEAD"], cwd=app_layout.test_app_remote
+    )
+    assert remote_head == subprocess.check_output(
+        ["git", "rev-parse", f"{be.remote_active_branch}"], cwd=clone_path
+    )
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content2")
+    _stamp_app("root_app/app1", "patch")
+
+    # Cached
+    be.perform_cached_fetch(app_names=["root_app", "root_app/app1"])
+    assert "root_app-app1_0.0.2" not in _clone_tags()
+
+    be.perform_cached_fetch(force=True, app_names=["root_app", "root_app/app1"])
+    assert "root_app-app1_0.0.2" in _clone_tags()
+    assert "root_app-app2_0.0.1" not in _clone_tags()
+
+    be.perform_cached_fetch()
+    assert "root_app-app2_0.0.1" in _clone_tags()
+
+    with open(os.path.join(clone_path, ".vmn", vmn.CACHE_FILENAME)) as f:
+        cache = json.load(f)
+
+    # Keyed by remote and by ref pattern
+    remote_url = tuple(be.selected_remote.urls)[0]
+    assert set(cache.keys()) == {
+        f"{remote_url} *",
+        f"{remote_url} refs/heads/{be.get_remote_branch_name()}",
+        f"{remote_url} refs/tags/root_app-app1_*",
+        f"{remote_url} refs/tags/root_app_*",
+    }
+
+    # Expired but nothing has changed in the remote so nothing is fetched
+    subprocess.check_call(["git", "tag", "-d", "root_app-app1_0.0.2"], cwd=clone_path)
+    be.perform_cached_fetch(app_names=["root_app/app1"], ttl=0)
+    assert "root_app-app1_0.0.2" not in _clone_tags()
+
+    _stamp_app("root_app/app2", "patch")
+    be.perform_cached_fetch(app_names=["root_app/app1"], ttl=0)
+    assert "root_app-app1_0.0.2" not in _clone_tags()
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content3")
+    _stamp_app("root_app/app1", "patch")
+    be.perform_cached_fetch(app_names=["root_app/app1"], ttl=0)
+    assert "root_app-app1_0.0.2" in _clone_tags()
+    assert "root_app-app1_0.0.3" in _clone_tags()
+
+    del be
+
+
 def test_same_user_tag(app_layout):
     _run_vmn_init()
     _init_app(app_layout.app_name)
@@ -2767,6 +3484,565 @@ def test_show_after_multiple_tags_removed_0_tags_left(app_layout, capfd):
     )
 
 
+def test_tag_index(app_layout, capfd):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+    _stamp_app(f"{app_layout.app_name}", "patch")
+
+    capfd.readouterr()
+    err = _show(app_layout.app_name, raw=True)
+    assert err == 0
+    captured = capfd.readouterr()
+    assert captured.out == "0.0.1\n"
+
+    index_path = os.path.join(
+        app_layout.repo_path, ".vmn", stamp_utils.TAG_INDEX_FILENAME
+    )
+    with open(index_path, "r") as f:
+        data = json.load(f)
+
+    assert f"{app_layout.app_name}_0.0.1" in data["tags"]
+
+    # Tags removed behind vmn's back must not be served from the index
+    app_layout.remove_tag(f"{app_layout.app_name}_0.0.1")
+
+    capfd.readouterr()
+    err = _show(app_layout.app_name, raw=True)
+    assert err == 0
+    captured = capfd.readouterr()
+    assert captured.out == "dirty:\n- modified\nout: 0.0.0\n\n"
+
+    # A corrupted index is ignored and rebuilt
+    with open(index_path, "w") as f:
+        f.write("{bla")
+
+    err, ver_info, _ = _stamp_app(f"{app_layout.app_name}", "patch")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.2"
+
+    err = _show(app_layout.app_name, raw=True)
+    assert err == 0
+
+    with open(index_path, "r") as f:
+        data = json.load(f)
+
+    assert f"{app_layout.app_name}_0.0.2" in data["tags"]
+    assert f"{app_layout.app_name}_0.0.1" not in data["tags"]
+
+
+def test_bulk_tags_ver_infos(app_layout):
+    _run_vmn_init()
+    app_name = "root_app/service1"
+    _init_app(app_name)
+    err, ver_info, _ = _stamp_app(app_name, "patch")
+    assert err == 0
+
+    app_layout.app_name = app_name
+    err = _add_buildmetadata_to_version(app_layout, "build.1", version="0.0.1")
+    assert err == 0
+
+    be = app_layout._app_backend.be
+    ver_infos = be.get_all_commit_tags()
+    assert set(ver_infos.keys()) == {
+        "root_app-service1_0.0.1",
+        "root_app-service1_0.0.1+build.1",
+        "root_app_1",
+    }
+
+    loaded = be.load_tags_ver_infos(["refs/tags/root_app-service1_*"])
+    assert list(loaded.keys()) == [
+        "root_app-service1_0.0.0",
+        "root_app-service1_0.0.1",
+        "root_app-service1_0.0.1+build.1",
+    ]
+
+    for tname, ver_info_c in loaded.items():
+        _, expected = be.parse_tag_message(tname)
+        assert ver_info_c["ver_info"] == expected["ver_info"]
+        assert ver_info_c["ver_info"] is not None
+        assert (
+            ver_info_c["tag_object"].commit.hexsha
+            == expected["tag_object"].commit.hexsha
+        )
+        assert (
+            ver_info_c["tag_object"].object.tagged_date
+            == expected["tag_object"].object.tagged_date
+        )
+
+
+def test_object_reader(app_layout):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+    err, ver_info, _ = _stamp_app(app_layout.app_name, "patch")
+    assert err == 0
+
+    be = app_layout._app_backend.be
+    tag_name, o = be.get_tag_object_from_tag_name(f"{app_layout.app_name}_0.0.1")
+    assert o is not None
+    assert o.commit.author.name == "vmn"
+    assert yaml.safe_load(o.object.message)["stamping"] == ver_info["stamping"]
+
+    _, ver_info_c = be.parse_tag_message(tag_name)
+    assert ver_info_c["ver_info"] == ver_info
+
+    _, commit_obj = be.get_commit_object_from_tag_name(tag_name)
+    assert commit_obj.hexsha == o.commit.hexsha
+    assert commit_obj.author.name == "vmn"
+
+    assert be.get_tag_object_from_tag_name("no_such_tag") == ("no_such_tag", None)
+
+    # Signatures are not part of the tag message
+    subprocess.check_call(
+        [
+            "git",
+            "-c",
+            "user.name=vmn",
+            "-c",
+            "user.email=vmn",
+            "tag",
+            "-a",
+            "-m",
+            "msg\n-----BEGIN PGP SIGNATURE-----\nbla\n-----END PGP SIGNATURE-----",
+            "signed_tag",
+        ],
+        cwd=app_layout.repo_path,
+    )
+    tag = be._object_reader.read("refs/tags/signed_tag")
+    assert tag.type == "tag"
+    assert tag.message == "msg\n"
+
+
+def test_serve(app_layout, capfd):
+    import threading
+
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+    _stamp_app(app_layout.app_name, "patch")
+
+    daemon = vmn.VMNDaemon(stamp_utils.resolve_root_path())
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        capfd.readouterr()
+        err = _show(app_layout.app_name, raw=True)
+        assert err == 0
+        captured = capfd.readouterr()
+        assert captured.out == "0.0.1\n"
+        assert daemon.requests_served == 1
+
+        # Errors are reported back to the client
+        err = _show(app_layout.app_name, version="1.0.0")
+        assert err == 1
+        captured = capfd.readouterr()
+        assert "[ERROR]" in captured.err
+        assert daemon.requests_served == 2
+
+        # Stamping is never served. The daemon notices the new tags
+        app_layout.write_file_commit_and_push("test_repo_0", "f1.file", "msg1")
+        err, _, _ = _stamp_app(app_layout.app_name, "patch")
+        assert err == 0
+        assert daemon.requests_served == 2
+
+        capfd.readouterr()
+        err = _show(app_layout.app_name, raw=True)
+        assert err == 0
+        captured = capfd.readouterr()
+        assert captured.out == "0.0.2\n"
+        assert daemon.requests_served == 3
+
+        os.environ[vmn.DAEMON_DISABLE_ENV] = "1"
+        try:
+            err = _show(app_layout.app_name, raw=True)
+        finally:
+            del os.environ[vmn.DAEMON_DISABLE_ENV]
+
+        assert err == 0
+        captured = capfd.readouterr()
+        assert captured.out == "0.0.2\n"
+        assert daemon.requests_served == 3
+    finally:
+        daemon.shutdown()
+        daemon.server_close()
+        thread.join()
+
+    assert not os.path.exists(daemon.socket_path)
+
+    err = _show(app_layout.app_name, raw=True)
+    assert err == 0
+    captured = capfd.readouterr()
+    assert captured.out == "0.0.2\n"
+
+
+def test_version_ordering(app_layout):
+    _run_vmn_init()
+    _init_app("app1")
+
+    for release_mode, prerelease in (
+        ("patch", None),
+        ("hotfix", None),
+        ("minor", "rc"),
+        (None, "rc"),
+    ):
+        app_layout.write_file_commit_and_push(
+            "test_repo_0", "f1.txt", f"{release_mode} {prerelease}"
+        )
+        err, _, _ = _stamp_app("app1", release_mode, prerelease=prerelease)
+        assert err == 0
+
+    err, _, _ = _release_app("app1", "0.1.0-rc.2")
+    assert err == 0
+
+    tags = subprocess.check_output(
+        ["git", "tag", "--list", "app1_*"], cwd=app_layout.test_app_remote
+    ).decode().split()
+    # Old 0.8.4 format has no rcn and sorts before the vmn prerelease
+    tags.extend(["app1_0.1.0-rc", "app1_0.0.1-rc.1"])
+
+    ordered = sorted(stamp_utils.VmnTag.parse(t) for t in tags)
+    assert [t.verstr for t in ordered] == [
+        "0.0.0",
+        "0.0.1-rc.1",
+        "0.0.1",
+        "0.0.1.1",
+        "0.1.0-rc",
+        "0.1.0-rc.1",
+        "0.1.0-rc.2",
+        "0.1.0",
+    ]
+
+    v = stamp_utils.VmnVersion.parse("1.2.3.4-alpha.10")
+    assert v is stamp_utils.VmnVersion.parse("1.2.3.4-alpha.10")
+    assert (v.major, v.minor, v.patch, v.hotfix, v.prerelease, v.rcn) == (
+        1,
+        2,
+        3,
+        4,
+        "alpha",
+        10,
+    )
+    assert stamp_utils.VmnVersion.parse("1.2.3.4-alpha.9") < v
+    assert stamp_utils.VmnVersion.parse("1.2.3.4-beta.1") > v
+    assert stamp_utils.VmnVersion.parse("1.2.3") == stamp_utils.VmnVersion.parse(
+        "1.2.3.0"
+    )
+
+    # Callers get their own copy of the cached parse result
+    props = stamp_utils.VMNBackend.deserialize_vmn_version("1.2.3")
+    props["hotfix"] = None
+    assert stamp_utils.VMNBackend.deserialize_vmn_version("1.2.3")["hotfix"] == 0
+
+    with pytest.raises(stamp_utils.WrongTagFormatException):
+        stamp_utils.VmnTag.parse("app1_1.2")
+
+
+def test_next_version_from_version_index(app_layout):
+    _run_vmn_init()
+    _init_app("app1")
+
+    for i in range(2):
+        app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", f"{i}")
+        err, _, _ = _stamp_app("app1", "patch")
+        assert err == 0
+
+    # A hotfix of an older version is the most recently created tag
+    subprocess.check_call(
+        ["git", "checkout", "-b", "hf", "app1_0.0.1"], cwd=app_layout.repo_path
+    )
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "hf")
+    err, ver_info, _ = _stamp_app("app1", "hotfix")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.1.1"
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "hf2")
+    err, ver_info, _ = _stamp_app("app1", "patch", prerelease="rc")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.3-rc.1"
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "hf3")
+    err, ver_info, _ = _stamp_app("app1", prerelease="beta")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.3-beta.1"
+    assert ver_info["stamping"]["app"]["prerelease_count"] == {"rc": 1, "beta": 1}
+
+    index = stamp_utils.AppVersionIndex(
+        [
+            "app1_1.0.0",
+            "app1_1.2.0",
+            "app1_1.2.7.3",
+            "app1_0.9.0",
+            "app1_3",
+            "app1_1.2.8-rc.4",
+            "app1_1.2.8-rc.2",
+            "app1_1.2.8-beta.1",
+            "app1_1.2.8-rc1",
+        ]
+    )
+    assert index.get_highest_octet(()) == 1
+    assert index.get_highest_octet((1,)) == 2
+    assert index.get_highest_octet((1, 2)) == 8
+    assert index.get_highest_octet((1, 2, 7)) == 3
+    assert index.get_highest_octet((2,)) is None
+    assert index.has_prereleases(1, 2, 8, 0)
+    assert not index.has_prereleases(1, 2, 7, 3)
+    assert stamp_utils.AppVersionIndex(["app1_1.2.8-rc1"]).has_prereleases(1, 2, 8, 0)
+
+
+def test_next_prerelease_after_old_format_tag(app_layout):
+    _run_vmn_init()
+    _init_app("app1")
+
+    err, _, _ = _stamp_app("app1", "patch")
+    assert err == 0
+    first_stamp = app_layout._app_backend._git_backend.git.rev_parse("HEAD")
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "0")
+    err, ver_info, _ = _stamp_app("app1", "patch", prerelease="rc")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.2-rc.1"
+
+    # A 0.8.4 format prerelease tag that was created last. Its message holds
+    # the prerelease counters to continue from
+    ver_info["stamping"]["app"]["_version"] = "0.0.2-rc4"
+    ver_info["stamping"]["app"]["prerelease_count"] = {"rc": 4}
+    env = dict(os.environ)
+    env.update(
+        {
+            "GIT_COMMITTER_NAME": "vmn",
+            "GIT_COMMITTER_EMAIL": "vmn@vmn.vmn",
+            "GIT_COMMITTER_DATE": "4000000000 +0000",
+        }
+    )
+    subprocess.run(
+        ["git", "tag", "-a", "app1_0.0.2-rc4", first_stamp, "-F", "-"],
+        cwd=app_layout.repo_path,
+        env=env,
+        input=yaml.dump(ver_info).encode(),
+        check=True,
+    )
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "1")
+    err, ver_info, _ = _stamp_app("app1", prerelease="rc")
+    assert err == 0
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.2-rc.5"
+    assert ver_info["stamping"]["app"]["prerelease_count"] == {"rc": 5}
+
+
+def test_profile_trace(app_layout):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content")
+
+    trace_path = os.path.join(app_layout.base_dir, "trace.json")
+    stamp_utils.VMN_LOGGER = None
+    err, _ = vmn.vmn_run(
+        ["--profile", trace_path, "stamp", "-r", "patch", app_layout.app_name]
+    )
+    assert err == 0
+    assert stamp_utils.TRACE_RECORDER is None
+
+    with open(trace_path) as f:
+        events = json.load(f)["traceEvents"]
+
+    spans = [e for e in events if e["ph"] == "X"]
+    vmn_spans = {e["name"]: e for e in spans if e["cat"] == "vmn"}
+    git_spans = [e for e in spans if e["cat"] == "git"]
+    assert "handle_stamp" in vmn_spans
+    assert "_get_repo_status" in vmn_spans
+    assert "publish_stamp" in vmn_spans
+
+    push = [e for e in git_spans if e["name"] == "git push"]
+    assert push
+    assert push[-1]["args"]["exit_code"] == 0
+    assert push[-1]["args"]["argv"][:2] == ["git", "push"]
+
+    # git commands nest in the spans of the functions that ran them
+    outer = vmn_spans["_vmn_run"]
+    for e in git_spans:
+        assert "stdout_bytes" in e["args"]
+        assert outer["ts"] <= e["ts"]
+        assert e["ts"] + e["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_tag_index_listed_once_after_stamp(app_layout):
+    _run_vmn_init()
+    _init_app("app1")
+    _init_app("app2")
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", "content")
+
+    for name in ("app1", "app2"):
+        err, _, _ = _stamp_app(name, "patch")
+        assert err == 0
+
+    # The refs were just updated so the persisted listing is not trusted
+    trace_path = os.path.join(app_layout.base_dir, "trace.json")
+    stamp_utils.VMN_LOGGER = None
+    err, _ = vmn.vmn_run(["--profile", trace_path, "show", "--verbose", "app2"])
+    assert err == 0
+
+    with open(trace_path) as f:
+        events = json.load(f)["traceEvents"]
+
+    listings = [
+        e
+        for e in events
+        if e["ph"] == "X"
+        and e["name"] == "git for-each-ref"
+        and "refs/tags" in e["args"]["argv"]
+    ]
+    assert len(listings) == 1
+
+
+def test_first_reachable_stamp_after_lost_tags(app_layout):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+
+    for i in range(3):
+        app_layout.write_file_commit_and_push("test_repo_0", "f1.txt", f"{i}")
+        err, ver_info, _ = _stamp_app(app_layout.app_name, "patch")
+        assert err == 0
+
+    assert ver_info["stamping"]["app"]["_version"] == "0.0.3"
+
+    # The two newest stamp commits lost their tags, like after a rebase
+    app_layout._app_backend._git_backend.git.tag(
+        "-d", f"{app_layout.app_name}_0.0.2", f"{app_layout.app_name}_0.0.3"
+    )
+
+    stamp_utils.VMN_LOGGER = None
+    err, vmn_ctx = vmn.vmn_run(["show", app_layout.app_name])
+
+    trace_path = os.path.join(app_layout.base_dir, "trace.json")
+    stamp_utils.start_trace()
+    tag_name, ver_infos = vmn_ctx.vcs.get_first_reachable_version_info(
+        app_layout.app_name, type=stamp_utils.RELATIVE_TO_CURRENT_VCS_BRANCH_TYPE
+    )
+    stamp_utils.stop_trace(trace_path)
+
+    assert tag_name == f"{app_layout.app_name}_0.0.1"
+    assert ver_infos[tag_name]["ver_info"]["stamping"]["app"]["_version"] == "0.0.1"
+
+    with open(trace_path) as f:
+        events = json.load(f)["traceEvents"]
+
+    # A single git log walked over the untagged stamp commits
+    logs = [
+        e
+        for e in events
+        if e["ph"] == "X"
+        and e["name"] == "git log"
+        and "--author=vmn" in e["args"]["argv"]
+    ]
+    assert len(logs) == 1
+
+
+def test_show_deferred_imports(app_layout):
+    _run_vmn_init()
+    _init_app(app_layout.app_name)
+    _stamp_app(app_layout.app_name, "patch")
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.join(os.path.dirname(__file__), "..")
+    env["VMN_NO_DAEMON"] = "1"
+
+    # Needed only by gen, the toml version backends, stamp and goto
+    deferred = ("jinja2", "tomlkit", "packaging", "multiprocessing.pool")
+    script = (
+        "import sys\n"
+        "from version_stamp import vmn\n"
+        f"assert vmn.main(['show', {app_layout.app_name!r}]) == 0\n"
+        f"print([m for m in {deferred!r} if m in sys.modules])\n"
+    )
+    res = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=app_layout.repo_path,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert res.returncode == 0
+    assert res.stdout.decode().splitlines() == ["0.0.1", "[]"]
+
+
+def test_python_api(app_layout):
+    import logging
+
+    import api
+
+    _run_vmn_init()
+    _init_app("root_app/service1")
+    _stamp_app("root_app/service1", "patch")
+
+    vmn_logger = logging.getLogger(stamp_utils.VMN_USER_NAME)
+    handlers = list(vmn_logger.handlers)
+    root_handlers = list(logging.getLogger().handlers)
+
+    be = api.get_backend(app_layout.repo_path)
+
+    res = api.show("root_app/service1", backend=be)
+    assert res.raw_version == "0.0.1"
+    assert res.version == "0.0.1"
+    assert not res.dirty
+    assert res.ver_info["stamping"]["app"]["_version"] == "0.0.1"
+
+    res = api.show("root_app", root=True, backend=be)
+    assert res.version == "1"
+
+    app_layout.write_file_commit_and_push("test_repo_0", "f1.file", "msg1")
+
+    res = api.show("root_app/service1", backend=be)
+    assert res.dirty_states == ["modified"]
+
+    res = api.stamp("root_app/service1", release_mode="patch", backend=be)
+    assert res.created
+    assert res.raw_version == "0.0.2"
+
+    res = api.stamp("root_app/service1", release_mode="patch", backend=be)
+    assert not res.created
+    assert res.raw_version == "0.0.2"
+
+    with pytest.raises(RuntimeError):
+        api.show("root_app/service1", version="9.9.9", backend=be)
+
+    res = api.goto("root_app/service1", version="0.0.1", backend=be)
+    assert res.version == "0.0.1"
+    assert api.show("root_app/service1").raw_version == "0.0.1"
+
+    # The API never installs logging handlers of its own
+    assert handlers == vmn_logger.handlers
+    assert root_handlers == logging.getLogger().handlers
+
+
+def test_tags_chronological_order(app_layout):
+    _run_vmn_init()
+    app_name = "root_app/service1"
+    _init_app(app_name)
+
+    for i in range(3):
+        app_layout.write_file_commit_and_push("test_repo_0", "f1.file", f"msg{i}")
+        err, _, _ = _stamp_app(app_name, "patch")
+        assert err == 0
+
+    be = app_layout._app_backend.be
+    for tag_prefix in ("root_app-service1_*", "root_app_*"):
+        tag_names = be.get_latest_available_tags(tag_prefix)
+        dates = []
+        for tname in tag_names:
+            _, o = be.get_tag_object_from_tag_name(tname)
+            dates.append(o.object.tagged_date)
+
+        # Every tag got its own second even though no sleep is performed
+        assert dates == sorted(set(dates))
+
+    tag_name = be.get_latest_available_tag("root_app-service1_*")
+    assert tag_name == "root_app-service1_0.0.3"
+    assert be.get_latest_available_tag("root_app_*") == "root_app_3"
+
+    ver_infos = be.get_all_commit_tags()
+    dates = [v["tag_object"].object.tagged_date for v in ver_infos.values()]
+    assert len(set(dates)) == len(dates)
+
+
 def test_shallow_removed_vmn_tag_repo_stamp(app_layout):
     _run_vmn_init()
     _init_app(app_layout.app_name)
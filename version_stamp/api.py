@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+In-process python API for vmn.
+
+Unlike vmn_run, these functions do not configure logging handlers, do not
+print and return result objects. A backend created by get_backend can be
+passed to every call so long running processes pay the backend setup once.
+"""
+import logging
+import os
+import pathlib
+import sys
+
+from filelock import FileLock
+
+CUR_PATH = "{0}/".format(os.path.dirname(__file__))
+sys.path.append(CUR_PATH)
+import stamp_utils
+import vmn
+
+_ARG_PARSER = None
+
+
+class ShowResult(object):
+    def __init__(self, name, tag_name, version, raw_version, dirty_states, ver_info):
+        self.name = name
+        self.tag_name = tag_name
+        # The version formatted according to the app's template
+        self.version = version
+        self.raw_version = raw_version
+        self.dirty_states = dirty_states
+        self.ver_info = ver_info
+
+    @property
+    def dirty(self):
+        return bool(self.dirty_states)
+
+    def __repr__(self):
+        return (
+            f"ShowResult(name={self.name!r}, version={self.version!r}, "
+            f"dirty_states={self.dirty_states!r})"
+        )
+
+
+class StampResult(object):
+    def __init__(self, name, version, raw_version, created, dry_run):
+        self.name = name
+        self.version = version
+        self.raw_version = raw_version
+        # False when an existing version matched the repository state
+        self.created = created
+        self.dry_run = dry_run
+
+    def __repr__(self):
+        return (
+            f"StampResult(name={self.name!r}, version={self.version!r}, "
+            f"created={self.created!r}, dry_run={self.dry_run!r})"
+        )
+
+
+class GotoResult(object):
+    def __init__(self, name, version):
+        self.name = name
+        # None means the tip of the branch
+        self.version = version
+
+    def __repr__(self):
+        return f"GotoResult(name={self.name!r}, version={self.version!r})"
+
+
+def get_backend(repo_path=None):
+    _init_logger()
+
+    root_path = stamp_utils.resolve_root_path(repo_path)
+    be, err = stamp_utils.get_client(
+        root_path, stamp_utils.VMN_BE_TYPE_GIT, inherit_env=True
+    )
+    if err:
+        raise RuntimeError(err)
+
+    return be
+
+
+def show(
+    name,
+    version=None,
+    root=False,
+    from_file=False,
+    ignore_dirty=False,
+    template=None,
+    repo_path=None,
+    backend=None,
+):
+    args = _create_args(
+        "show",
+        name,
+        version=version,
+        root=root,
+        from_file=from_file,
+        ignore_dirty=ignore_dirty,
+        template=template,
+    )
+    root_path = _get_root_path(repo_path, backend)
+
+    with _get_lock(root_path):
+        vmnc = vmn.VMNContainer(args, root_path, backend)
+        vmn.init_show_params(vmnc)
+        tag_name, ver_info, dirty_states = vmn.get_show_info(
+            vmnc.vcs, vmnc.params, version
+        )
+        vmnc.vcs.backend.flush_caches()
+
+    if vmnc.vcs.root_context:
+        raw_version = str(ver_info["stamping"]["root_app"]["version"])
+        formatted_version = raw_version
+    else:
+        raw_version = ver_info["stamping"]["app"]["_version"]
+        verstr = stamp_utils.VMNBackend.deserialize_vmn_tag_name(tag_name)["verstr"]
+        formatted_version = stamp_utils.VMNBackend.get_utemplate_formatted_version(
+            verstr, vmnc.vcs.template, vmnc.vcs.hide_zero_hotfix
+        )
+
+    return ShowResult(
+        name,
+        tag_name,
+        formatted_version,
+        raw_version,
+        dirty_states or [],
+        ver_info,
+    )
+
+
+def stamp(
+    name,
+    release_mode=None,
+    optional_release_mode=None,
+    prerelease=None,
+    override_version=None,
+    override_root_version=None,
+    extra_commit_message="",
+    pull=False,
+    check_vmn_version=True,
+    dry_run=False,
+    repo_path=None,
+    backend=None,
+):
+    args = _create_args(
+        "stamp",
+        name,
+        release_mode=release_mode,
+        orm=optional_release_mode,
+        pr=prerelease,
+        ov=override_version,
+        orv=override_root_version,
+        extra_commit_message=extra_commit_message,
+        pull=pull,
+        check_vmn_version=check_vmn_version,
+        dry=dry_run,
+    )
+    vmnc = _run(args, repo_path, backend)
+    version = vmnc.vcs.stamped_version
+
+    return StampResult(
+        name,
+        vmnc.vcs.get_be_formatted_version(version),
+        version,
+        vmnc.vcs.created_new_version,
+        dry_run,
+    )
+
+
+def goto(
+    name,
+    version=None,
+    root=False,
+    deps_only=False,
+    pull=False,
+    jobs=vmn.GOTO_DEFAULT_JOBS,
+    repo_path=None,
+    backend=None,
+):
+    args = _create_args(
+        "goto",
+        name,
+        version=version,
+        root=root,
+        deps_only=deps_only,
+        pull=pull,
+        jobs=jobs,
+    )
+    _run(args, repo_path, backend)
+
+    return GotoResult(name, version)
+
+
+def _run(args, repo_path, backend):
+    root_path = _get_root_path(repo_path, backend)
+
+    with _get_lock(root_path):
+        err, vmnc = vmn._vmn_run(args, root_path, backend)
+        vmnc.vcs.backend.flush_caches()
+
+    if err:
+        raise RuntimeError(f"vmn {args.command} failed for {args.name}")
+
+    return vmnc
+
+
+def _init_logger():
+    # Never configure handlers. That is up to the embedding application
+    if stamp_utils.VMN_LOGGER is None:
+        stamp_utils.VMN_LOGGER = logging.getLogger(stamp_utils.VMN_USER_NAME)
+
+
+def _create_args(command, name, **kwargs):
+    global _ARG_PARSER
+
+    _init_logger()
+
+    if _ARG_PARSER is None:
+        _ARG_PARSER = vmn.create_arg_parser()
+
+    args = _ARG_PARSER.parse_args([command, name])
+    for key, value in kwargs.items():
+        setattr(args, key, value)
+
+    vmn.verify_user_input_version(args, "version")
+    vmn.verify_user_input_version(args, "ov")
+    vmn.verify_user_input_version(args, "orv")
+
+    return args
+
+
+def _get_root_path(repo_path, backend):
+    if repo_path is None and backend is not None:
+        return backend.repo_path
+
+    return stamp_utils.resolve_root_path(repo_path)
+
+
+def _get_lock(root_path):
+    vmn_path = os.path.join(root_path, ".vmn")
+    pathlib.Path(vmn_path).mkdir(parents=True, exist_ok=True)
+
+    lock_file_path = os.path.join(vmn_path, vmn.LOCK_FILENAME)
+    if vmn.LOCK_FILE_ENV in os.environ:
+        lock_file_path = os.environ[vmn.LOCK_FILE_ENV]
+
+    return FileLock(lock_file_path)
@@ -1,18 +1,29 @@
 #!/usr/bin/env python3
+import bisect
+import collections
 import configparser
+import copy
 import datetime
+import fnmatch
 import glob
+import hashlib
+import json
 import logging
 import os
 import pathlib
 import re
+import shutil
+import stat
+import subprocess
 import sys
+import threading
 import time
-from functools import wraps
+from functools import lru_cache, total_ordering, wraps
 from logging.handlers import RotatingFileHandler
 
 import git
 import yaml
+from git.util import hex_to_bin
 
 INIT_COMMIT_MESSAGE = "Initialized vmn tracking"
 
@@ -30,6 +41,8 @@ VMN_DEFAULT_CONF = {
     "version_backends": {},
     "deps": {},
     "policies": {},
+    # Minutes before the fetched tags are checked against the remote again
+    "fetch_cache_ttl": 30,
 }
 
 _DIGIT_REGEX = r"0|[1-9]\d*"
@@ -85,6 +98,16 @@ VMN_TEMPLATE_REGEX = (
     r"(?:\[(?P<buildmetadata_template>[^\{\}]*\{buildmetadata\}[^\{\}]*)\])?$"
 )
 
+# Compiled once as these are matched against every tag vmn looks at
+_VMN_ROOT_VERSION_PATTERN = re.compile(VMN_ROOT_VERSION_REGEX)
+_VMN_VERSION_PATTERN = re.compile(VMN_VERSION_REGEX)
+_VMN_OLD_PATTERN = re.compile(VMN_OLD_REGEX)
+_VMN_ROOT_TAG_PATTERN = re.compile(VMN_ROOT_TAG_REGEX)
+_VMN_TAG_PATTERN = re.compile(VMN_TAG_REGEX)
+_VMN_OLD_TAG_PATTERN = re.compile(VMN_OLD_TAG_REGEX)
+
+VERSION_PARSE_CACHE_SIZE = 4096
+
 SUPPORTED_REGEX_VARS = {
     "VMN_VERSION_REGEX": _VMN_VERSION_REGEX,
     "VMN_ROOT_VERSION_REGEX": VMN_ROOT_VERSION_REGEX,
@@ -102,6 +125,9 @@ VMN_BE_TYPE_GIT = "git"
 VMN_BE_TYPE_LOCAL_FILE = "local_file"
 
 GLOBAL_LOG_FILENAME = "global_vmn.log"
+TAG_INDEX_FILENAME = "vmn.index"
+VERINFO_INDEX_FILENAME = "vmn.verinfo_index"
+FETCH_CACHE_FILENAME = "vmn.cache"
 VMN_LOGGER = None
 
 
@@ -119,9 +145,19 @@ def custom_execute(self, *args, **kwargs):
     kwargs["with_extended_output"] = True
 
     start_time = time.perf_counter()
-    ret = original_execute(self, *args, **kwargs)
+    try:
+        ret = original_execute(self, *args, **kwargs)
+    except git.exc.GitCommandError as exc:
+        trace_git_command(args[0], start_time, time.perf_counter(), exc.status)
+        raise
     end_time = time.perf_counter()
 
+    # Processes started with as_process have not finished yet. Their readers
+    # trace the actual work
+    traced = type(ret) is tuple
+    if traced:
+        traced_status, traced_stdout = ret[0], ret[1]
+
     ret_code = 0
     sout = ""
     serr = ""
@@ -147,6 +183,11 @@ def custom_execute(self, *args, **kwargs):
             f"{'  ' * (len(call_stack) - 1)}stderr: {serr}"
         )
 
+    if traced:
+        trace_git_command(
+            args[0], start_time, end_time, traced_status, traced_stdout
+        )
+
     return ret
 
 
@@ -159,6 +200,125 @@ call_stack = []
 call_count = {}
 
 
+class TraceRecorder(object):
+    """
+    Collects timed spans in the Chrome trace event format. The resulting file
+    can be loaded in chrome://tracing, Perfetto or speedscope. Spans of the
+    same thread nest by their time ranges.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._events = []
+        self._threads = set()
+
+    def _to_us(self, perf_counter_time):
+        return round((perf_counter_time - self._origin) * 1000000, 3)
+
+    def add_span(self, name, category, start_time, end_time, args=None):
+        tid = threading.get_ident()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": self._to_us(start_time),
+            "dur": round((end_time - start_time) * 1000000, 3),
+            "pid": self._pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+
+        with self._lock:
+            if tid not in self._threads:
+                self._threads.add(tid)
+                self._events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": self._pid,
+                        "tid": tid,
+                        "args": {"name": threading.current_thread().name},
+                    }
+                )
+
+            self._events.append(event)
+
+    def write(self, path):
+        with self._lock:
+            data = {"traceEvents": list(self._events), "displayTimeUnit": "ms"}
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+TRACE_RECORDER = None
+
+
+def start_trace():
+    global TRACE_RECORDER
+
+    TRACE_RECORDER = TraceRecorder()
+
+
+def stop_trace(path):
+    global TRACE_RECORDER
+
+    recorder = TRACE_RECORDER
+    TRACE_RECORDER = None
+    if recorder is None:
+        return
+
+    try:
+        recorder.write(path)
+        if VMN_LOGGER is not None:
+            VMN_LOGGER.debug(f"Wrote trace to {path}")
+    except Exception:
+        if VMN_LOGGER is not None:
+            VMN_LOGGER.error(f"Failed to write trace to {path}", exc_info=True)
+
+
+def trace_git_command(argv, start_time, end_time, exit_code, stdout=None):
+    recorder = TRACE_RECORDER
+    if recorder is None:
+        return
+
+    argv = [str(v) for v in argv]
+
+    # git [-c key=value | -C path ...] <subcommand>
+    name = "git"
+    skip = False
+    for arg in argv[1:]:
+        if skip:
+            skip = False
+        elif arg in ("-c", "-C"):
+            skip = True
+        elif not arg.startswith("-"):
+            name = f"git {arg}"
+            break
+
+    stdout_bytes = None
+    if isinstance(stdout, str):
+        stdout_bytes = len(stdout.encode("utf-8", errors="replace"))
+    elif isinstance(stdout, bytes):
+        stdout_bytes = len(stdout)
+    elif isinstance(stdout, int):
+        # Streamed output, only the amount that was read is known
+        stdout_bytes = stdout
+
+    recorder.add_span(
+        name,
+        "git",
+        start_time,
+        end_time,
+        {"argv": argv, "exit_code": exit_code, "stdout_bytes": stdout_bytes},
+    )
+
+
 def measure_runtime_decorator(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -179,9 +339,20 @@ def measure_runtime_decorator(func):
 
         start_time = time.perf_counter()
         # Call the actual function
-        result = func(*args, **kwargs)
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            call_stack.pop()
+            if TRACE_RECORDER is not None:
+                TRACE_RECORDER.add_span(
+                    func.__name__, "vmn", start_time, time.perf_counter()
+                )
+            raise
         end_time = time.perf_counter()
 
+        if TRACE_RECORDER is not None:
+            TRACE_RECORDER.add_span(func.__name__, "vmn", start_time, end_time)
+
         elapsed_time = end_time - start_time
 
         if VMN_LOGGER is not None:
@@ -200,10 +371,12 @@ class WrongTagFormatException(Exception):
     pass
 
 
-def resolve_root_path():
-    cwd = os.getcwd()
-    if "VMN_WORKING_DIR" in os.environ:
-        cwd = os.environ["VMN_WORKING_DIR"]
+def resolve_root_path(path=None):
+    cwd = path
+    if cwd is None:
+        cwd = os.getcwd()
+        if "VMN_WORKING_DIR" in os.environ:
+            cwd = os.environ["VMN_WORKING_DIR"]
 
     root_path = os.path.realpath(os.path.expanduser(cwd))
     """
@@ -231,6 +404,85 @@ def resolve_root_path():
     return root_path
 
 
+def replace_file(tmp_path, path):
+    """
+    Move tmp_path over path, which should already be resolved with
+    os.path.realpath. The rename is atomic unless it would lose the
+    permissions, the owner or the other hard links of path, in which case
+    path is rewritten in place
+    """
+    try:
+        path_stat = os.stat(path)
+    except FileNotFoundError:
+        os.replace(tmp_path, path)
+        return
+
+    in_place = path_stat.st_nlink > 1
+    if not in_place:
+        os.chmod(tmp_path, stat.S_IMODE(path_stat.st_mode))
+        tmp_stat = os.stat(tmp_path)
+        owner = (path_stat.st_uid, path_stat.st_gid)
+        if (tmp_stat.st_uid, tmp_stat.st_gid) != owner:
+            try:
+                os.chown(tmp_path, *owner)
+            except (AttributeError, PermissionError):
+                in_place = True
+
+    if in_place:
+        shutil.copyfile(tmp_path, path)
+        os.remove(tmp_path)
+        return
+
+    os.replace(tmp_path, path)
+
+
+def make_sibling_tmp_file(path):
+    """
+    Create a temporary file in the directory of path so that os.replace stays
+    on the same filesystem. Unlike tempfile.mkstemp, its permissions follow
+    the umask like those of a file created by open(). Returns (fd, tmp_path)
+    """
+    dir_path = os.path.dirname(os.path.abspath(path))
+    while True:
+        tmp_path = os.path.join(
+            dir_path, f".{os.path.basename(path)}.{os.urandom(4).hex()}.tmp"
+        )
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+
+        return fd, tmp_path
+
+
+def write_file_if_changed(path, content):
+    """
+    Write content to path through a temporary file and an atomic rename,
+    unless path already holds content. A symlink is followed and its target
+    is written. Returns True if path was written
+    """
+    path = os.path.realpath(path)
+    try:
+        with open(path) as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+
+    fd, tmp_path = make_sibling_tmp_file(path)
+    try:
+        with open(fd, "w") as f:
+            f.write(content)
+
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return True
+
+
 class LevelFilter(logging.Filter):
     def __init__(self, low, high):
         self._low = low
@@ -310,6 +562,337 @@ def clear_logger_handlers(logger_obj):
         logger_obj.removeFilter(logger_obj.filters[0])
 
 
+def _prerelease_sort_key(prerelease):
+    # semver: numeric identifiers sort numerically and before alphanumeric ones
+    key = []
+    for identifier in prerelease.split("."):
+        if identifier.isdigit():
+            key.append((0, int(identifier), ""))
+        else:
+            key.append((1, 0, identifier))
+
+    return tuple(key)
+
+
+@total_ordering
+class VmnVersion(object):
+    """
+    Immutable parsed form of a vmn version string (root or app version).
+
+    Instances are cached by their string so repeated parsing of the same
+    version is a dictionary lookup. Ordering follows vmn semantics: hotfix
+    is the fourth octet, a release sorts after its prereleases, prereleases
+    are compared by identifiers and then by rcn, and the old 0.8.4 format
+    (no rcn) sorts before a vmn prerelease with the same identifiers.
+    Root versions compare only with root versions.
+    """
+
+    __slots__ = (
+        "verstr",
+        "root_version",
+        "major",
+        "minor",
+        "patch",
+        "hotfix",
+        "prerelease",
+        "rcn",
+        "buildmetadata",
+        "old_ver_format",
+        "_key",
+    )
+
+    def __init__(
+        self,
+        verstr,
+        root_version=None,
+        major=None,
+        minor=None,
+        patch=None,
+        hotfix=None,
+        prerelease="release",
+        rcn=None,
+        buildmetadata=None,
+        old_ver_format=False,
+    ):
+        self.verstr = verstr
+        self.root_version = root_version
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.hotfix = hotfix
+        self.prerelease = prerelease
+        self.rcn = rcn
+        self.buildmetadata = buildmetadata
+        self.old_ver_format = old_ver_format
+
+        if self.is_root:
+            self._key = (int(root_version),)
+        else:
+            is_release = prerelease == "release"
+            self._key = (
+                major,
+                minor,
+                patch,
+                hotfix,
+                int(is_release),
+                () if is_release else _prerelease_sort_key(prerelease),
+                -1 if rcn is None else rcn,
+                buildmetadata or "",
+            )
+
+    @staticmethod
+    def parse(verstr):
+        version = _parse_vmn_version(verstr)
+        if version is None:
+            raise WrongTagFormatException()
+
+        return version
+
+    @property
+    def is_root(self):
+        return self.root_version is not None
+
+    def to_dict(self):
+        types = {"version"}
+        if self.is_root:
+            types.add("root")
+        else:
+            if self.prerelease != "release":
+                types.add("prerelease")
+            if self.buildmetadata is not None:
+                types.add("buildmetadata")
+
+        return {
+            "types": types,
+            "root_version": self.root_version,
+            "major": self.major,
+            "minor": self.minor,
+            "patch": self.patch,
+            "hotfix": self.hotfix,
+            "prerelease": self.prerelease,
+            "rcn": self.rcn,
+            "buildmetadata": self.buildmetadata,
+            "old_ver_format": self.old_ver_format,
+        }
+
+    def _comparable_key(self, other):
+        if not isinstance(other, VmnVersion) or self.is_root != other.is_root:
+            return None
+
+        return other._key
+
+    def __eq__(self, other):
+        key = self._comparable_key(other)
+        if key is None:
+            return NotImplemented
+
+        return self._key == key
+
+    def __lt__(self, other):
+        key = self._comparable_key(other)
+        if key is None:
+            return NotImplemented
+
+        return self._key < key
+
+    def __hash__(self):
+        return hash((self.is_root, self._key))
+
+    def __repr__(self):
+        return f"VmnVersion({self.verstr!r})"
+
+    def __str__(self):
+        return self.verstr
+
+
+@total_ordering
+class VmnTag(object):
+    """
+    Immutable parsed form of a vmn tag name. Tags order by app name and
+    then by version.
+    """
+
+    __slots__ = ("tag_name", "app_name", "old_tag_format", "version")
+
+    def __init__(self, tag_name, app_name, version, old_tag_format=False):
+        self.tag_name = tag_name
+        self.app_name = app_name
+        self.version = version
+        self.old_tag_format = old_tag_format
+
+    @staticmethod
+    def parse(tag_name):
+        tag = _parse_vmn_tag(tag_name)
+        if tag is None:
+            raise WrongTagFormatException()
+
+        return tag
+
+    @property
+    def verstr(self):
+        return self.version.verstr
+
+    def to_dict(self):
+        ret = {
+            "app_name": self.app_name,
+            "old_tag_format": self.old_tag_format,
+            "verstr": self.verstr,
+        }
+        ret.update(self.version.to_dict())
+
+        return ret
+
+    def _sort_key(self):
+        return (self.app_name, self.version.is_root, self.version._key)
+
+    def __eq__(self, other):
+        if not isinstance(other, VmnTag):
+            return NotImplemented
+
+        return self._sort_key() == other._sort_key()
+
+    def __lt__(self, other):
+        if not isinstance(other, VmnTag):
+            return NotImplemented
+
+        return self._sort_key() < other._sort_key()
+
+    def __hash__(self):
+        return hash(self._sort_key())
+
+    def __repr__(self):
+        return f"VmnTag({self.tag_name!r})"
+
+    def __str__(self):
+        return self.tag_name
+
+
+@lru_cache(maxsize=VERSION_PARSE_CACHE_SIZE)
+def _parse_vmn_version(verstr):
+    match = _VMN_ROOT_VERSION_PATTERN.search(verstr)
+    if match is not None:
+        root_version = match.group("version")
+        int(root_version)
+
+        return VmnVersion(verstr, root_version=root_version)
+
+    match = _VMN_VERSION_PATTERN.search(verstr)
+    old_ver_format = False
+    if match is None:
+        match = _VMN_OLD_PATTERN.search(verstr)
+        if match is None:
+            return None
+
+        old_ver_format = True
+
+    gdict = match.groupdict()
+    if old_ver_format:
+        gdict["rcn"] = -1
+
+    hotfix = 0
+    if gdict["hotfix"] is not None:
+        hotfix = int(gdict["hotfix"])
+
+    prerelease = "release"
+    rcn = None
+    if gdict["prerelease"] is not None:
+        prerelease = gdict["prerelease"]
+        rcn = int(gdict["rcn"])
+
+    return VmnVersion(
+        verstr,
+        major=int(gdict["major"]),
+        minor=int(gdict["minor"]),
+        patch=int(gdict["patch"]),
+        hotfix=hotfix,
+        prerelease=prerelease,
+        rcn=rcn,
+        buildmetadata=gdict["buildmetadata"],
+        old_ver_format=old_ver_format,
+    )
+
+
+@lru_cache(maxsize=VERSION_PARSE_CACHE_SIZE)
+def _parse_vmn_tag(tag_name):
+    old_tag_format = False
+    match = _VMN_ROOT_TAG_PATTERN.search(tag_name)
+    if match is not None:
+        app_name = match.group("app_name")
+    else:
+        match = _VMN_TAG_PATTERN.search(tag_name)
+        if match is None:
+            match = _VMN_OLD_TAG_PATTERN.search(tag_name)
+            if match is None:
+                return None
+
+            old_tag_format = True
+
+        app_name = VMNBackend.tag_name_to_app_name(match.group("app_name"))
+
+    res = VMNBackend.app_name_to_tag_name(app_name)
+    version = _parse_vmn_version(tag_name.split(f"{res}_")[1])
+    if version is None:
+        return None
+
+    return VmnTag(tag_name, app_name, version, old_tag_format)
+
+
+class AppVersionIndex(object):
+    """
+    The versions of a single app ordered by VmnVersion, answering the queries
+    needed to compute the next version without listing tags again: the
+    highest octet under a version prefix (bisect) and whether a base version
+    has any prerelease (set lookup).
+    """
+
+    def __init__(self, tag_names):
+        versions = []
+        for tag_name in tag_names:
+            tag = _parse_vmn_tag(tag_name)
+            if tag is None or tag.version.is_root:
+                continue
+
+            versions.append(tag.version)
+
+        versions.sort()
+
+        # (major, minor, patch, hotfix) of each version, in the same order
+        self._bases = []
+        # Including old 0.8.4 format prereleases
+        self._prerelease_bases = set()
+        for version in versions:
+            base = (version.major, version.minor, version.patch, version.hotfix)
+            self._bases.append(base)
+
+            if version.prerelease != "release":
+                self._prerelease_bases.add(base)
+
+    def __len__(self):
+        return len(self._bases)
+
+    def get_highest_octet(self, prefix):
+        """
+        Return the highest octet that follows prefix, a tuple of the leading
+        octets, i.e. () for the highest major and (1, 2) for the highest
+        patch of 1.2. None if there is no version under prefix.
+        """
+        if len(prefix) >= 4:
+            raise RuntimeError(f"Invalid version prefix: {prefix}")
+
+        if not prefix:
+            pos = len(self._bases)
+        else:
+            pos = bisect.bisect_left(self._bases, prefix[:-1] + (prefix[-1] + 1,))
+
+        if pos == 0 or self._bases[pos - 1][: len(prefix)] != prefix:
+            return None
+
+        return self._bases[pos - 1][len(prefix)]
+
+    def has_prereleases(self, major, minor, patch, hotfix):
+        return (major, minor, patch, hotfix) in self._prerelease_bases
+
+
 class VMNBackend(object):
     def __init__(self, btype):
         self._type = btype
@@ -320,6 +903,9 @@ class VMNBackend(object):
     def type(self):
         return self._type
 
+    def flush_caches(self):
+        pass
+
     def prepare_for_remote_operation(self):
         return 0
 
@@ -332,6 +918,9 @@ class VMNBackend(object):
     def last_user_changeset(self):
         return "none"
 
+    def get_app_version_index(self, app_name):
+        return AppVersionIndex([])
+
     @staticmethod
     def app_name_to_tag_name(app_name):
         return app_name.replace("/", "-")
@@ -496,95 +1085,11 @@ class VMNBackend(object):
 
     @staticmethod
     def deserialize_tag_name(some_tag):
-        ret = {
-            "app_name": None,
-            "old_tag_format": False,
-        }
-
-        match = re.search(VMN_ROOT_TAG_REGEX, some_tag)
-        if match is not None:
-            gdict = match.groupdict()
-            ret["app_name"] = gdict["app_name"]
-        else:
-            match = re.search(VMN_TAG_REGEX, some_tag)
-            old_tag_format = False
-            if match is None:
-                match = re.search(VMN_OLD_TAG_REGEX, some_tag)
-                if match is None:
-                    raise WrongTagFormatException()
-
-                old_tag_format = True
-
-            gdict = match.groupdict()
-            if old_tag_format:
-                ret["old_tag_format"] = True
-
-            ret["app_name"] = VMNBackend.tag_name_to_app_name(gdict["app_name"])
-
-        res = VMNBackend.app_name_to_tag_name(ret["app_name"])
-        ret["verstr"] = some_tag.split(f"{res}_")[1]
-
-        ret.update(VMNBackend.deserialize_vmn_version(ret["verstr"]))
-
-        return ret
+        return VmnTag.parse(some_tag).to_dict()
 
     @staticmethod
     def deserialize_vmn_version(verstr):
-        ret = {
-            "types": {"version"},
-            "root_version": None,
-            "major": None,
-            "minor": None,
-            "patch": None,
-            "hotfix": None,
-            "prerelease": "release",
-            "rcn": None,
-            "buildmetadata": None,
-            "old_ver_format": False,
-        }
-
-        match = re.search(VMN_ROOT_VERSION_REGEX, verstr)
-        if match is not None:
-            gdict = match.groupdict()
-
-            int(gdict["version"])
-            ret["root_version"] = gdict["version"]
-            ret["types"].add("root")
-
-            return ret
-
-        match = re.search(VMN_VERSION_REGEX, verstr)
-        old_ver_format = False
-        if match is None:
-            match = re.search(VMN_OLD_REGEX, verstr)
-            if match is None:
-                raise WrongTagFormatException()
-
-            old_ver_format = True
-
-        gdict = match.groupdict()
-        if old_ver_format:
-            gdict["rcn"] = -1
-            ret["old_ver_format"] = True
-
-        ret["major"] = int(gdict["major"])
-        ret["minor"] = int(gdict["minor"])
-        ret["patch"] = int(gdict["patch"])
-        ret["hotfix"] = 0
-
-        if gdict["hotfix"] is not None:
-            ret["hotfix"] = int(gdict["hotfix"])
-
-        if gdict["prerelease"] is not None:
-            ret["prerelease"] = gdict["prerelease"]
-            ret["rcn"] = int(gdict["rcn"])
-            ret["types"].add("prerelease")
-
-        if gdict["buildmetadata"] is not None:
-            ret["buildmetadata"] = gdict["buildmetadata"]
-            ret["types"].add("buildmetadata")
-
-        return ret
+        return VmnVersion.parse(verstr).to_dict()
 
     @staticmethod
     def deserialize_vmn_tag_name(vmn_tag):
@@ -606,6 +1111,91 @@ class VMNBackend(object):
             raise exc
 
 
+class VerInfoIndex(object):
+    """
+    Local cache of the latest verinfo file of each verinfo directory under
+    .vmn. It is derived from the verinfo files and never committed, so stamps
+    on different branches can not conflict on it. An entry is trusted as long
+    as its directory mtime, which changes whenever a verinfo file is added or
+    removed, is the recorded one.
+    """
+
+    def __init__(self, vmn_path):
+        self.vmn_path = vmn_path
+        self.path = os.path.join(vmn_path, VERINFO_INDEX_FILENAME)
+        # relative dir path -> (dir mtime, latest verinfo file name)
+        self._entries = None
+
+    def get_latest_path(self, dir_path):
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        key = os.path.relpath(dir_path, self.vmn_path).replace(os.sep, "/")
+        entry = self._load().get(key)
+        if entry is not None and entry[0] == mtime_ns:
+            path = os.path.join(dir_path, entry[1])
+            if os.path.isfile(path):
+                return path
+
+        path = VerInfoIndex._scan_latest_path(dir_path)
+        if path is None:
+            return None
+
+        # A verinfo file added in the same timestamp tick would go unnoticed
+        if mtime_ns < time.time_ns() - GitTagIndex.RACY_WINDOW_NS:
+            self._entries[key] = (mtime_ns, os.path.basename(path))
+            self._save()
+
+        return path
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    items = line.rstrip("\n").split("\t")
+                    if len(items) == 3:
+                        self._entries[items[0]] = (int(items[1]), items[2])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            VMN_LOGGER.debug(f"Ignoring unreadable index {self.path}", exc_info=True)
+            self._entries = {}
+
+        return self._entries
+
+    def _save(self):
+        content = "".join(
+            f"{key}\t{mtime_ns}\t{name}\n"
+            for key, (mtime_ns, name) in sorted(self._entries.items())
+        )
+        try:
+            write_file_if_changed(self.path, content)
+        except OSError:
+            # Only a cache, a read only checkout is scanned every time
+            VMN_LOGGER.debug(f"Failed to write index {self.path}", exc_info=True)
+
+    @staticmethod
+    def _scan_latest_path(dir_path):
+        latest_path = None
+        latest_version = None
+        for path in glob.glob(os.path.join(dir_path, "*.yml")):
+            version = _parse_vmn_version(os.path.basename(path)[: -len(".yml")])
+            if version is None:
+                continue
+
+            if latest_version is None or latest_version < version:
+                latest_path = path
+                latest_version = version
+
+        return latest_path
+
+
 class LocalFileBackend(VMNBackend):
     def __init__(self, repo_path):
         VMNBackend.__init__(self, VMN_BE_TYPE_LOCAL_FILE)
@@ -620,11 +1210,12 @@ class LocalFileBackend(VMNBackend):
         self.repo_path = repo_path
         self.active_branch = "none"
         self.remote_active_branch = "remote/none"
+        self._verinfo_index = VerInfoIndex(vmn_dir_path)
 
     def __del__(self):
         pass
 
-    def perform_cached_fetch(self, force=False):
+    def perform_cached_fetch(self, force=False, app_names=None):
         return
 
     def get_first_reachable_version_info(
@@ -639,22 +1230,13 @@ class LocalFileBackend(VMNBackend):
         }
         if root:
             dir_path = os.path.join(self.repo_path, ".vmn", app_name, "root_verinfo")
-            list_of_files = glob.glob(os.path.join(dir_path, "*.yml"))
-            if not list_of_files:
-                return None, {}
-
-            latest_file = max(list_of_files, key=os.path.getctime)
-            with open(latest_file, "r") as f:
-                ver_infos["none"]["ver_info"] = yaml.safe_load(f)
-                return "none", ver_infos
+        else:
+            dir_path = os.path.join(self.repo_path, ".vmn", app_name, "verinfo")
 
-        dir_path = os.path.join(self.repo_path, ".vmn", app_name, "verinfo")
-        list_of_files = glob.glob(os.path.join(dir_path, "*.yml"))
-        if not list_of_files:
+        latest_file = self._verinfo_index.get_latest_path(dir_path)
+        if latest_file is None:
             return None, {}
 
-        latest_file = max(list_of_files, key=os.path.getctime)
-
         with open(latest_file, "r") as f:
             ver_infos["none"]["ver_info"] = yaml.safe_load(f)
             return "none", ver_infos
@@ -709,33 +1291,417 @@ class LocalFileBackend(VMNBackend):
         else:
             dir_path = os.path.join(self.repo_path, ".vmn", app_name, "verinfo")
 
-        files = glob.glob(os.path.join(dir_path, "*"))
+        latest_file = self._verinfo_index.get_latest_path(dir_path)
+
+        ver_infos = {}
+        tag_names = []
+        if latest_file is not None:
+            with open(latest_file, "r") as f:
+                data = yaml.safe_load(f)
+                if root_context:
+                    ver = data["stamping"]["root_app"]["version"]
+                else:
+                    ver = data["stamping"]["app"]["_version"]
+
+                tag_name = VMNBackend.serialize_vmn_tag_name(app_name, ver)
+                tag_names.append(tag_name)
+                ver_infos = {
+                    tag_name: {
+                        "ver_info": None,
+                        "tag_object": None,
+                        "commit_object": None,
+                    }
+                }
+                ver_infos[tag_name]["ver_info"] = data
+
+        return tag_names, None, ver_infos
+
+
+GitObject = collections.namedtuple(
+    "GitObject", ["hexsha", "type", "headers", "message"]
+)
+
+
+class GitObjectReader(object):
+    """
+    Serves tag and commit objects from a single long-lived git cat-file --batch
+    process instead of spawning a git process per lookup. Parsed objects are
+    kept in a small LRU keyed by their (immutable) sha.
+    """
+
+    CACHE_SIZE = 1024
+    SIGNATURE_MARKERS = (
+        "-----BEGIN PGP SIGNATURE-----",
+        "-----BEGIN PGP MESSAGE-----",
+        "-----BEGIN SSH SIGNATURE-----",
+    )
+
+    def __init__(self, repo):
+        self._repo = repo
+        self._proc = None
+        self._lock = threading.Lock()
+        self._cache = collections.OrderedDict()
+
+    def _start(self):
+        self._proc = self._repo.git.cat_file(
+            "--batch", as_process=True, istream=subprocess.PIPE
+        )
+
+    def close(self):
+        with self._lock:
+            if self._proc is None:
+                return
+
+            try:
+                self._proc.proc.stdin.close()
+                self._proc.proc.wait()
+            except Exception:
+                pass
+
+            self._proc = None
+
+    def _request(self, rev):
+        if self._proc is None:
+            self._start()
+
+        proc = self._proc.proc
+        proc.stdin.write(f"{rev}\n".encode())
+        proc.stdin.flush()
+
+        header = proc.stdout.readline().decode()
+        items = header.split()
+        if len(items) != 3:
+            # <rev> missing / <rev> ambiguous
+            return None, None, None
+
+        hexsha, otype, size = items
+        data = proc.stdout.read(int(size))
+        # Each object content is followed by a newline
+        proc.stdout.read(1)
+
+        return hexsha, otype, data
+
+    def read(self, rev):
+        with self._lock:
+            cached = self._cache.get(rev)
+            if cached is not None:
+                self._cache.move_to_end(rev)
+                return cached
+
+            start_time = time.perf_counter()
+            try:
+                hexsha, otype, data = self._request(rev)
+            except (OSError, ValueError):
+                # The process died. Restart it once
+                self._proc = None
+                hexsha, otype, data = self._request(rev)
+
+            # A request to the long-lived process, rev is written to its stdin
+            trace_git_command(
+                ["git", "cat-file", "--batch", rev],
+                start_time,
+                time.perf_counter(),
+                None,
+                data,
+            )
+
+            if hexsha is None:
+                return None
+
+            cached = self._cache.get(hexsha)
+            if cached is None:
+                cached = GitObjectReader._parse(hexsha, otype, data)
+
+            self._cache[hexsha] = cached
+            self._cache.move_to_end(hexsha)
+            while len(self._cache) > GitObjectReader.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+            return cached
+
+    @staticmethod
+    def _parse(hexsha, otype, data):
+        if otype not in ("tag", "commit"):
+            return GitObject(hexsha, otype, {}, None)
+
+        text = data.decode("utf-8", errors="replace")
+        header_part, _, message = text.partition("\n\n")
+
+        headers = {}
+        for line in header_part.split("\n"):
+            # Continuation lines of multiline headers such as gpgsig
+            if not line or line.startswith(" "):
+                continue
+
+            key, _, value = line.partition(" ")
+            headers.setdefault(key, value)
+
+        for marker in GitObjectReader.SIGNATURE_MARKERS:
+            pos = message.find(marker)
+            if pos != -1:
+                message = message[:pos]
+
+        return GitObject(hexsha, otype, headers, message)
+
+    @staticmethod
+    def parse_identity(identity):
+        # "name <email> timestamp timezone"
+        name, _, rest = identity.partition(" <")
+        email, _, rest = rest.partition("> ")
+        timestamp = rest.split(" ")[0]
+
+        return name, email, int(timestamp or 0)
+
+
+IndexedTag = collections.namedtuple(
+    "IndexedTag",
+    ["name", "tag_sha", "commit_sha", "author", "author_email", "tagged_date"],
+)
+
+
+class IndexedTagReference(object):
+    """
+    A cheap stand-in for git.TagReference built from an IndexedTag entry.
+    Only the attributes vmn reads are provided and the underlying git objects
+    are loaded lazily, if ever.
+    """
+
+    def __init__(self, repo, entry, message=None):
+        self.name = entry.name
+        self.path = f"refs/tags/{entry.name}"
+        author = None
+        if entry.author is not None:
+            author = git.Actor(entry.author, entry.author_email)
+
+        self.commit = git.Commit(repo, hex_to_bin(entry.commit_sha), author=author)
+        self.object = git.TagObject(
+            repo,
+            hex_to_bin(entry.tag_sha),
+            object=self.commit,
+            tag=entry.name,
+            tagged_date=entry.tagged_date,
+        )
+        if message is not None:
+            self.object.message = message
+        self.tag = self.object
+
+    def __str__(self):
+        return self.path
+
+
+class GitTagIndex(object):
+    """
+    Persistent index of the repository tags stored in the .vmn directory.
+
+    The tag listing (name, tag object sha, target commit, commit author and
+    tagger date) is taken with a single for-each-ref call and is trusted as long
+    as the refs storage fingerprint did not change. Parsed version infos are
+    keyed by the tag object sha, which is immutable, so they survive relisting.
+    A listing taken right after a refs update is kept for the rest of the
+    process but its fingerprint is not persisted.
+    """
+
+    INDEX_VERSION = 1
+    # Filesystem timestamps resolution we are willing to assume
+    RACY_WINDOW_NS = 1000000000
+
+    def __init__(self, be, index_path):
+        self._be = be
+        self._path = index_path
+        self._loaded = False
+        self._dirty = False
+        # Persisted, None when the listing can't be trusted by other processes
+        self._fingerprint = None
+        # What the listing held in memory was taken with
+        self._listed_fingerprint = None
+        # tag name -> [tag sha, commit sha, author, author email, tagged date]
+        self._tags = {}
+        # tag object sha -> ver_info
+        self._ver_infos = {}
+        self._by_app = None
+        self._by_commit = None
+        self._app_versions = {}
+
+    def _load(self):
+        self._loaded = True
+        if not os.path.exists(self._path):
+            return
+
+        try:
+            with open(self._path, "r") as f:
+                data = json.load(f)
+
+            if data.get("version") != GitTagIndex.INDEX_VERSION:
+                return
+
+            self._fingerprint = data["fingerprint"]
+            self._listed_fingerprint = self._fingerprint
+            self._tags = data["tags"]
+            self._ver_infos = data["ver_infos"]
+        except Exception:
+            VMN_LOGGER.debug(f"Ignoring unreadable tag index {self._path}", exc_info=True)
+            self._fingerprint = None
+            self._tags = {}
+            self._ver_infos = {}
+
+    def _refs_fingerprint(self):
+        fingerprint = []
+        common_dir = self._be.common_dir
+        for path in (
+            os.path.join(common_dir, "packed-refs"),
+            os.path.join(common_dir, "refs", "tags"),
+            os.path.join(common_dir, "reftable", "tables.list"),
+        ):
+            try:
+                st = os.stat(path)
+                fingerprint.append([st.st_mtime_ns, st.st_size])
+            except OSError:
+                fingerprint.append(None)
+
+        return fingerprint
+
+    def _relist(self, fingerprint):
+        start_ns = time.time_ns()
+        out = self._be.git.for_each_ref(
+            "--format=%(refname:strip=2)%00%(objectname)%00%(*objectname)"
+            "%00%(*authorname)%00%(*authoremail)%00%(taggerdate:unix)",
+            "refs/tags",
+        )
+
+        tags = {}
+        for line in out.split("\n"):
+            if not line:
+                continue
+
+            name, sha, peeled_sha, author, email, tagged_date = line.split("\x00")
+            if not peeled_sha:
+                # Lightweight tag. vmn never creates these
+                tags[name] = [sha, sha, None, None, 0]
+                continue
+
+            email = email.strip("<>")
+            tags[name] = [sha, peeled_sha, author, email, int(tagged_date or 0)]
+
+        alive = {v[0] for v in tags.values()}
+        self._ver_infos = {k: v for k, v in self._ver_infos.items() if k in alive}
+        self._tags = tags
+        self._by_app = None
+        self._by_commit = None
+        self._app_versions = {}
+        self._dirty = True
+        self._listed_fingerprint = fingerprint
+
+        # A refs update in the same timestamp tick as our listing
+        # is undetectable by the fingerprint. Don't persist it then.
+        newest_ns = max([f[0] for f in fingerprint if f is not None], default=0)
+        if newest_ns >= start_ns - GitTagIndex.RACY_WINDOW_NS:
+            self._fingerprint = None
+        else:
+            self._fingerprint = fingerprint
+
+    def invalidate(self):
+        # Refs updated by this process in the same timestamp tick as the
+        # listing may leave the fingerprint as it was
+        self._listed_fingerprint = None
+
+    def refresh(self):
+        if not self._loaded:
+            self._load()
+
+        fingerprint = self._refs_fingerprint()
+        if self._listed_fingerprint is None or self._listed_fingerprint != fingerprint:
+            self._relist(fingerprint)
+
+    def get_tag(self, tag_name):
+        self.refresh()
+
+        entry = self._tags.get(tag_name)
+        if entry is None:
+            return None
+
+        return IndexedTag(tag_name, *entry)
+
+    def get_tags(self, tag_pattern):
+        self.refresh()
+
+        if self._by_app is None:
+            self._by_app = {}
+            for name in self._tags:
+                self._by_app.setdefault(name.rsplit("_", 1)[0], []).append(name)
+
+        app_part = tag_pattern.rsplit("_", 1)[0]
+        if "_" not in tag_pattern or any(c in app_part for c in "*?["):
+            candidates = self._tags.keys()
+        else:
+            candidates = self._by_app.get(app_part, [])
+
+        names = [n for n in candidates if fnmatch.fnmatchcase(n, tag_pattern)]
+
+        # Same order as git tag --sort taggerdate
+        return sorted(names, key=lambda n: (self._tags[n][4], n))
+
+    def get_app_version_index(self, tag_app_name):
+        self.refresh()
+
+        # Built once per app and kept as long as the tags listing is valid
+        index = self._app_versions.get(tag_app_name)
+        if index is None:
+            index = AppVersionIndex(self.get_tags(f"{tag_app_name}_*"))
+            self._app_versions[tag_app_name] = index
+
+        return index
+
+    def get_commit_tags(self, commit_sha):
+        self.refresh()
 
-        # sort the files by modification date
-        files.sort(key=os.path.getmtime, reverse=True)
+        if self._by_commit is None:
+            self._by_commit = {}
+            for name, entry in self._tags.items():
+                self._by_commit.setdefault(entry[1], []).append(name)
 
-        ver_infos = {}
-        tag_names = []
-        if files:
-            with open(files[0], "r") as f:
-                data = yaml.safe_load(f)
-                if root_context:
-                    ver = data["stamping"]["root_app"]["version"]
-                else:
-                    ver = data["stamping"]["app"]["_version"]
+        return sorted(self._by_commit.get(commit_sha, []))
 
-                tag_name = VMNBackend.serialize_vmn_tag_name(app_name, ver)
-                tag_names.append(tag_name)
-                ver_infos = {
-                    tag_name: {
-                        "ver_info": None,
-                        "tag_object": None,
-                        "commit_object": None,
-                    }
-                }
-                ver_infos[tag_name]["ver_info"] = data
+    def get_ver_info(self, tag_sha):
+        ver_info = self._ver_infos.get(tag_sha)
+        if ver_info is None:
+            return None
 
-        return tag_names, None, ver_infos
+        # Callers enhance ver_infos in place
+        return copy.deepcopy(ver_info)
+
+    def set_ver_info(self, tag_sha, ver_info):
+        try:
+            if json.loads(json.dumps(ver_info)) != ver_info:
+                return
+        except (TypeError, ValueError):
+            return
+
+        self._ver_infos[tag_sha] = copy.deepcopy(ver_info)
+        self._dirty = True
+
+    def flush(self):
+        if not self._dirty:
+            return
+
+        data = {
+            "version": GitTagIndex.INDEX_VERSION,
+            "fingerprint": self._fingerprint,
+            "tags": self._tags,
+            "ver_infos": self._ver_infos,
+        }
+
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._path)
+            self._dirty = False
+        except Exception:
+            VMN_LOGGER.debug(f"Failed to write tag index {self._path}", exc_info=True)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
 
 class GitBackend(VMNBackend):
@@ -753,29 +1719,199 @@ class GitBackend(VMNBackend):
         self.active_branch = self.get_active_branch()
         self.remote_active_branch = self.get_remote_tracking_branch(self.active_branch)
         self.detached_head = self.in_detached_head()
+        self._push_options_supported = True
+        self._object_reader = GitObjectReader(self._be)
 
-    @measure_runtime_decorator
-    def perform_cached_fetch(self, force=False):
-        vmn_cache_path = os.path.join(self.repo_path, ".vmn", "vmn.cache")
-        if not os.path.exists(vmn_cache_path) or force:
-            pathlib.Path(os.path.join(self.repo_path, ".vmn")).mkdir(
-                parents=True, exist_ok=True
+        self._tag_index = None
+        if os.path.isdir(os.path.join(self.repo_path, ".vmn")):
+            self._tag_index = GitTagIndex(
+                self._be, os.path.join(self.repo_path, ".vmn", TAG_INDEX_FILENAME)
             )
-            pathlib.Path(vmn_cache_path).touch()
 
+    @measure_runtime_decorator
+    def perform_cached_fetch(self, force=False, app_names=None, ttl=None):
+        """
+        Fetch the tags of app_names (all the tags if None) unless they were
+        fetched less than ttl minutes ago. Once the ttl has expired, the
+        remote is probed with ls-remote and only the refs that have changed
+        since the last fetch are fetched
+        """
+        if ttl is None:
+            ttl = VMN_DEFAULT_CONF["fetch_cache_ttl"]
+
+        patterns = ["*"]
+        if app_names:
+            patterns = [
+                f"refs/tags/{prefix}_*"
+                for prefix in sorted(
+                    {VMNBackend.app_name_to_tag_name(n) for n in app_names}
+                )
+            ]
+
+            remote_branch = self.get_remote_branch_name()
+            if remote_branch is not None:
+                patterns.insert(0, f"refs/heads/{remote_branch}")
+
+        now = time.time()
+        cache = self._load_fetch_cache()
+        remote_url = tuple(self.selected_remote.urls)[0]
+
+        def _cache_key(pattern):
+            return f"{remote_url} {pattern}"
+
+        def _is_fresh(pattern):
+            entry = cache.get(_cache_key(pattern))
+            return entry is not None and now - entry["time"] < ttl * 60
+
+        stale = patterns
+        if not force:
+            # A full fetch is good for every pattern
+            if _is_fresh("*"):
+                return
+
+            stale = [p for p in patterns if not _is_fresh(p)]
+            if not stale:
+                return
+
+        digests = self._probe_remote_refs(stale)
+
+        to_fetch = stale
+        if not force:
+            to_fetch = [
+                p
+                for p in stale
+                if cache.get(_cache_key(p), {}).get("digest") != digests[p]
+            ]
+
+        if "*" in to_fetch:
             self._be.git.execute(["git", "fetch", "--tags"])
-        elif os.path.exists(vmn_cache_path):
-            minutes_ago = datetime.datetime.now() - datetime.timedelta(minutes=30)
-            filemtime = datetime.datetime.fromtimestamp(
-                os.path.getmtime(vmn_cache_path)
+            self._tags_changed()
+        elif to_fetch:
+            prefixes = [
+                p[len("refs/tags/") : -len("_*")]
+                for p in to_fetch
+                if p.startswith("refs/tags/")
+            ]
+            include_branch = any(p.startswith("refs/heads/") for p in to_fetch)
+            self.fetch_tags(prefixes, include_branch=include_branch)
+
+        for pattern in stale:
+            cache[_cache_key(pattern)] = {"time": now, "digest": digests[pattern]}
+
+        self._save_fetch_cache(cache)
+
+    def _probe_remote_refs(self, patterns):
+        # ls-remote only lists refs, which is much cheaper than a fetch
+        cmd = ["git", "ls-remote", self.selected_remote.name]
+        if "*" not in patterns:
+            cmd.extend(patterns)
+
+        refs = self._be.git.execute(cmd).splitlines()
+
+        digests = {}
+        for pattern in patterns:
+            matched = sorted(
+                line for line in refs if fnmatch.fnmatch(line.split("\t")[-1], pattern)
+            )
+            digests[pattern] = hashlib.sha1("\n".join(matched).encode()).hexdigest()
+
+        return digests
+
+    def _load_fetch_cache(self):
+        vmn_cache_path = os.path.join(self.repo_path, ".vmn", FETCH_CACHE_FILENAME)
+        try:
+            with open(vmn_cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            # Missing or written by an older vmn that just touched the file
+            return {}
+
+        if not isinstance(cache, dict):
+            return {}
+
+        return {
+            k: v
+            for k, v in cache.items()
+            if isinstance(v, dict) and "time" in v and "digest" in v
+        }
+
+    def _save_fetch_cache(self, cache):
+        vmn_path = os.path.join(self.repo_path, ".vmn")
+        pathlib.Path(vmn_path).mkdir(parents=True, exist_ok=True)
+
+        with open(os.path.join(vmn_path, FETCH_CACHE_FILENAME), "w") as f:
+            json.dump(cache, f)
+
+    def get_remote_branch_name(self):
+        if not self.remote_active_branch:
+            return None
+
+        return self.remote_active_branch.split(
+            f"{self.selected_remote.name}/", maxsplit=1
+        )[-1]
+
+    @measure_runtime_decorator
+    def fetch_tags(self, tag_prefixes, include_branch=True):
+        # Explicit refspecs so only the refs that matter are negotiated
+        refspecs = []
+        remote_branch = self.get_remote_branch_name()
+        if include_branch and remote_branch is not None:
+            refspecs.append(
+                f"+refs/heads/{remote_branch}:"
+                f"refs/remotes/{self.selected_remote.name}/{remote_branch}"
             )
-            # file is more than 30 minutes old
-            if filemtime < minutes_ago:
-                pathlib.Path(vmn_cache_path).touch()
-                self._be.git.execute(["git", "fetch", "--tags"])
+
+        for prefix in tag_prefixes:
+            refspecs.append(f"refs/tags/{prefix}_*:refs/tags/{prefix}_*")
+
+        if not refspecs:
+            return
+
+        self._be.git.fetch("--no-tags", self.selected_remote.name, *refspecs)
+        self._tags_changed()
+
+    def flush_caches(self):
+        if self._tag_index is not None:
+            self._tag_index.flush()
+
+    def _tags_changed(self):
+        if self._tag_index is not None:
+            self._tag_index.invalidate()
+
+    def refs_state_fingerprint(self):
+        """
+        Cheap fingerprint of the state that GitBackend attributes are derived
+        from: HEAD, the branches, the remote branches and the configuration.
+        Tags are tracked separately by the tag index
+        """
+        git_dir = self._be.git_dir
+        common_dir = self._be.common_dir
+        paths = [
+            os.path.join(git_dir, "HEAD"),
+            os.path.join(common_dir, "packed-refs"),
+            os.path.join(common_dir, "config"),
+        ]
+        for refs_dir in ("heads", "remotes"):
+            for root, dirs, files in os.walk(os.path.join(common_dir, "refs", refs_dir)):
+                paths.append(root)
+                paths.extend([os.path.join(root, f) for f in files])
+
+        fingerprint = []
+        for path in sorted(paths):
+            try:
+                st = os.stat(path)
+                fingerprint.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                fingerprint.append((path, None, None))
+
+        return tuple(fingerprint)
 
     def __del__(self):
-        self._be.close()
+        # The caches are flushed explicitly by their users. Writing files here
+        # could happen during the interpreter teardown
+        if hasattr(self, "_object_reader"):
+            self._object_reader.close()
+            self._be.close()
 
     @staticmethod
     @measure_runtime_decorator
@@ -837,51 +1973,68 @@ class GitBackend(VMNBackend):
         if push and self.remote_active_branch is None:
             raise RuntimeError("Will not push remote branch does not exist")
 
+        # Readers order tags by their taggerdate which has a seconds resolution.
+        # Instead of waiting for the clock, give each tag its own second that
+        # is later than any existing tag of the same apps.
+        tagger_timestamp = self.get_next_tagger_timestamp(tags, ref)
+        tz_offset = time.strftime("%z")
+
         for tag, message in zip(tags, messages):
-            # This is required in order to preserver chronological order when
-            # listing tags since the taggerdate field is in seconds resolution
-            time.sleep(1.1)
+            with self._be.git.custom_environment(
+                GIT_COMMITTER_DATE=f"{tagger_timestamp} {tz_offset}"
+            ):
+                self._be.create_tag(tag, ref=ref, message=message)
 
-            self._be.create_tag(tag, ref=ref, message=message)
+            tagger_timestamp += 1
 
-            if not push:
-                continue
+        self._tags_changed()
+        if not push:
+            return
 
-            try:
-                self._be.git.execute(
-                    [
-                        "git",
-                        "push",
-                        "--porcelain",
-                        "-o",
-                        "ci.skip",
-                        self.selected_remote.name,
-                        f"refs/tags/{tag}",
-                    ]
-                )
-            except Exception:
+        try:
+            self.push_refs([f"refs/tags/{tag}" for tag in tags])
+        except Exception:
+            tag_err_str = f"Failed to tag {', '.join(tags)}. Reverting.."
+            VMN_LOGGER.error(tag_err_str)
+            self._tags_changed()
+
+            for tag in tags:
                 try:
-                    self._be.git.execute(
-                        [
-                            "git",
-                            "push",
-                            "--porcelain",
-                            self.selected_remote.name,
-                            f"refs/tags/{tag}",
-                        ]
-                    )
+                    self._be.delete_tag(tag)
                 except Exception:
-                    tag_err_str = f"Failed to tag {tag}. Reverting.."
-                    VMN_LOGGER.error(tag_err_str)
+                    err_str = f"Failed to remove tag {tag}"
+                    VMN_LOGGER.info(err_str)
+                    VMN_LOGGER.debug("Exception info: ", exc_info=True)
+
+            raise RuntimeError(tag_err_str)
+
+    @measure_runtime_decorator
+    def get_next_tagger_timestamp(self, tags, ref="HEAD"):
+        """
+        Returns a tagger timestamp later than the ones of all of the tags
+        of the same apps and of all of the tags pointing at ref
+        """
+        prefixes = sorted({t.rsplit("_", 1)[0] for t in tags})
+        latest = 0
+
+        if self._tag_index is not None:
+            tag_names = self._tag_index.get_commit_tags(self._be.commit(ref).hexsha)
+            for prefix in prefixes:
+                tag_names.extend(self._tag_index.get_tags(f"{prefix}_*")[-1:])
 
-                    try:
-                        self._be.delete_tag(tag)
-                    except Exception:
-                        err_str = f"Failed to remove tag {tag}"
-                        VMN_LOGGER.info(err_str)
-                        VMN_LOGGER.debug("Exception info: ", exc_info=True)
+            for tname in tag_names:
+                latest = max(latest, self._tag_index.get_tag(tname).tagged_date)
+        else:
+            cmd = ["--sort=-taggerdate", "--count=1", "--format=%(taggerdate:unix)"]
+            for out in (
+                self._be.git.for_each_ref(
+                    *cmd, *[f"refs/tags/{prefix}_*" for prefix in prefixes]
+                ),
+                self._be.git.for_each_ref(*cmd, f"--points-at={ref}", "refs/tags"),
+            ):
+                latest = max(latest, int(out.strip() or 0))
 
-                    raise RuntimeError(tag_err_str)
+        return max(int(time.time()), latest + 1)
 
     @measure_runtime_decorator
     def push(self, tags=()):
@@ -895,64 +2048,64 @@ class GitBackend(VMNBackend):
             self.remote_active_branch.split(f"{self.selected_remote.name}/")
         )
 
+        refspecs = [
+            f"refs/heads/{self.active_branch}:{remote_branch_name_no_remote_name}"
+        ]
+        refspecs.extend([f"refs/tags/{tag}" for tag in tags])
+
         try:
-            self._be.git.execute(
-                [
-                    "git",
-                    "push",
-                    "--porcelain",
-                    "-o",
-                    "ci.skip",
-                    self.selected_remote.name,
-                    f"refs/heads/{self.active_branch}:{remote_branch_name_no_remote_name}",
-                ]
-            )
+            self.push_refs(refspecs)
         except Exception:
-            try:
-                self._be.git.execute(
-                    [
-                        "git",
-                        "push",
-                        "--porcelain",
-                        self.selected_remote.name,
-                        f"refs/heads/{self.active_branch}:{remote_branch_name_no_remote_name}",
-                    ]
-                )
-            except Exception:
-                err_str = "Push has failed. Please verify that 'git push' works"
-                VMN_LOGGER.error(err_str, exc_info=True)
-                raise RuntimeError(err_str)
+            err_str = "Push has failed. Please verify that 'git push' works"
+            VMN_LOGGER.error(err_str, exc_info=True)
+            raise RuntimeError(err_str)
 
-        for tag in tags:
+    @measure_runtime_decorator
+    def push_refs(self, refspecs):
+        """
+        Push all of the refspecs in a single atomic push so either all
+        of them are published or none of them are
+        """
+        atomic = ["--atomic"]
+        push_options = ["-o", "ci.skip"]
+        if not self._push_options_supported:
+            push_options = []
+
+        while True:
             try:
                 self._be.git.execute(
-                    [
-                        "git",
-                        "push",
-                        "--porcelain",
-                        "-o",
-                        "ci.skip",
-                        self.selected_remote.name,
-                        f"refs/tags/{tag}",
-                    ]
-                )
-            except Exception:
-                self._be.git.execute(
-                    [
-                        "git",
-                        "push",
-                        "--porcelain",
-                        self.selected_remote.name,
-                        f"refs/tags/{tag}",
-                    ]
+                    ["git", "push", "--porcelain"]
+                    + atomic
+                    + push_options
+                    + [self.selected_remote.name]
+                    + refspecs
                 )
 
+                return
+            except git.exc.GitCommandError as exc:
+                stderr = str(exc.stderr)
+                if push_options and "not support push options" in stderr:
+                    self._push_options_supported = False
+                    push_options = []
+                elif atomic and "not support --atomic" in stderr:
+                    VMN_LOGGER.debug(
+                        "The remote does not support atomic pushes. "
+                        "Pushing non atomically"
+                    )
+                    atomic = []
+                elif push_options:
+                    # Some servers reject unknown push options with other errors
+                    push_options = []
+                else:
+                    raise
+
     @measure_runtime_decorator
     def pull(self):
         if self.detached_head:
             raise RuntimeError("Will not pull in detached head")
 
         self.selected_remote.pull("--ff-only")
+        self._tags_changed()
 
     @measure_runtime_decorator
     def commit(self, message, user, include=None):
@@ -996,7 +2149,7 @@ class GitBackend(VMNBackend):
         if shallow:
             # This is the only usecase where we must perform a remote operation
             # because otherwise even show will not work
-            self.perform_cached_fetch()
+            self.perform_cached_fetch(app_names=[app_name])
             (
                 tag_names,
                 cobj,
@@ -1015,23 +2168,28 @@ class GitBackend(VMNBackend):
 
     @measure_runtime_decorator
     def _get_first_reachable_vmn_stamp_tag_list(self, app_name, cmd_suffix, msg_filter):
-        cobj, ver_infos = self._get_top_vmn_commit(app_name, cmd_suffix, msg_filter)
-        bug_limit = 0
-        while not ver_infos and bug_limit < 100:
-            if cobj is None:
-                break
-
-            cmd_suffix = f"{cobj.hexsha}~1"
-            cobj, ver_infos = self._get_top_vmn_commit(app_name, cmd_suffix, msg_filter)
+        cobj, ver_infos = None, {}
+        # A vmn commit may have lost its tags (after a rebase for example).
+        # Walk the stamp commits from a single git log until one has tags
+        commits = self._iter_vmn_commits(cmd_suffix, msg_filter)
+        try:
+            for bug_limit, (commit_hex, tags) in enumerate(commits):
+                if bug_limit == 100:
+                    VMN_LOGGER.warning(
+                        "Probable bug: vmn failed to find "
+                        "vmn's commit after 100 interations."
+                    )
+                    ver_infos = {}
+                    break
 
-            bug_limit += 1
-            if bug_limit == 100:
-                VMN_LOGGER.warning(
-                    "Probable bug: vmn failed to find "
-                    "vmn's commit after 100 interations."
+                ver_infos = self.get_all_commit_tags_log_impl(
+                    commit_hex, tags, app_name
                 )
-                ver_infos = {}
-                break
+                if ver_infos:
+                    cobj = self.get_commit_object_from_commit_hex(commit_hex)
+                    break
+        finally:
+            commits.close()
 
         tag_objects = []
         for k in ver_infos:
@@ -1069,36 +2227,49 @@ class GitBackend(VMNBackend):
             return tag_names, cobj, ver_infos
 
         tag_name_prefix = VMNBackend.app_name_to_tag_name(app_name)
-        cmd = ["--sort", "taggerdate", "--list", f"{tag_name_prefix}_*"]
-        tag_names = self._be.git.tag(*cmd).split("\n")
-
-        if len(tag_names) == 1 and tag_names[0] == "":
-            tag_names.pop(0)
+        app_tags = self.load_tags_ver_infos([f"refs/tags/{tag_name_prefix}_*"])
+        # Same order as git tag --sort taggerdate
+        tag_names = sorted(
+            app_tags.keys(),
+            key=lambda t: (
+                app_tags[t]["tag_object"].object.tagged_date
+                if app_tags[t]["tag_object"]
+                else 0,
+                t,
+            ),
+        )
 
         if not tag_names:
             return tag_names, cobj, ver_infos
 
         latest_tag = tag_names[-1]
+        found_commit = None
         head_date = self._be.head.commit.committed_date
         for tname in reversed(tag_names):
-            tname, o = self.get_tag_object_from_tag_name(tname)
+            o = app_tags[tname]["tag_object"]
             if o:
+                # Not the tagger date. get_next_tagger_timestamp may set it
+                # ahead of the clock, after commits that were made since
                 if (
                     self._be.head.commit.hexsha != o.commit.hexsha
-                    and head_date < o.object.tagged_date
+                    and head_date < o.commit.committed_date
                 ):
                     continue
 
                 latest_tag = tname
+                found_commit = o.commit
                 break
 
-        try:
-            found_tag = self._be.tag(f"refs/tags/{latest_tag}")
-        except Exception:
-            VMN_LOGGER.error(f"Failed to get tag object from tag name: {latest_tag}")
-            return [], cobj, ver_infos
+        if found_commit is None:
+            try:
+                found_commit = self._be.tag(f"refs/tags/{latest_tag}").commit
+            except Exception:
+                VMN_LOGGER.error(
+                    f"Failed to get tag object from tag name: {latest_tag}"
+                )
+                return [], cobj, ver_infos
 
-        ver_infos = self.get_all_commit_tags(found_tag.commit.hexsha)
+        ver_infos = self.get_all_commit_tags(found_commit.hexsha)
         tag_objects = []
 
         for k in ver_infos.keys():
@@ -1114,7 +2285,59 @@ class GitBackend(VMNBackend):
         for tag_object in tag_objects:
             final_list_of_tag_names.append(tag_object.name)
 
-        return final_list_of_tag_names, found_tag.commit, ver_infos
+        return final_list_of_tag_names, found_commit, ver_infos
+
+    def _iter_vmn_commits(self, cmd_suffix, msg_filter):
+        """Yield (hexsha, decorations) of vmn stamp commits, newest first.
+
+        The output of a single git log process is consumed lazily. Closing the
+        generator before the log is exhausted kills the process.
+        """
+        cmd = [
+            f"--grep={msg_filter}",
+            f"--author={VMN_USER_NAME}",
+            "--pretty=%H%x00%D",
+            "--decorate=short",
+            cmd_suffix,
+        ]
+        # Dropping the AutoInterrupt wrapper would terminate the process
+        log_process = self._be.git.log(*cmd, as_process=True)
+        proc = log_process.proc
+
+        start_time = time.perf_counter()
+        read_bytes = 0
+        try:
+            for line in proc.stdout:
+                read_bytes += len(line)
+                line = line.decode("utf-8", errors="replace").rstrip("\n")
+                if not line:
+                    continue
+
+                commit_hex, _, decorations = line.partition("\0")
+                tags = [t for t in decorations.split(",") if t]
+
+                yield commit_hex, tags
+
+            stderr = proc.stderr.read()
+            if proc.wait() != 0:
+                raise git.exc.GitCommandError(
+                    ["git", "log", *cmd], proc.returncode, stderr
+                )
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+
+            proc.wait()
+            proc.stdout.close()
+            proc.stderr.close()
+
+            trace_git_command(
+                ["git", "log", *cmd],
+                start_time,
+                time.perf_counter(),
+                proc.returncode,
+                read_bytes,
+            )
 
     @measure_runtime_decorator
     def _get_top_vmn_commit(self, app_name, cmd_suffix, msg_filter):
@@ -1147,6 +2370,13 @@ class GitBackend(VMNBackend):
 
     @measure_runtime_decorator
     def get_latest_available_tags(self, tag_prefix_filter):
+        if self._tag_index is not None:
+            tag_names = self._tag_index.get_tags(tag_prefix_filter)
+            if not tag_names:
+                return None
+
+            return tag_names
+
         cmd = ["--sort", "taggerdate", "--list", tag_prefix_filter]
         tag_names = self._be.git.tag(*cmd).split("\n")
 
@@ -1163,6 +2393,18 @@ class GitBackend(VMNBackend):
 
         return tnames[-1]
 
+    @measure_runtime_decorator
+    def get_app_version_index(self, app_name):
+        tag_app_name = VMNBackend.app_name_to_tag_name(app_name)
+        if self._tag_index is not None:
+            return self._tag_index.get_app_version_index(tag_app_name)
+
+        tag_names = self._be.git.tag("--list", f"{tag_app_name}_*").split("\n")
+
+        return AppVersionIndex(
+            [t for t in tag_names if t.rsplit("_", 1)[0] == tag_app_name]
+        )
+
     @measure_runtime_decorator
     def get_commit_object_from_branch_name(self, bname):
         # TODO:: Unfortunately, need to spend o(N) here
@@ -1179,32 +2421,38 @@ class GitBackend(VMNBackend):
 
     @measure_runtime_decorator
     def get_tag_object_from_tag_name(self, tname):
-        try:
-            o = self._be.tag(f"refs/tags/{tname}")
-        except Exception:
-            VMN_LOGGER.debug("Logged exception: ", exc_info=True)
-            # Backward compatability code for vmn 0.3.9:
-            try:
-                _tag_name = f"{tname}.0"
-                o = self._be.tag(f"refs/tags/{tname}")
-            except Exception:
-                VMN_LOGGER.debug("Logged exception: ", exc_info=True)
+        if self._tag_index is not None:
+            entry = self._tag_index.get_tag(tname)
+            if entry is None or entry.author != VMN_USER_NAME:
                 return tname, None
 
-        try:
-            if o.commit.author.name != "vmn":
-                return tname, None
-        except Exception:
-            VMN_LOGGER.debug("Exception info: ", exc_info=True)
+            return tname, IndexedTagReference(self._be, entry)
+
+        tag = self._object_reader.read(f"refs/tags/{tname}")
+        if tag is None:
+            VMN_LOGGER.debug(f"Somehow did not find a tag object for tag: {tname}")
             return tname, None
 
-        if o.tag is None:
+        # Lightweight tags are not vmn tags
+        if tag.type != "tag":
             return tname, None
 
-        if o is None:
-            VMN_LOGGER.debug(f"Somehow did not find a tag object for tag: {tname}")
+        commit = self._object_reader.read(tag.headers.get("object", ""))
+        if commit is None or commit.type != "commit":
+            return tname, None
 
-        return tname, o
+        author, email, _ = GitObjectReader.parse_identity(
+            commit.headers.get("author", "")
+        )
+        if author != VMN_USER_NAME:
+            return tname, None
+
+        _, _, tagged_date = GitObjectReader.parse_identity(
+            tag.headers.get("tagger", "")
+        )
+        entry = IndexedTag(tname, tag.hexsha, commit.hexsha, author, email, tagged_date)
+
+        return tname, IndexedTagReference(self._be, entry, tag.message)
 
     @measure_runtime_decorator
     def get_all_commit_tags_log_impl(self, hexsha, tags, app_name):
@@ -1233,8 +2481,7 @@ class GitBackend(VMNBackend):
             except Exception:
                 VMN_LOGGER.debug(f"Skipped on {hexsha} commit")
 
-        for tname in cleaned_tags:
-            tname, ver_info_c = self.parse_tag_message(tname)
+        for tname, ver_info_c in self.get_tags_ver_infos(cleaned_tags).items():
             if ver_info_c["ver_info"] is None:
                 VMN_LOGGER.debug(
                     f"Probably non-vmn tag - {tname} with tag msg: {ver_info_c['ver_info']}. Skipping ",
@@ -1251,15 +2498,17 @@ class GitBackend(VMNBackend):
         if hexsha is None:
             hexsha = "HEAD"
 
-        cmd = ["--points-at", hexsha]
-        tags = self._be.git.tag(*cmd).split("\n")
+        if self._tag_index is not None and hexsha == "HEAD":
+            hexsha = self._be.head.commit.hexsha
 
-        if len(tags) == 1 and tags[0] == "":
-            tags.pop(0)
+        if self._tag_index is not None and re.fullmatch("[0-9a-f]{40}", hexsha):
+            tags = self._tag_index.get_commit_tags(hexsha)
+            all_ver_infos = self.get_tags_ver_infos(tags)
+        else:
+            all_ver_infos = self.load_tags_ver_infos(["refs/tags"], points_at=hexsha)
 
         ver_infos = {}
-        for t in tags:
-            t, ver_info_c = self.parse_tag_message(t)
+        for t, ver_info_c in all_ver_infos.items():
             if ver_info_c["ver_info"] is None:
                 VMN_LOGGER.debug(
                     f"Probably non-vmn tag - {t} with tag msg: {ver_info_c['ver_info']}. Skipping ",
@@ -1300,6 +2549,36 @@ class GitBackend(VMNBackend):
                 c=[f'user.name="{VMN_USER_NAME}"', f'user.email="{VMN_USER_NAME}"']
             )
 
+    @measure_runtime_decorator
+    def add_local_excludes(self, dir_path, patterns):
+        """
+        Ignore patterns under dir_path in this clone only by adding them to
+        info/exclude. Unlike a .gitignore, it is not tracked so no pending
+        changes are left behind
+        """
+        exclude_path = os.path.join(self._be.common_dir, "info", "exclude")
+        prefix = os.path.relpath(dir_path, self._be.working_tree_dir)
+        prefix = prefix.replace(os.sep, "/")
+        entries = [f"/{prefix}/{pattern}" for pattern in patterns]
+
+        try:
+            with open(exclude_path, "r") as f:
+                content = f.read()
+        except FileNotFoundError:
+            content = ""
+
+        existing = set(content.splitlines())
+        missing = [entry for entry in entries if entry not in existing]
+        if not missing:
+            return
+
+        os.makedirs(os.path.dirname(exclude_path), exist_ok=True)
+        with open(exclude_path, "a") as f:
+            if content and not content.endswith("\n"):
+                f.write("\n")
+            for entry in missing:
+                f.write(f"{entry}\n")
+
     @measure_runtime_decorator
     def check_for_pending_changes(self):
         if self._be.is_dirty():
@@ -1637,6 +2916,7 @@ class GitBackend(VMNBackend):
             raise RuntimeError()
 
         self._be.git.reset("--hard", "HEAD~1")
+        self._tags_changed()
         for tag in tags:
             try:
                 self._be.delete_tag(tag)
@@ -1647,7 +2927,10 @@ class GitBackend(VMNBackend):
                 continue
 
         try:
-            self._be.git.fetch("--tags")
+            # Bring back the deleted tags in case they exist in the remote
+            prefixes = {tag.rsplit("_", maxsplit=1)[0] for tag in tags}
+            if prefixes:
+                self.fetch_tags(sorted(prefixes))
         except Exception:
             VMN_LOGGER.info("Failed to fetch tags")
             VMN_LOGGER.debug("Exception info: ", exc_info=True)
@@ -1688,16 +2971,40 @@ class GitBackend(VMNBackend):
 
         ret["commit_object"] = commit_tag_obj
 
+        tag_sha = None
+        if self._tag_index is not None:
+            tag_sha = tag_obj.object.hexsha
+            ver_info = self._tag_index.get_ver_info(tag_sha)
+            if ver_info is not None:
+                ret["ver_info"] = ver_info
+
+                return tag_name, ret
+
+        tag = self._object_reader.read(tag_obj.object.hexsha)
+        ver_info = self._parse_ver_info_from_tag_message(tag_name, tag.message)
+        if ver_info is None:
+            return tag_name, ret
+
+        if tag_sha is not None:
+            self._tag_index.set_ver_info(tag_sha, ver_info)
+
+        ret["ver_info"] = ver_info
+
+        return tag_name, ret
+
+    def _parse_ver_info_from_tag_message(self, tag_name, message):
         # TODO:: Check API commit version
         # safe_load discards any text before the YAML document (if present)
-        ver_info = yaml.safe_load(tag_obj.object.message)
+        ver_info = yaml.safe_load(message)
         if ver_info is None:
-            return tag_name, ret
+            return None
 
         if not isinstance(ver_info, dict) and ver_info.startswith("Automatic"):
             # Code from vmn 0.3.9
             # safe_load discards any text before the YAML document (if present)
-            commit_msg = yaml.safe_load(self._be.commit(tag_name).message)
+            commit_msg = yaml.safe_load(
+                self._object_reader.read(f"{tag_name}^{{commit}}").message
+            )
 
             if commit_msg is not None and "stamping" in commit_msg:
                 commit_msg["stamping"]["app"]["prerelease"] = "release"
@@ -1705,15 +3012,97 @@ class GitBackend(VMNBackend):
 
             ver_info = commit_msg
             if ver_info is None:
-                return tag_name, ret
+                return None
 
         if "vmn_info" not in ver_info:
             VMN_LOGGER.debug(f"vmn_info key was not found in tag {tag_name}")
-            return tag_name, ret
+            return None
 
-        ret["ver_info"] = ver_info
+        return ver_info
 
-        return tag_name, ret
+    @measure_runtime_decorator
+    def load_tags_ver_infos(self, patterns, points_at=None):
+        """
+        Parse all of the tags matching the refs patterns with a single
+        for-each-ref call instead of reading each tag and commit object separately.
+        Returns the ver_infos of the matching tags ordered by their names
+        """
+        cmd = [
+            "--format=%(refname:strip=2)%00%(objectname)%00%(*objectname)"
+            "%00%(*authorname)%00%(*authoremail)%00%(taggerdate:unix)"
+            "%00%(contents)%00%01",
+        ]
+        if points_at is not None:
+            cmd.append(f"--points-at={points_at}")
+        cmd.extend(patterns)
+
+        ver_infos = {}
+        for record in self._be.git.for_each_ref(*cmd).split("\x00\x01"):
+            record = record.lstrip("\n")
+            if not record:
+                continue
+
+            name, sha, peeled_sha, author, email, tagged_date, message = record.split(
+                "\x00", 6
+            )
+            entry = IndexedTag(
+                name, sha, peeled_sha, author, email.strip("<>"), int(tagged_date or 0)
+            )
+
+            ret = {"ver_info": None, "tag_object": None, "commit_object": None}
+            ver_infos[entry.name] = ret
+
+            # Lightweight and non-vmn tags
+            if not entry.commit_sha or entry.author != VMN_USER_NAME:
+                continue
+
+            tag_obj = IndexedTagReference(self._be, entry)
+            ret["tag_object"] = tag_obj
+            ret["commit_object"] = tag_obj.commit
+
+            ver_info = None
+            if self._tag_index is not None:
+                ver_info = self._tag_index.get_ver_info(entry.tag_sha)
+
+            if ver_info is None:
+                ver_info = self._parse_ver_info_from_tag_message(entry.name, message)
+                if ver_info is not None and self._tag_index is not None:
+                    self._tag_index.set_ver_info(entry.tag_sha, ver_info)
+
+            ret["ver_info"] = ver_info
+
+        return ver_infos
+
+    @measure_runtime_decorator
+    def get_tags_ver_infos(self, tag_names):
+        ver_infos = {}
+        missing = []
+        for tname in tag_names:
+            if self._tag_index is None:
+                missing.append(tname)
+                continue
+
+            entry = self._tag_index.get_tag(tname)
+            if entry is None or self._tag_index.get_ver_info(entry.tag_sha) is None:
+                missing.append(tname)
+                continue
+
+            # Served from the tag index without any git calls
+            ver_infos[tname] = self.parse_tag_message(tname)[1]
+
+        if missing:
+            loaded = self.load_tags_ver_infos([f"refs/tags/{t}" for t in missing])
+            for tname in missing:
+                if tname in loaded:
+                    ver_infos[tname] = loaded[tname]
+                else:
+                    ver_infos[tname] = {
+                        "ver_info": None,
+                        "tag_object": None,
+                        "commit_object": None,
+                    }
+
+        return {tname: ver_infos[tname] for tname in tag_names}
 
     @measure_runtime_decorator
     def get_commit_object_from_commit_hex(self, hex):
@@ -1721,17 +3110,26 @@ class GitBackend(VMNBackend):
 
     @measure_runtime_decorator
     def get_commit_object_from_tag_name(self, tag_name):
-        try:
-            commit_tag_obj = self._be.commit(tag_name)
-        except Exception:
+        commit = self._object_reader.read(f"{tag_name}^{{commit}}")
+        if commit is None:
             # Backward compatability code for vmn 0.3.9:
-            try:
-                _tag_name = f"{tag_name}.0"
-                commit_tag_obj = self._be.commit(_tag_name)
-                tag_name = _tag_name
-            except Exception:
+            _tag_name = f"{tag_name}.0"
+            commit = self._object_reader.read(f"{_tag_name}^{{commit}}")
+            if commit is None:
                 return tag_name, None
 
+            tag_name = _tag_name
+
+        author, email, _ = GitObjectReader.parse_identity(
+            commit.headers.get("author", "")
+        )
+        commit_tag_obj = git.Commit(
+            self._be,
+            hex_to_bin(commit.hexsha),
+            author=git.Actor(author, email),
+            message=commit.message,
+        )
+
         return tag_name, commit_tag_obj
 
     @staticmethod
@@ -1,23 +1,30 @@
 #!/usr/bin/env python3
 import argparse
+import contextlib
 import copy
+import filecmp
 import glob
+import hashlib
+import io
 import json
 import os
 import pathlib
 import random
 import re
+import socket
+import socketserver
 import sys
+import threading
 import time
-from multiprocessing import Pool
 from pathlib import Path
 from pprint import pformat
 
-import jinja2
-import tomlkit
 import yaml
 from filelock import FileLock
-from packaging import version as pversion
+
+# jinja2, tomlkit, packaging and multiprocessing.pool are slow to import and
+# only some commands need them. They are imported inside the functions that use
+# them so that the other commands, show included, start without them
 
 CUR_PATH = "{0}/".format(os.path.dirname(__file__))
 sys.path.append(CUR_PATH)
@@ -31,13 +38,27 @@ VER_FILE_NAME = "last_known_app_version.yml"
 INIT_FILENAME = "conf.yml"
 LOCK_FILENAME = "vmn.lock"
 LOG_FILENAME = "vmn.log"
-CACHE_FILENAME = "vmn.cache"
+CACHE_FILENAME = stamp_utils.FETCH_CACHE_FILENAME
+SOCKET_FILENAME = "vmn.sock"
+JINJA2_CACHE_DIRNAME = "jinja2_cache"
+JINJA2_CACHE_MAX_ENTRIES = 64
+DAEMON_DISABLE_ENV = "VMN_NO_DAEMON"
+GOTO_DEFAULT_JOBS = 10
+# generic_selectors streaming mode
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_OVERLAP = 64 * 1024
+# An escaped backslash or a numbered group reference in a regex_sub
+_REGEX_SUB_ESCAPE = re.compile(r"\\(\\|[1-9]\d?)")
 
 IGNORED_FILES = [
     LOCK_FILENAME,
     f"{LOG_FILENAME}*",
     CACHE_FILENAME,
+    SOCKET_FILENAME,
     stamp_utils.GLOBAL_LOG_FILENAME,
+    stamp_utils.TAG_INDEX_FILENAME,
+    stamp_utils.VERINFO_INDEX_FILENAME,
+    f"{JINJA2_CACHE_DIRNAME}/",
 ]
 VMN_ARGS = {
     "init": "remote",
@@ -48,18 +69,26 @@ VMN_ARGS = {
     "release": "remote",
     "gen": "local",
     "add": "remote",
+    "serve": "local",
 }
+# Commands that a running vmn serve daemon is allowed to run
+DAEMON_COMMANDS = ("show", "gen")
 
 
 class VMNContainer(object):
     @stamp_utils.measure_runtime_decorator
-    def __init__(self, args, root_path):
+    def __init__(self, args, root_path, backend=None):
         self.args = args
         root = False
         if "root" in self.args:
             root = self.args.root
 
-        initial_params = {"root": root, "name": None, "root_path": root_path}
+        initial_params = {
+            "root": root,
+            "name": None,
+            "root_path": root_path,
+            "backend": backend,
+        }
 
         if "name" in self.args and self.args.name:
             validate_app_name(self.args)
@@ -101,15 +130,21 @@ class IVersionsStamper(object):
         self.create_verinfo_files = stamp_utils.VMN_DEFAULT_CONF["create_verinfo_files"]
         self.hide_zero_hotfix = stamp_utils.VMN_DEFAULT_CONF["hide_zero_hotfix"]
         self.version_backends = stamp_utils.VMN_DEFAULT_CONF["version_backends"]
+        # Files whose content was changed by the last write_version_to_file
+        self.changed_version_files = []
         # This one will be filled with self dependency ('.') by default
         self.raw_configured_deps = stamp_utils.VMN_DEFAULT_CONF["deps"]
         self.policies = stamp_utils.VMN_DEFAULT_CONF["policies"]
+        self.fetch_cache_ttl = stamp_utils.VMN_DEFAULT_CONF["fetch_cache_ttl"]
 
         self.configured_deps = {}
         self.conf_file_exists = False
         self.root_conf_file_exists = False
 
         self.should_publish = True
+        # Filled by handle_stamp. Used by the python API
+        self.stamped_version = None
+        self.created_new_version = False
         self.current_version_info = {
             "vmn_info": {
                 "description_message_version": "1.1",
@@ -121,11 +156,14 @@ class IVersionsStamper(object):
         # root_context means that the user uses vmn in a context of a root app
         self.root_context = arg_params["root"]
 
-        self.backend, err = stamp_utils.get_client(
-            self.vmn_root_path,
-            self.be_type,
-            inherit_env=True,
-        )
+        self.backend = arg_params.get("backend")
+        err = None
+        if self.backend is None or self.backend.type() != self.be_type:
+            self.backend, err = stamp_utils.get_client(
+                self.vmn_root_path,
+                self.be_type,
+                inherit_env=True,
+            )
         if err:
             err_str = "Failed to create backend {0}. Exiting".format(err)
             stamp_utils.VMN_LOGGER.error(err_str)
@@ -158,6 +196,14 @@ class IVersionsStamper(object):
             # TODO:: test this
             raise RuntimeError("Failed to initialize_backend_attrs")
 
+    def get_fetch_scope(self):
+        # The apps whose tags are needed in order to stamp this app
+        app_names = [self.name]
+        if self.root_app_name is not None and self.root_app_name != self.name:
+            app_names.append(self.root_app_name)
+
+        return app_names
+
     def update_attrs_from_app_conf_file(self):
         # TODO:: handle deleted app with missing conf file
         if os.path.isfile(self.app_conf_path):
@@ -192,6 +238,8 @@ class IVersionsStamper(object):
                         self.create_verinfo_files = data["conf"]["create_verinfo_files"]
                     if "policies" in data["conf"]:
                         self.policies = data["conf"]["policies"]
+                    if "fetch_cache_ttl" in data["conf"]:
+                        self.fetch_cache_ttl = data["conf"]["fetch_cache_ttl"]
 
                 self.set_template(self.template)
 
@@ -521,15 +569,15 @@ class IVersionsStamper(object):
 
     def increase_octet(
         self,
-        tag_name_prefix: str,
+        prefix: tuple,
         version_number_oct: int,
-        release_mode: str,
         globally: bool,
     ) -> int:
-        tag = self.backend.get_latest_available_tag(tag_name_prefix)
-        if tag and globally:
-            props = stamp_utils.VMNBackend.deserialize_vmn_tag_name(tag)
-            version_number_oct = max(version_number_oct, int(props[release_mode]))
+        if globally:
+            index = self.backend.get_app_version_index(self.name)
+            highest = index.get_highest_octet(prefix)
+            if highest is not None:
+                version_number_oct = max(version_number_oct, highest)
         version_number_oct += 1
 
         return version_number_oct
@@ -548,37 +596,22 @@ class IVersionsStamper(object):
         hotfix = props["hotfix"]
 
         if release_mode == "major":
-            tag_name_prefix = stamp_utils.VMNBackend.app_name_to_tag_name(self.name)
-
-            tag_name_prefix = f"{tag_name_prefix}_*"
-            major = self.increase_octet(tag_name_prefix, major, release_mode, globally)
+            major = self.increase_octet((), major, globally)
 
             minor = 0
             patch = 0
             hotfix = 0
         elif release_mode == "minor":
-            tag_name_prefix = stamp_utils.VMNBackend.app_name_to_tag_name(self.name)
-
-            # TODO:: use serialize functions here
-            tag_name_prefix = f"{tag_name_prefix}_{major}.*"
-            minor = self.increase_octet(tag_name_prefix, minor, release_mode, globally)
+            minor = self.increase_octet((major,), minor, globally)
 
             patch = 0
             hotfix = 0
         elif release_mode == "patch":
-            tag_name_prefix = stamp_utils.VMNBackend.app_name_to_tag_name(self.name)
-
-            tag_name_prefix = f"{tag_name_prefix}_{major}.{minor}.*"
-            patch = self.increase_octet(tag_name_prefix, patch, release_mode, globally)
+            patch = self.increase_octet((major, minor), patch, globally)
 
             hotfix = 0
         elif release_mode == "hotfix":
-            tag_name_prefix = stamp_utils.VMNBackend.app_name_to_tag_name(self.name)
-
-            tag_name_prefix = f"{tag_name_prefix}_{major}.{minor}.{patch}.*"
-            hotfix = self.increase_octet(
-                tag_name_prefix, hotfix, release_mode, globally
-            )
+            hotfix = self.increase_octet((major, minor, patch), hotfix, globally)
 
         base_version = stamp_utils.VMNBackend.serialize_vmn_base_version(
             major,
@@ -607,19 +640,22 @@ class IVersionsStamper(object):
             )
 
         initialprerelease_count = {}
-        tag_name_prefix = stamp_utils.VMNBackend.serialize_vmn_tag_name(
-            self.name, base_version
-        )
-        tag_name_prefix = f"{tag_name_prefix}-*"
-        tag = self.backend.get_latest_available_tag(tag_name_prefix)
+        # Most base versions have no prereleases, no need to look for a tag
+        index = self.backend.get_app_version_index(self.name)
+        if index.has_prereleases(major, minor, patch, hotfix):
+            tag_name_prefix = stamp_utils.VMNBackend.serialize_vmn_tag_name(
+                self.name, base_version
+            )
+            tag_name_prefix = f"{tag_name_prefix}-*"
+            tag = self.backend.get_latest_available_tag(tag_name_prefix)
 
-        # Means we found existing prerelease
-        if tag is not None:
-            t, prerelease_ver_info_c = self.backend.parse_tag_message(tag)
+            # Means we found existing prerelease
+            if tag is not None:
+                t, prerelease_ver_info_c = self.backend.parse_tag_message(tag)
 
-            initialprerelease_count = prerelease_ver_info_c["ver_info"]["stamping"][
-                "app"
-            ]["prerelease_count"]
+                initialprerelease_count = prerelease_ver_info_c["ver_info"][
+                    "stamping"
+                ]["app"]["prerelease_count"]
 
         if props["rcn"] is None:
             props["rcn"] = 0
@@ -655,6 +691,7 @@ class IVersionsStamper(object):
         )
 
     def write_version_to_file(self, version_number: str) -> None:
+        self.changed_version_files = []
         if self.dry_run:
             stamp_utils.VMN_LOGGER.info(
                 "Would have written to version file:\n" f"version: {version_number}\n"
@@ -662,9 +699,15 @@ class IVersionsStamper(object):
         else:
             self._write_version_to_vmn_version_file(version_number)
 
-        if not self.version_backends:
-            return
+        if self.version_backends:
+            self._write_version_to_backends(version_number)
+
+        if not self.dry_run:
+            stamp_utils.VMN_LOGGER.debug(
+                f"Changed version files: {self.changed_version_files}"
+            )
 
+    def _write_version_to_backends(self, version_number):
         for backend in self.version_backends:
             try:
                 if backend == "vmn_version_file":
@@ -680,6 +723,10 @@ class IVersionsStamper(object):
                 stamp_utils.VMN_LOGGER.warning(f"Unsupported version backend {backend}")
                 continue
 
+    def _write_version_file(self, file_path, content):
+        if stamp_utils.write_file_if_changed(file_path, content):
+            self.changed_version_files.append(file_path)
+
     def _write_version_to_npm(self, verstr, backend_conf):
         if self.dry_run:
             stamp_utils.VMN_LOGGER.info(
@@ -696,8 +743,9 @@ class IVersionsStamper(object):
                 data = json.load(f)
 
             data["version"] = verstr
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=4, sort_keys=True)
+            self._write_version_file(
+                file_path, json.dumps(data, indent=4, sort_keys=True)
+            )
         except IOError as e:
             stamp_utils.VMN_LOGGER.error(f"Error writing npm ver file: {file_path}\n")
             stamp_utils.VMN_LOGGER.debug("Exception info: ", exc_info=True)
@@ -717,15 +765,15 @@ class IVersionsStamper(object):
 
             return
 
+        import tomlkit
+
         file_path = os.path.join(self.vmn_root_path, backend_conf["path"])
         try:
             with open(file_path, "r") as f:
                 data = tomlkit.loads(f.read())
 
             data["package"]["version"] = verstr
-            with open(file_path, "w") as f:
-                data = tomlkit.dumps(data)
-                f.write(data)
+            self._write_version_file(file_path, tomlkit.dumps(data))
         except IOError as e:
             stamp_utils.VMN_LOGGER.error(f"Error writing cargo ver file: {file_path}\n")
             stamp_utils.VMN_LOGGER.debug("Exception info: ", exc_info=True)
@@ -745,15 +793,15 @@ class IVersionsStamper(object):
 
             return
 
+        import tomlkit
+
         file_path = os.path.join(self.vmn_root_path, backend_conf["path"])
         try:
             with open(file_path, "r") as f:
                 data = tomlkit.loads(f.read())
 
             data["tool"]["poetry"]["version"] = verstr
-            with open(file_path, "w") as f:
-                data = tomlkit.dumps(data)
-                f.write(data)
+            self._write_version_file(file_path, tomlkit.dumps(data))
         except IOError as e:
             stamp_utils.VMN_LOGGER.error(f"Error writing cargo ver file: {file_path}\n")
             stamp_utils.VMN_LOGGER.debug("Exception info: ", exc_info=True)
@@ -773,6 +821,30 @@ class IVersionsStamper(object):
 
             return
 
+        self._set_jinja2_version_info(verstr)
+
+        for item in backend_conf:
+            custom_path = None
+            if "custom_keys_path" in item:
+                custom_path = os.path.join(self.vmn_root_path, item["custom_keys_path"])
+
+            tmplt_value = create_data_dict_for_jinja2(
+                self.current_version_info,
+                custom_path,
+            )
+
+            output_file_path = os.path.join(
+                self.vmn_root_path, item["output_file_path"]
+            )
+            if gen_jinja2_template_from_data(
+                tmplt_value,
+                os.path.join(self.vmn_root_path, item["input_file_path"]),
+                output_file_path,
+                get_jinja2_cache_dir(self.vmn_root_path),
+            ):
+                self.changed_version_files.append(output_file_path)
+
+    def _set_jinja2_version_info(self, verstr):
         # TODO:: The reason we need to set "version and base_version"
         # is because in this stage, we only have the "raw" current_version_info
         # "version and base_version" are added only in show. maybe think
@@ -792,89 +864,132 @@ class IVersionsStamper(object):
             self.hide_zero_hotfix,
         )
 
-        for item in backend_conf:
-            custom_path = None
-            if "custom_keys_path" in item:
-                custom_path = os.path.join(self.vmn_root_path, item["custom_keys_path"])
-
-            tmplt_value = create_data_dict_for_jinja2(
-                self.current_version_info,
-                custom_path,
-            )
-
-            gen_jinja2_template_from_data(
-                tmplt_value,
-                os.path.join(self.vmn_root_path, item["input_file_path"]),
-                os.path.join(self.vmn_root_path, item["output_file_path"]),
-            )
-
     def _write_version_to_generic_selectors(self, verstr, backend_conf):
+        if not self.dry_run:
+            self._set_jinja2_version_info(verstr)
+
         for item in backend_conf:
+            selectors = []
             for selector in item["selectors_section"]:
                 regex_selector = selector["regex_selector"]
                 for k, v in stamp_utils.SUPPORTED_REGEX_VARS.items():
                     regex_selector = regex_selector.replace(f"{{{{{k}}}}}", v)
 
-                regex_sub = selector["regex_sub"]
+                selectors.append((re.compile(regex_selector), selector["regex_sub"]))
 
-                jinja_backend_conf = []
-                temporary_jinja_template_paths = []
-                for file_section in item["paths_section"]:
-                    input_file_path = os.path.join(
-                        self.vmn_root_path, file_section["input_file_path"]
-                    )
-                    with open(input_file_path, "r") as file:
-                        content = file.read()
+            file_sections = item["paths_section"]
+            write_file = self._write_generic_selectors_file
+            if item.get("streaming", False):
+                write_file = self._stream_generic_selectors_file
 
-                    # Replace the matched version strings with regex_sub
-                    content = re.sub(regex_selector, regex_sub, content)
+            def apply_selectors(file_section):
+                write_file(verstr, selectors, file_section)
 
-                    raw_temporary_jinja_template_path = (
-                        f'{file_section["input_file_path"]}.tmp.jinja2'
-                    )
-                    temporary_jinja_template_path = os.path.join(
-                        self.vmn_root_path, raw_temporary_jinja_template_path
-                    )
+            if len(file_sections) < 2 or not _are_independent_files(file_sections):
+                for file_section in file_sections:
+                    apply_selectors(file_section)
 
-                    if self.dry_run:
-                        stamp_utils.VMN_LOGGER.info(
-                            "Would have written to a version backend file:\n"
-                            f"backend: generic_selectors\n"
-                            f"version: {verstr}\n"
-                            f"file: {temporary_jinja_template_path}\n"
-                            f"with content:\n{content}"
-                        )
+                continue
 
-                        continue
+            from multiprocessing.pool import ThreadPool
 
-                    with open(temporary_jinja_template_path, "w") as file:
-                        file.write(content)
+            with ThreadPool(min(len(file_sections), 10)) as p:
+                p.map(apply_selectors, file_sections)
 
-                    temporary_jinja_template_paths.append(
-                        (temporary_jinja_template_path, content)
-                    )
+    def _write_generic_selectors_file(self, verstr, selectors, file_section):
+        input_file_path = os.path.join(
+            self.vmn_root_path, file_section["input_file_path"]
+        )
+        output_file_path = os.path.join(
+            self.vmn_root_path, file_section["output_file_path"]
+        )
+        with open(input_file_path, "r") as file:
+            content = file.read()
+
+        # Replace the matched version strings with their jinja2 expressions
+        for regex_selector, regex_sub in selectors:
+            content = regex_selector.sub(regex_sub, content)
+
+        if self.dry_run:
+            stamp_utils.VMN_LOGGER.info(
+                "Would have written to a version backend file:\n"
+                f"backend: generic_selectors\n"
+                f"version: {verstr}\n"
+                f"file: {output_file_path}\n"
+                f"with template:\n{content}"
+            )
+
+            return
+
+        custom_path = None
+        if "custom_keys_path" in file_section:
+            custom_path = os.path.join(
+                self.vmn_root_path, file_section["custom_keys_path"]
+            )
+
+        tmplt_value = create_data_dict_for_jinja2(
+            self.current_version_info,
+            custom_path,
+        )
+        out = render_jinja2_template(
+            tmplt_value, content, get_jinja2_cache_dir(self.vmn_root_path)
+        )
+
+        self._write_version_file(output_file_path, out)
+
+    def _stream_generic_selectors_file(self, verstr, selectors, file_section):
+        input_file_path = os.path.join(
+            self.vmn_root_path, file_section["input_file_path"]
+        )
+        output_file_path = os.path.join(
+            self.vmn_root_path, file_section["output_file_path"]
+        )
+
+        if self.dry_run:
+            stamp_utils.VMN_LOGGER.info(
+                "Would have written to a version backend file:\n"
+                f"backend: generic_selectors\n"
+                f"version: {verstr}\n"
+                f"file: {output_file_path}\n"
+                f"streamed from: {input_file_path}"
+            )
+
+            return
 
-                    d = {
-                        "input_file_path": raw_temporary_jinja_template_path,
-                        "output_file_path": file_section["output_file_path"],
-                    }
-                    if "custom_keys_path" in file_section:
-                        d["custom_keys_path"] = file_section["custom_keys_path"]
+        custom_path = None
+        if "custom_keys_path" in file_section:
+            custom_path = os.path.join(
+                self.vmn_root_path, file_section["custom_keys_path"]
+            )
 
-                    jinja_backend_conf.append(d)
+        tmplt_value = create_data_dict_for_jinja2(
+            self.current_version_info,
+            custom_path,
+        )
 
-                self._write_version_to_generic_jinja(verstr, jinja_backend_conf)
+        # Only the replacements are rendered, the file itself is not a template.
+        # \1{{version}} would render to \10.0.1 so it is written as \g<1>{{version}}
+        cache_dir = get_jinja2_cache_dir(self.vmn_root_path)
+        rendered_selectors = []
+        for regex_selector, regex_sub in selectors:
+            regex_sub = _name_numbered_backreferences(regex_sub)
+            rendered_selectors.append(
+                (
+                    regex_selector,
+                    render_jinja2_template(tmplt_value, regex_sub, cache_dir),
+                )
+            )
 
-                for t, c in temporary_jinja_template_paths:
-                    os.remove(t)
-                    stamp_utils.VMN_LOGGER.debug(f"Removed {t} with content:\n" f"{c}")
+        if stream_regex_sub_file(
+            input_file_path, output_file_path, rendered_selectors
+        ):
+            self.changed_version_files.append(output_file_path)
 
     def _write_version_to_vmn_version_file(self, verstr):
         file_path = self.version_file_path
         try:
-            with open(file_path, "w") as fid:
-                ver_dict = {"version_to_stamp_from": verstr}
-                yaml.dump(ver_dict, fid)
+            ver_dict = {"version_to_stamp_from": verstr}
+            self._write_version_file(file_path, yaml.dump(ver_dict))
         except IOError as e:
             stamp_utils.VMN_LOGGER.error(f"Error writing ver file: {file_path}\n")
             stamp_utils.VMN_LOGGER.debug("Exception info: ", exc_info=True)
@@ -1310,42 +1425,18 @@ class VersionControlStamper(IVersionsStamper):
 
     @stamp_utils.measure_runtime_decorator
     def publish_stamp(self, app_version, root_app_version):
-        app_msg = {
-            "vmn_info": self.current_version_info["vmn_info"],
-            "stamping": {"app": self.current_version_info["stamping"]["app"]},
-        }
-
         if not self.should_publish:
             return 0
 
-        self.write_version_to_file(version_number=app_version)
-
-        version_files_to_add = self.get_files_to_add_to_index(self.version_files)
-
-        for backend in self.version_backends:
-            handler = getattr(self, f"_add_files_{backend}")
-            backend_conf = self.version_backends[backend]
-            handler(version_files_to_add, backend_conf)
-
-        if self.create_verinfo_files:
-            self.create_verinfo_file(app_msg, version_files_to_add, app_version)
-
-        if self.root_app_name is not None:
-            root_app_msg = {
-                "stamping": {
-                    "root_app": self.current_version_info["stamping"]["root_app"]
-                },
-                "vmn_info": self.current_version_info["vmn_info"],
-            }
+        app_msg, root_app_msg = self.get_stamp_messages()
 
-            tmp = self.get_files_to_add_to_index([self.root_app_conf_path])
-            if tmp:
-                version_files_to_add.extend(tmp)
+        tags = self.get_stamp_tags(app_version, root_app_version)
+        if tags is None:
+            return 3
 
-            if self.create_verinfo_files:
-                self.create_verinfo_root_file(
-                    root_app_msg, root_app_version, version_files_to_add
-                )
+        version_files_to_add = self.write_stamp_files(
+            app_version, root_app_version, app_msg, root_app_msg
+        )
 
         commit_msg = None
         if self.current_version_info["stamping"]["app"]["release_mode"] == "init":
@@ -1358,122 +1449,81 @@ class VersionControlStamper(IVersionsStamper):
 
         self.current_version_info["stamping"]["msg"] = commit_msg
 
-        prev_changeset = self.backend.changeset()
+        msgs = [app_msg]
+        if root_app_msg is not None:
+            msgs.append(root_app_msg)
+
+        return publish_stamps([self], commit_msg, version_files_to_add, tags, msgs)
 
-        try:
-            self.publish_commit(version_files_to_add)
-        except Exception:
-            stamp_utils.VMN_LOGGER.debug("Logged Exception message: ", exc_info=True)
-            stamp_utils.VMN_LOGGER.info("Reverting vmn changes... ")
-            if self.dry_run:
-                stamp_utils.VMN_LOGGER.info("Would have tried to revert a vmn commit")
-            else:
-                self.backend.revert_vmn_commit(prev_changeset, self.version_files)
+    def get_stamp_messages(self):
+        app_msg = {
+            "vmn_info": self.current_version_info["vmn_info"],
+            "stamping": {"app": self.current_version_info["stamping"]["app"]},
+        }
 
-            # TODO:: turn to error codes (enums). This one means - exit without retries
-            return 3
+        root_app_msg = None
+        if self.root_app_name is not None:
+            root_app_msg = {
+                "stamping": {
+                    "root_app": self.current_version_info["stamping"]["root_app"]
+                },
+                "vmn_info": self.current_version_info["vmn_info"],
+            }
+
+        return app_msg, root_app_msg
 
+    def get_stamp_tags(self, app_version, root_app_version):
         tag = f'{self.name.replace("/", "-")}_{app_version}'
         match = re.search(stamp_utils.VMN_TAG_REGEX, tag)
         if match is None:
             stamp_utils.VMN_LOGGER.error(
                 f"Tag {tag} doesn't comply to vmn version format"
-                f"Reverting vmn changes ..."
             )
-            if self.dry_run:
-                stamp_utils.VMN_LOGGER.info("Would have reverted vmn commit.")
-            else:
-                self.backend.revert_vmn_commit(prev_changeset, self.version_files)
 
-            return 3
+            return None
 
         tags = [tag]
-        msgs = [app_msg]
 
         if self.root_app_name is not None:
-            msgs.append(root_app_msg)
             tag = f"{self.root_app_name}_{root_app_version}"
             match = re.search(stamp_utils.VMN_ROOT_TAG_REGEX, tag)
             if match is None:
                 stamp_utils.VMN_LOGGER.error(
                     f"Tag {tag} doesn't comply to vmn version format"
-                    f"Reverting vmn changes ..."
                 )
-                if self.dry_run:
-                    stamp_utils.VMN_LOGGER.info("Would have reverted vmn commit.")
-                else:
-                    self.backend.revert_vmn_commit(prev_changeset, self.version_files)
 
-                return 3
+                return None
 
             tags.append(tag)
 
-        all_tags = []
-        all_tags.extend(tags)
+        return tags
 
-        try:
-            for t, m in zip(tags, msgs):
-                if self.dry_run:
-                    stamp_utils.VMN_LOGGER.info(
-                        "Would have created tag:\n"
-                        f"{t}\n"
-                        f"Tag content:\n{yaml.dump(m, sort_keys=True)}"
-                    )
-                else:
-                    self.backend.tag([t], [yaml.dump(m, sort_keys=True)])
-        except Exception:
-            stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
-            stamp_utils.VMN_LOGGER.info(f"Reverting vmn changes for tags: {tags} ... ")
-            if self.dry_run:
-                stamp_utils.VMN_LOGGER.info(
-                    f"Would have reverted vmn commit and delete tags:\n{all_tags}"
-                )
-            else:
-                self.backend.revert_vmn_commit(
-                    prev_changeset, self.version_files, all_tags
-                )
+    @stamp_utils.measure_runtime_decorator
+    def write_stamp_files(self, app_version, root_app_version, app_msg, root_app_msg):
+        # root_app_msg is None when the root app files are written by another app
+        self.write_version_to_file(version_number=app_version)
 
-            return 1
+        version_files_to_add = self.get_files_to_add_to_index(self.version_files)
 
-        try:
-            if self.dry_run:
-                stamp_utils.VMN_LOGGER.info(
-                    "Would have pushed with tags.\n" f"tags: {all_tags} "
-                )
-            else:
-                self.backend.push(all_tags)
+        for backend in self.version_backends:
+            handler = getattr(self, f"_add_files_{backend}")
+            backend_conf = self.version_backends[backend]
+            handler(version_files_to_add, backend_conf)
 
-                count = 0
-                res = self.backend.check_for_outgoing_changes()
-                while count < 5 and res:
-                    count += 1
-                    stamp_utils.VMN_LOGGER.error(
-                        f"BUG: Somehow we have outgoing changes right "
-                        f"after publishing:\n{res}"
-                    )
-                    time.sleep(60)
-                    res = self.backend.check_for_outgoing_changes()
+        if self.create_verinfo_files:
+            self.create_verinfo_file(app_msg, version_files_to_add, app_version)
 
-                if count == 5 and res:
-                    raise RuntimeError(
-                        f"BUG: Somehow we have outgoing changes right "
-                        f"after publishing:\n{res}"
-                    )
-        except Exception:
-            stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
-            stamp_utils.VMN_LOGGER.info(f"Reverting vmn changes for tags: {tags} ...")
-            if self.dry_run:
-                stamp_utils.VMN_LOGGER.info(
-                    f"Would have reverted vmn commit and delete tags:\n{all_tags}"
-                )
-            else:
-                self.backend.revert_vmn_commit(
-                    prev_changeset, self.version_files, all_tags
-                )
+        if root_app_msg is not None:
+            tmp = self.get_files_to_add_to_index([self.root_app_conf_path])
+            if tmp:
+                version_files_to_add.extend(tmp)
 
-            return 2
+            if self.create_verinfo_files:
+                self.create_verinfo_root_file(
+                    root_app_msg, root_app_version, version_files_to_add
+                )
 
-        return 0
+        return version_files_to_add
 
     def _add_files_generic_selectors(self, version_files_to_add, backend_conf):
         for item in backend_conf:
@@ -1502,6 +1552,21 @@ class VersionControlStamper(IVersionsStamper):
 
     @stamp_utils.measure_runtime_decorator
     def publish_commit(self, version_files_to_add):
+        self.remove_other_branches_conf_files()
+
+        if self.dry_run:
+            stamp_utils.VMN_LOGGER.info(
+                "Would have created commit with message:\n"
+                f'{self.current_version_info["stamping"]["msg"]}'
+            )
+        else:
+            self.backend.commit(
+                message=self.current_version_info["stamping"]["msg"],
+                user="vmn",
+                include=version_files_to_add,
+            )
+
+    def remove_other_branches_conf_files(self):
         cur_branch = self.backend.active_branch
         path = os.path.join(
             self.app_dir_path,
@@ -1517,28 +1582,19 @@ class VersionControlStamper(IVersionsStamper):
                     f"{set(list_of_files) - {branch_conf_path} }"
                 )
 
-            stamp_utils.VMN_LOGGER.info(
-                "Would have created commit with message:\n"
-                f'{self.current_version_info["stamping"]["msg"]}'
-            )
-        else:
-            for f in set(list_of_files) - {branch_conf_path}:
-                try:
-                    self.backend._be.index.remove([f], working_tree=True)
-                except Exception:
-                    pass
+            return
 
-                try:
-                    f_to_rem = pathlib.Path(f)
-                    f_to_rem.unlink()
-                except Exception:
-                    pass
+        for f in set(list_of_files) - {branch_conf_path}:
+            try:
+                self.backend._be.index.remove([f], working_tree=True)
+            except Exception:
+                pass
 
-            self.backend.commit(
-                message=self.current_version_info["stamping"]["msg"],
-                user="vmn",
-                include=version_files_to_add,
-            )
+            try:
+                f_to_rem = pathlib.Path(f)
+                f_to_rem.unlink()
+            except Exception:
+                pass
 
     @stamp_utils.measure_runtime_decorator
     def create_verinfo_root_file(
@@ -1584,6 +1640,28 @@ class VersionControlStamper(IVersionsStamper):
         self.backend.pull()
 
 
+@stamp_utils.measure_runtime_decorator
+def _exclude_unignored_vmn_files(vcs):
+    """
+    A .vmn/.gitignore written by an older vmn lacks the files added to
+    IGNORED_FILES since. Changing it would leave pending changes in the
+    repository so the missing files are excluded in the local clone instead
+    """
+    if vcs.be_type != stamp_utils.VMN_BE_TYPE_GIT:
+        return
+
+    vmn_path = os.path.join(vcs.vmn_root_path, ".vmn")
+    try:
+        with open(os.path.join(vmn_path, ".gitignore"), "r") as f:
+            ignored = set(f.read().split())
+    except FileNotFoundError:
+        return
+
+    missing = [f for f in IGNORED_FILES if f not in ignored]
+    if missing:
+        vcs.backend.add_local_excludes(vmn_path, missing)
+
+
 @stamp_utils.measure_runtime_decorator
 def handle_init(vmn_ctx):
     expected_status = {"repos_exist_locally"}
@@ -1648,29 +1726,128 @@ def handle_init_app(vmn_ctx):
 
 @stamp_utils.measure_runtime_decorator
 def handle_stamp(vmn_ctx):
-    vmn_ctx.vcs.prerelease = vmn_ctx.args.pr
-    vmn_ctx.vcs.buildmetadata = None
-    vmn_ctx.vcs.release_mode = vmn_ctx.args.release_mode
-    vmn_ctx.vcs.optional_release_mode = vmn_ctx.args.orm
-    vmn_ctx.vcs.override_root_version = vmn_ctx.args.orv
-    vmn_ctx.vcs.override_version = vmn_ctx.args.ov
-    vmn_ctx.vcs.dry_run = vmn_ctx.args.dry
+    if vmn_ctx.args.names:
+        return stamp_multiple_apps(vmn_ctx)
 
-    # For backward compatibility
-    if vmn_ctx.vcs.release_mode == "micro":
-        vmn_ctx.vcs.release_mode = "hotfix"
+    _init_stamp_params(vmn_ctx)
 
-    if vmn_ctx.vcs.prerelease and vmn_ctx.vcs.prerelease[-1] == ".":
-        vmn_ctx.vcs.prerelease = vmn_ctx.vcs.prerelease[:-1]
+    err, should_stamp = _check_status_for_stamp(vmn_ctx)
+    if err or not should_stamp:
+        return err
 
-    assert vmn_ctx.vcs.release_mode is None or vmn_ctx.vcs.optional_release_mode is None
+    err = _retrieve_remote_changes_for_stamp(
+        vmn_ctx, vmn_ctx.vcs.get_fetch_scope(), vmn_ctx.vcs.fetch_cache_ttl
+    )
+    if err:
+        return err
 
-    if vmn_ctx.vcs.override_version is not None:
-        try:
-            props = stamp_utils.VMNBackend.deserialize_vmn_version(
-                vmn_ctx.vcs.override_version
-            )
-        except Exception:
+    err, initial_version = _get_stamp_initial_version(vmn_ctx)
+    if err:
+        return err
+
+    try:
+        version = _stamp_version(
+            vmn_ctx.vcs,
+            vmn_ctx.args.pull,
+            vmn_ctx.args.check_vmn_version,
+            initial_version,
+        )
+    except Exception as exc:
+        stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
+
+        return 1
+
+    _report_stamped_version(vmn_ctx, version)
+
+    return 0
+
+
+@stamp_utils.measure_runtime_decorator
+def stamp_multiple_apps(vmn_ctx):
+    app_ctxs = []
+    for name in dict.fromkeys([vmn_ctx.args.name] + vmn_ctx.args.names):
+        app_ctx = vmn_ctx
+        if name != vmn_ctx.args.name:
+            app_args = copy.copy(vmn_ctx.args)
+            app_args.name = name
+            app_args.names = []
+            app_ctx = VMNContainer(
+                app_args, vmn_ctx.vcs.vmn_root_path, vmn_ctx.vcs.backend
+            )
+
+        _init_stamp_params(app_ctx)
+
+        err, should_stamp = _check_status_for_stamp(app_ctx)
+        if err:
+            return err
+
+        if should_stamp:
+            app_ctxs.append(app_ctx)
+
+    if not app_ctxs:
+        return 0
+
+    app_names = []
+    for app_ctx in app_ctxs:
+        app_names.extend(app_ctx.vcs.get_fetch_scope())
+
+    # The strictest app decides
+    ttl = min(app_ctx.vcs.fetch_cache_ttl for app_ctx in app_ctxs)
+
+    err = _retrieve_remote_changes_for_stamp(app_ctxs[0], app_names, ttl)
+    if err:
+        return err
+
+    initial_versions = []
+    for app_ctx in app_ctxs:
+        err, initial_version = _get_stamp_initial_version(app_ctx)
+        if err:
+            return err
+
+        initial_versions.append(initial_version)
+
+    try:
+        versions = _stamp_versions(
+            [app_ctx.vcs for app_ctx in app_ctxs],
+            vmn_ctx.args.pull,
+            vmn_ctx.args.check_vmn_version,
+            initial_versions,
+        )
+    except Exception:
+        stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
+
+        return 1
+
+    for app_ctx, version in zip(app_ctxs, versions):
+        _report_stamped_version(app_ctx, version)
+
+    return 0
+
+
+def _init_stamp_params(vmn_ctx):
+    vmn_ctx.vcs.prerelease = vmn_ctx.args.pr
+    vmn_ctx.vcs.buildmetadata = None
+    vmn_ctx.vcs.release_mode = vmn_ctx.args.release_mode
+    vmn_ctx.vcs.optional_release_mode = vmn_ctx.args.orm
+    vmn_ctx.vcs.override_root_version = vmn_ctx.args.orv
+    vmn_ctx.vcs.override_version = vmn_ctx.args.ov
+    vmn_ctx.vcs.dry_run = vmn_ctx.args.dry
+
+    # For backward compatibility
+    if vmn_ctx.vcs.release_mode == "micro":
+        vmn_ctx.vcs.release_mode = "hotfix"
+
+    if vmn_ctx.vcs.prerelease and vmn_ctx.vcs.prerelease[-1] == ".":
+        vmn_ctx.vcs.prerelease = vmn_ctx.vcs.prerelease[:-1]
+
+    assert vmn_ctx.vcs.release_mode is None or vmn_ctx.vcs.optional_release_mode is None
+
+    if vmn_ctx.vcs.override_version is not None:
+        try:
+            props = stamp_utils.VMNBackend.deserialize_vmn_version(
+                vmn_ctx.vcs.override_version
+            )
+        except Exception:
             err = (
                 f"Provided override {vmn_ctx.vcs.override_version} doesn't comply with: "
                 f"{stamp_utils.VMN_VERSION_FORMAT} format"
@@ -1679,6 +1856,8 @@ def handle_stamp(vmn_ctx):
 
             raise RuntimeError(err)
 
+
+def _check_status_for_stamp(vmn_ctx):
     optional_status = {"modified", "detached"}
     expected_status = {
         "repos_exist_locally",
@@ -1693,7 +1872,7 @@ def handle_stamp(vmn_ctx):
             f"Error occured when getting the repo status: {status}", exc_info=True
         )
 
-        return 1
+        return 1, False
 
     if status["matched_version_info"] is not None:
         # Good we have found an existing version matching
@@ -1705,19 +1884,26 @@ def handle_stamp(vmn_ctx):
             f"Found existing version {disp_version} "
             f"and nothing has changed. Will not stamp"
         )
+        vmn_ctx.vcs.stamped_version = version
 
-        return 0
+        return 0, False
 
     if "detached" in status["state"]:
         stamp_utils.VMN_LOGGER.error("In detached head. Will not stamp new version")
-        return 1
+        return 1, False
 
-    vmn_ctx.vcs.backend.perform_cached_fetch()
+    return 0, True
+
+
+def _retrieve_remote_changes_for_stamp(vmn_ctx, app_names, ttl):
+    vmn_ctx.vcs.backend.perform_cached_fetch(app_names=app_names, ttl=ttl)
 
     # We didn't find any existing version
     if vmn_ctx.args.pull:
         try:
-            vmn_ctx.vcs.backend.perform_cached_fetch(force=True)
+            vmn_ctx.vcs.backend.perform_cached_fetch(
+                force=True, app_names=app_names, ttl=ttl
+            )
             vmn_ctx.vcs.retrieve_remote_changes()
         except Exception:
             stamp_utils.VMN_LOGGER.error(
@@ -1727,6 +1913,10 @@ def handle_stamp(vmn_ctx):
 
             return 1
 
+    return 0
+
+
+def _get_stamp_initial_version(vmn_ctx):
     initial_version = _determine_initial_version(vmn_ctx)
 
     props = stamp_utils.VMNBackend.deserialize_vmn_version(initial_version)
@@ -1748,7 +1938,7 @@ def handle_stamp(vmn_ctx):
                 f"Logged Exception message: {e}", exc_info=True
             )
 
-            return 1
+            return 1, None
 
         release_tag_name = stamp_utils.VMNBackend.serialize_vmn_tag_name(
             vmn_ctx.vcs.name, base_verstr
@@ -1788,17 +1978,12 @@ def handle_stamp(vmn_ctx):
             "release_mode"
         ]
 
-    try:
-        version = _stamp_version(
-            vmn_ctx.vcs,
-            vmn_ctx.args.pull,
-            vmn_ctx.args.check_vmn_version,
-            initial_version,
-        )
-    except Exception as exc:
-        stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
+    return 0, initial_version
 
-        return 1
+
+def _report_stamped_version(vmn_ctx, version):
+    vmn_ctx.vcs.stamped_version = version
+    vmn_ctx.vcs.created_new_version = not vmn_ctx.vcs.dry_run
 
     disp_version = vmn_ctx.vcs.get_be_formatted_version(version)
     if vmn_ctx.vcs.dry_run:
@@ -1806,8 +1991,6 @@ def handle_stamp(vmn_ctx):
     else:
         stamp_utils.VMN_LOGGER.info(f"{disp_version}")
 
-    return 0
-
 
 def _determine_initial_version(vmn_ctx):
     initial_version = vmn_ctx.vcs.verstr_from_file
@@ -1954,6 +2137,25 @@ def handle_show(vmn_ctx):
     if version_mod.version == "0.0.0":
         stamp_utils.VMN_LOGGER.info("Test logprint in show")
 
+    if vmn_ctx.args.all or vmn_ctx.args.names:
+        return show_multiple_apps(vmn_ctx)
+
+    if vmn_ctx.args.name is None:
+        stamp_utils.VMN_LOGGER.error("Application name is required")
+        return 1
+
+    init_show_params(vmn_ctx)
+
+    try:
+        show(vmn_ctx.vcs, vmn_ctx.params, vmn_ctx.args.version)
+    except Exception:
+        stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
+        return 1
+
+    return 0
+
+
+def init_show_params(vmn_ctx):
     vmn_ctx.params["from_file"] = vmn_ctx.args.from_file
 
     # root app does not have raw version number
@@ -1973,13 +2175,79 @@ def handle_show(vmn_ctx):
     vmn_ctx.params["display_unique_id"] = vmn_ctx.args.display_unique_id
     vmn_ctx.params["display_type"] = vmn_ctx.args.display_type
 
-    try:
-        show(vmn_ctx.vcs, vmn_ctx.params, vmn_ctx.args.version)
-    except Exception:
-        stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
+
+@stamp_utils.measure_runtime_decorator
+def show_multiple_apps(vmn_ctx):
+    if vmn_ctx.args.version is not None:
+        stamp_utils.VMN_LOGGER.error(
+            "--version cannot be used when showing multiple applications"
+        )
         return 1
 
-    return 0
+    names = []
+    if vmn_ctx.args.name is not None:
+        names.append(vmn_ctx.args.name)
+    names.extend(vmn_ctx.args.names)
+
+    if vmn_ctx.args.all:
+        names.extend(
+            get_tracked_app_names(vmn_ctx.vcs.vmn_root_path, vmn_ctx.args.root)
+        )
+
+    # All the applications share the backend and the local repository changes
+    changes_cache = {}
+    apps_data = {}
+    err = 0
+    for name in dict.fromkeys(names):
+        app_args = copy.copy(vmn_ctx.args)
+        app_args.name = name
+        app_args.names = []
+        app_args.all = False
+
+        try:
+            app_ctx = VMNContainer(
+                app_args, vmn_ctx.vcs.vmn_root_path, vmn_ctx.vcs.backend
+            )
+            init_show_params(app_ctx)
+            app_ctx.params["changes_cache"] = changes_cache
+
+            apps_data[name] = get_show_output(
+                app_ctx.vcs, app_ctx.params, structured=True
+            )
+        except Exception:
+            stamp_utils.VMN_LOGGER.error(f"Failed to show {name}")
+            stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
+            err = 1
+
+    if vmn_ctx.args.output_format == "json":
+        print(json.dumps(apps_data, indent=2))
+    else:
+        print(yaml.dump(apps_data), end="")
+
+    return err
+
+
+def get_tracked_app_names(vmn_root_path, root=False):
+    vmn_path = os.path.join(vmn_root_path, ".vmn")
+
+    names = []
+    for dirpath, dirnames, filenames in os.walk(vmn_path):
+        dirnames.sort()
+        if VER_FILE_NAME not in filenames:
+            continue
+
+        names.append(os.path.relpath(dirpath, vmn_path).replace(os.sep, "/"))
+
+    if not root:
+        return names
+
+    root_names = []
+    for name in names:
+        root_name = stamp_utils.VMNBackend.get_root_app_name_from_name(name)
+        if root_name is not None and root_name not in root_names:
+            root_names.append(root_name)
+
+    return root_names
 
 
 @stamp_utils.measure_runtime_decorator
@@ -2010,6 +2278,10 @@ def handle_goto(vmn_ctx):
     }
 
     vmn_ctx.params["deps_only"] = vmn_ctx.args.deps_only
+    vmn_ctx.params["jobs"] = vmn_ctx.args.jobs
+    if vmn_ctx.params["jobs"] < 1:
+        stamp_utils.VMN_LOGGER.error("--jobs must be a positive number")
+        return 1
 
     status = _get_repo_status(vmn_ctx.vcs, expected_status, optional_status)
     if status["error"]:
@@ -2025,7 +2297,95 @@ def handle_goto(vmn_ctx):
 
 
 @stamp_utils.measure_runtime_decorator
-def _get_repo_status(vcs, expected_status, optional_status=set()):
+def _inspect_dep_repo(args):
+    repo, full_path, dep_conf, be_type = args
+    res = {
+        "pending": None,
+        "not_synced": [],
+        "detached": False,
+        "outgoing": None,
+    }
+
+    dep_be, err = stamp_utils.get_client(full_path, be_type)
+    if err:
+        err_str = "Failed to create backend {0}. Exiting".format(err)
+        stamp_utils.VMN_LOGGER.error(err_str)
+        raise RuntimeError(err_str)
+
+    res["pending"] = dep_be.check_for_pending_changes()
+
+    if "branch" in dep_conf:
+        err_msg = (
+            f"{repo} repository is not on the branch required by the "
+            f"configuration: {dep_conf['branch']}"
+        )
+        try:
+            branch_name = dep_be.get_active_branch()
+            err_msg = (
+                f"{repo} repository is on a different branch: "
+                f"{branch_name} than what is required by the configuration: "
+                f"{dep_conf['branch']}"
+            )
+            assert branch_name == dep_conf["branch"]
+        except Exception:
+            res["not_synced"].append(("branch_synced_error", err_msg))
+
+    if "tag" in dep_conf:
+        try:
+            c1 = dep_be.changeset(tag=dep_conf["tag"])
+            c2 = dep_be.changeset()
+            assert c1 == c2
+        except Exception:
+            res["not_synced"].append(
+                (
+                    "tag_synced_error",
+                    f"Repository in not on the requested tag by the configuration "
+                    f"for {repo}.",
+                )
+            )
+
+    if "hash" in dep_conf:
+        try:
+            assert dep_conf["hash"] == dep_be.changeset()
+        except Exception:
+            res["not_synced"].append(
+                (
+                    "hash_synced_error",
+                    f"Repository in not on the requested hash by the configuration "
+                    f"for {repo}.",
+                )
+            )
+
+    if not dep_be.in_detached_head():
+        res["outgoing"] = dep_be.check_for_outgoing_changes()
+    else:
+        res["detached"] = True
+
+    del dep_be
+
+    return res
+
+
+def _get_local_changes(be, repo_path, changes_cache=None):
+    # changes_cache lets multiple apps of the same repository check it only once
+    if changes_cache is not None and repo_path in changes_cache:
+        return changes_cache[repo_path]
+
+    changes = (be.check_for_pending_changes(), be.check_for_outgoing_changes())
+    if changes_cache is not None:
+        changes_cache[repo_path] = changes
+
+    return changes
+
+
+@stamp_utils.measure_runtime_decorator
+def _get_repo_status(
+    vcs,
+    expected_status,
+    optional_status=set(),
+    changes_cache=None,
+    tracking_only=False,
+):
     be = vcs.backend
     default_status = {
         "pending": False,
@@ -2076,13 +2436,20 @@ def _get_repo_status(vcs, expected_status, optional_status=set()):
             ] = "vmn tracking is not yet initialized. Run vmn init on the repository"
             status["state"].remove("repo_tracked")
 
-    err = be.check_for_pending_changes()
-    if err:
+    if tracking_only:
+        # The caller does not care about local changes, outgoing commits or
+        # dependencies so don't pay for inspecting them
+        return _verify_repo_status(status, expected_status, optional_status)
+
+    pending_err, outgoing_err = _get_local_changes(
+        be, vcs.vmn_root_path, changes_cache
+    )
+    if pending_err:
         status["pending"] = True
-        status["err_msgs"]["pending"] = err
+        status["err_msgs"]["pending"] = pending_err
         status["state"].add("pending")
 
-    err = be.check_for_outgoing_changes()
+    err = outgoing_err
     if err:
         # TODO:: Check for errcode instead of startswith
         if err.startswith("Detached head"):
@@ -2122,104 +2489,66 @@ def _get_repo_status(vcs, expected_status, optional_status=set()):
             status["local_repos_diff"] = missing_deps
             status["state"].remove("repos_exist_locally")
 
-        err = 0
-        common_deps = configured_repos & local_repos
+        common_deps = sorted((configured_repos & local_repos) - {"."})
+        args = []
         for repo in common_deps:
-            # Skip local repo
-            if repo == ".":
-                continue
+            args.append(
+                (
+                    repo,
+                    os.path.join(vcs.vmn_root_path, repo),
+                    vcs.configured_deps[repo],
+                    vcs.be_type,
+                )
+            )
 
-            status["repos"][repo] = copy.deepcopy(default_status)
-            full_path = os.path.join(vcs.vmn_root_path, repo)
+        results = []
+        if args:
+            from multiprocessing.pool import ThreadPool
 
-            dep_be, err = stamp_utils.get_client(full_path, vcs.be_type)
-            if err:
-                err_str = "Failed to create backend {0}. Exiting".format(err)
-                stamp_utils.VMN_LOGGER.error(err_str)
-                raise RuntimeError(err_str)
+            # Git work is done by subprocesses so threads are good enough
+            with ThreadPool(min(len(args), 10)) as p:
+                results = p.map(_inspect_dep_repo, args)
 
-            err = dep_be.check_for_pending_changes()
-            if err:
+        # results are ordered like common_deps so the merge is deterministic
+        for repo, res in zip(common_deps, results):
+            status["repos"][repo] = copy.deepcopy(default_status)
+
+            if res["pending"]:
                 status["dirty_deps"] = True
                 status["err_msgs"][
                     "dirty_deps"
-                ] = f"{status['err_msgs']['dirty_deps']}\n{err}"
+                ] = f"{status['err_msgs']['dirty_deps']}\n{res['pending']}"
                 status["state"].add("dirty_deps")
                 status["repos"][repo]["pending"] = True
                 status["repos"][repo]["state"].add("pending")
 
-            if "branch" in vcs.configured_deps[repo]:
-                try:
-                    branch_name = dep_be.get_active_branch()
-                    err_msg = (
-                        f"{repo} repository is on a different branch: "
-                        f"{branch_name} than what is required by the configuration: "
-                        f"{vcs.configured_deps[repo]['branch']}"
-                    )
-                    assert branch_name == vcs.configured_deps[repo]["branch"]
-                except Exception:
-                    status["deps_synced_with_conf"] = False
-                    status["err_msgs"][
-                        "deps_synced_with_conf"
-                    ] = f"{status['err_msgs']['deps_synced_with_conf']}\n{err_msg}"
-                    if "deps_synced_with_conf" in status["state"]:
-                        status["state"].remove("deps_synced_with_conf")
-
-                    status["repos"][repo]["branch_synced_error"] = True
-                    status["repos"][repo]["state"].add("not_synced_with_conf")
-
-            if "tag" in vcs.configured_deps[repo]:
-                try:
-                    err_msg = (
-                        f"Repository in not on the requested tag by the configuration "
-                        f"for {repo}."
-                    )
-                    c1 = dep_be.changeset(tag=vcs.configured_deps[repo]["tag"])
-                    c2 = dep_be.changeset()
-                    assert c1 == c2
-                except Exception:
-                    status["deps_synced_with_conf"] = False
-                    status["err_msgs"][
-                        "deps_synced_with_conf"
-                    ] = f"{status['err_msgs']['deps_synced_with_conf']}\n{err_msg}"
-                    if "deps_synced_with_conf" in status["state"]:
-                        status["state"].remove("deps_synced_with_conf")
+            for error_key, err_msg in res["not_synced"]:
+                status["deps_synced_with_conf"] = False
+                status["err_msgs"][
+                    "deps_synced_with_conf"
+                ] = f"{status['err_msgs']['deps_synced_with_conf']}\n{err_msg}"
+                if "deps_synced_with_conf" in status["state"]:
+                    status["state"].remove("deps_synced_with_conf")
 
-                    status["repos"][repo]["tag_synced_error"] = True
-                    status["repos"][repo]["state"].add("not_synced_with_conf")
+                status["repos"][repo][error_key] = True
+                status["repos"][repo]["state"].add("not_synced_with_conf")
 
-            if "hash" in vcs.configured_deps[repo]:
-                try:
-                    err_msg = (
-                        f"Repository in not on the requested hash by the configuration "
-                        f"for {repo}."
-                    )
-                    assert vcs.configured_deps[repo]["hash"] == dep_be.changeset()
-                except Exception:
-                    status["deps_synced_with_conf"] = False
-                    status["err_msgs"][
-                        "deps_synced_with_conf"
-                    ] = f"{status['err_msgs']['deps_synced_with_conf']}\n{err_msg}"
-                    if "deps_synced_with_conf" in status["state"]:
-                        status["state"].remove("deps_synced_with_conf")
-
-                    status["repos"][repo]["hash_synced_error"] = True
-                    status["repos"][repo]["state"].add("not_synced_with_conf")
-
-            if not dep_be.in_detached_head():
-                err = dep_be.check_for_outgoing_changes()
-                if err:
-                    status["dirty_deps"] = True
-                    status["err_msgs"][
-                        "dirty_deps"
-                    ] = f"{status['err_msgs']['dirty_deps']}\n{err}"
-                    status["state"].add("dirty_deps")
-                    status["repos"][repo]["outgoing"] = True
-                    status["repos"][repo]["state"].add("outgoing")
-            else:
+            if res["detached"]:
                 status["repos"][repo]["detached"] = True
                 status["repos"][repo]["state"].add("detached")
+            elif res["outgoing"]:
+                status["dirty_deps"] = True
+                status["err_msgs"][
+                    "dirty_deps"
+                ] = f"{status['err_msgs']['dirty_deps']}\n{res['outgoing']}"
+                status["state"].add("dirty_deps")
+                status["repos"][repo]["outgoing"] = True
+                status["repos"][repo]["state"].add("outgoing")
+
+    return _verify_repo_status(status, expected_status, optional_status)
+
 
+def _verify_repo_status(status, expected_status, optional_status):
     if (expected_status & status["state"]) != expected_status:
         for msg in expected_status - status["state"]:
             if msg in status["err_msgs"] and status["err_msgs"][msg]:
@@ -2267,7 +2596,10 @@ def _init_app(versions_be_ifc, starting_version):
         info, starting_version, starting_version, "init", {}
     )
 
-    versions_be_ifc.backend.perform_cached_fetch()
+    versions_be_ifc.backend.perform_cached_fetch(
+        app_names=versions_be_ifc.get_fetch_scope(),
+        ttl=versions_be_ifc.fetch_cache_ttl,
+    )
 
     root_app_version = 0
     services = {}
@@ -2313,6 +2645,106 @@ def _init_app(versions_be_ifc, starting_version):
     return 0
 
 
+@stamp_utils.measure_runtime_decorator
+def publish_stamps(vcs_list, commit_msg, version_files_to_add, tags, msgs):
+    """
+    Commit the version files of all the applications in vcs_list, tag and push.
+    Return codes: 0 - success, 1 - tagging failed, 2 - pushing failed,
+    3 - committing failed. The vmn changes are reverted on failure
+    """
+    be = vcs_list[0].backend
+    dry_run = vcs_list[0].dry_run
+    version_files = []
+    for vcs in vcs_list:
+        version_files.extend(vcs.version_files)
+
+    prev_changeset = be.changeset()
+
+    try:
+        if len(vcs_list) == 1:
+            vcs_list[0].publish_commit(version_files_to_add)
+        else:
+            for vcs in vcs_list:
+                vcs.remove_other_branches_conf_files()
+
+            if dry_run:
+                stamp_utils.VMN_LOGGER.info(
+                    f"Would have created commit with message:\n{commit_msg}"
+                )
+            else:
+                be.commit(message=commit_msg, user="vmn", include=version_files_to_add)
+    except Exception:
+        stamp_utils.VMN_LOGGER.debug("Logged Exception message: ", exc_info=True)
+        stamp_utils.VMN_LOGGER.info("Reverting vmn changes... ")
+        if dry_run:
+            stamp_utils.VMN_LOGGER.info("Would have tried to revert a vmn commit")
+        else:
+            be.revert_vmn_commit(prev_changeset, version_files)
+
+        # TODO:: turn to error codes (enums). This one means - exit without retries
+        return 3
+
+    try:
+        if dry_run:
+            for t, m in zip(tags, msgs):
+                stamp_utils.VMN_LOGGER.info(
+                    "Would have created tag:\n"
+                    f"{t}\n"
+                    f"Tag content:\n{yaml.dump(m, sort_keys=True)}"
+                )
+        else:
+            be.tag(tags, [yaml.dump(m, sort_keys=True) for m in msgs])
+    except Exception:
+        stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
+        stamp_utils.VMN_LOGGER.info(f"Reverting vmn changes for tags: {tags} ... ")
+        if dry_run:
+            stamp_utils.VMN_LOGGER.info(
+                f"Would have reverted vmn commit and delete tags:\n{tags}"
+            )
+        else:
+            be.revert_vmn_commit(prev_changeset, version_files, tags)
+
+        return 1
+
+    try:
+        if dry_run:
+            stamp_utils.VMN_LOGGER.info(
+                "Would have pushed with tags.\n" f"tags: {tags} "
+            )
+        else:
+            be.push(tags)
+
+            count = 0
+            res = be.check_for_outgoing_changes()
+            while count < 5 and res:
+                count += 1
+                stamp_utils.VMN_LOGGER.error(
+                    f"BUG: Somehow we have outgoing changes right "
+                    f"after publishing:\n{res}"
+                )
+                time.sleep(60)
+                res = be.check_for_outgoing_changes()
+
+            if count == 5 and res:
+                raise RuntimeError(
+                    f"BUG: Somehow we have outgoing changes right "
+                    f"after publishing:\n{res}"
+                )
+    except Exception:
+        stamp_utils.VMN_LOGGER.debug("Logged Exception message:", exc_info=True)
+        stamp_utils.VMN_LOGGER.info(f"Reverting vmn changes for tags: {tags} ...")
+        if dry_run:
+            stamp_utils.VMN_LOGGER.info(
+                f"Would have reverted vmn commit and delete tags:\n{tags}"
+            )
+        else:
+            be.revert_vmn_commit(prev_changeset, version_files, tags)
+
+        return 2
+
+    return 0
+
+
 @stamp_utils.measure_runtime_decorator
 def _stamp_version(versions_be_ifc, pull, check_vmn_version, verstr):
     stamped = False
@@ -2321,7 +2753,64 @@ def _stamp_version(versions_be_ifc, pull, check_vmn_version, verstr):
 
     override_main_current_version = versions_be_ifc.override_root_version
 
+    _verify_stamp_preconditions(versions_be_ifc, check_vmn_version)
+
+    while retries:
+        retries -= 1
+
+        current_version = versions_be_ifc.stamp_app_version(override_verstr)
+        main_ver = versions_be_ifc.stamp_root_app_version(override_main_current_version)
+
+        try:
+            err = versions_be_ifc.publish_stamp(current_version, main_ver)
+        except Exception as exc:
+            stamp_utils.VMN_LOGGER.error(
+                f"Failed to publish. Will revert local changes {exc}\nFor more details use --debug"
+            )
+            stamp_utils.VMN_LOGGER.debug("Exception info: ", exc_info=True)
+            versions_be_ifc.backend.revert_local_changes(versions_be_ifc.version_files)
+            err = -1
+
+        if not err:
+            stamped = True
+            break
+
+        if err == 1:
+            override_verstr = current_version
+
+            override_main_current_version = main_ver
+
+            stamp_utils.VMN_LOGGER.warning(
+                "Failed to publish. Will try to auto-increase "
+                "from {0} to {1}".format(
+                    current_version,
+                    versions_be_ifc.gen_advanced_version(override_verstr)[0],
+                )
+            )
+        elif err == 2:
+            if not pull:
+                break
+
+            time.sleep(random.randint(1, 5))
+            try:
+                versions_be_ifc.retrieve_remote_changes()
+            except Exception:
+                stamp_utils.VMN_LOGGER.error("Failed to pull", exc_info=True)
+        else:
+            break
+
+    if not stamped:
+        err = "Failed to stamp"
+        stamp_utils.VMN_LOGGER.error(err)
+        raise RuntimeError(err)
+
+    return current_version
+
+
+def _verify_stamp_preconditions(versions_be_ifc, check_vmn_version):
     if check_vmn_version:
+        from packaging import version as pversion
+
         newer_stamping = version_mod.version != "0.0.0" and (
             pversion.parse(
                 versions_be_ifc.current_version_info["vmn_info"]["vmn_version"]
@@ -2338,20 +2827,44 @@ def _stamp_version(versions_be_ifc, pull, check_vmn_version, verstr):
     if versions_be_ifc.bad_format_template:
         stamp_utils.VMN_LOGGER.warning(versions_be_ifc.template_err_str)
 
+
+@stamp_utils.measure_runtime_decorator
+def _stamp_versions(vcs_list, pull, check_vmn_version, verstrs):
+    """
+    Same as _stamp_version but for multiple applications that are published
+    together with a single commit and a single push
+    """
+    stamped = False
+    retries = 3
+    override_verstrs = list(verstrs)
+
+    override_root_versions = {}
+    for vcs in vcs_list:
+        _verify_stamp_preconditions(vcs, check_vmn_version)
+
+        if vcs.root_app_name is not None:
+            override_root_versions.setdefault(
+                vcs.root_app_name, vcs.override_root_version
+            )
+
     while retries:
         retries -= 1
 
-        current_version = versions_be_ifc.stamp_app_version(override_verstr)
-        main_ver = versions_be_ifc.stamp_root_app_version(override_main_current_version)
+        current_versions = []
+        for vcs, override_verstr in zip(vcs_list, override_verstrs):
+            current_versions.append(vcs.stamp_app_version(override_verstr))
+
+        root_versions = _stamp_root_app_versions(vcs_list, override_root_versions)
 
         try:
-            err = versions_be_ifc.publish_stamp(current_version, main_ver)
+            err = _publish_multiple_stamps(vcs_list, current_versions, root_versions)
         except Exception as exc:
             stamp_utils.VMN_LOGGER.error(
                 f"Failed to publish. Will revert local changes {exc}\nFor more details use --debug"
             )
             stamp_utils.VMN_LOGGER.debug("Exception info: ", exc_info=True)
-            versions_be_ifc.backend.revert_local_changes(versions_be_ifc.version_files)
+            for vcs in vcs_list:
+                vcs.backend.revert_local_changes(vcs.version_files)
             err = -1
 
         if not err:
@@ -2359,16 +2872,12 @@ def _stamp_version(versions_be_ifc, pull, check_vmn_version, verstr):
             break
 
         if err == 1:
-            override_verstr = current_version
-
-            override_main_current_version = main_ver
+            override_verstrs = current_versions
+            override_root_versions = root_versions
 
             stamp_utils.VMN_LOGGER.warning(
                 "Failed to publish. Will try to auto-increase "
-                "from {0} to {1}".format(
-                    current_version,
-                    versions_be_ifc.gen_advanced_version(override_verstr)[0],
-                )
+                f"from {', '.join(current_versions)}"
             )
         elif err == 2:
             if not pull:
@@ -2376,7 +2885,7 @@ def _stamp_version(versions_be_ifc, pull, check_vmn_version, verstr):
 
             time.sleep(random.randint(1, 5))
             try:
-                versions_be_ifc.retrieve_remote_changes()
+                vcs_list[0].retrieve_remote_changes()
             except Exception:
                 stamp_utils.VMN_LOGGER.error("Failed to pull", exc_info=True)
         else:
@@ -2387,11 +2896,87 @@ def _stamp_version(versions_be_ifc, pull, check_vmn_version, verstr):
         stamp_utils.VMN_LOGGER.error(err)
         raise RuntimeError(err)
 
-    return current_version
+    return current_versions
+
+
+def _stamp_root_app_versions(vcs_list, override_root_versions):
+    # Every root app is advanced once and lists all of its stamped services
+    root_vcs = {}
+    root_versions = {}
+    for vcs in vcs_list:
+        if vcs.root_app_name is None:
+            continue
+
+        if vcs.root_app_name not in root_vcs:
+            root_vcs[vcs.root_app_name] = vcs
+            root_versions[vcs.root_app_name] = vcs.stamp_root_app_version(
+                override_root_versions.get(vcs.root_app_name)
+            )
+
+            continue
+
+        root_info = root_vcs[vcs.root_app_name].current_version_info["stamping"][
+            "root_app"
+        ]
+        root_info["services"][vcs.name] = vcs.current_version_info["stamping"]["app"][
+            "_version"
+        ]
+        root_info["latest_service"] = vcs.name
+
+    return root_versions
 
 
 @stamp_utils.measure_runtime_decorator
-def show(vcs, params, verstr=None):
+def _publish_multiple_stamps(vcs_list, app_versions, root_versions):
+    app_tags = []
+    app_msgs = []
+    root_tags = []
+    root_msgs = []
+    version_files_to_add = []
+    commit_msg = ""
+    for vcs, app_version in zip(vcs_list, app_versions):
+        app_msg, root_app_msg = vcs.get_stamp_messages()
+        root_app_version = root_versions.get(vcs.root_app_name)
+
+        tags = vcs.get_stamp_tags(app_version, root_app_version)
+        if tags is None:
+            return 3
+
+        app_tags.append(tags[0])
+        app_msgs.append(app_msg)
+
+        # The root app is published by the first of its services
+        if root_app_msg is not None and tags[1] not in root_tags:
+            root_tags.append(tags[1])
+            root_msgs.append(root_app_msg)
+        else:
+            root_app_msg = None
+
+        version_files_to_add.extend(
+            vcs.write_stamp_files(app_version, root_app_version, app_msg, root_app_msg)
+        )
+
+        # Every app gets its own line because stamp commits are found by
+        # searching for "<app name>: Stamped"
+        commit_msg = f"{commit_msg}{vcs.name}: Stamped version {app_version}\n"
+
+    extra_commit_message = vcs_list[0].params["extra_commit_message"]
+    commit_msg = f"{commit_msg}{extra_commit_message}\n"
+
+    for vcs in vcs_list:
+        vcs.current_version_info["stamping"]["msg"] = commit_msg
+
+    return publish_stamps(
+        vcs_list,
+        commit_msg,
+        list(dict.fromkeys(version_files_to_add)),
+        app_tags + root_tags,
+        app_msgs + root_msgs,
+    )
+
+
+@stamp_utils.measure_runtime_decorator
+def get_show_info(vcs, params, verstr=None):
     dirty_states = None
     # TODO:: fix recusrion crash when doing copy.deepcopy(vcs.ver_infos_from_repo)
     ver_infos = vcs.ver_infos_from_repo
@@ -2410,7 +2995,14 @@ def show(vcs, params, verstr=None):
             "dirty_deps",
             "deps_synced_with_conf",
         }
-        status = _get_repo_status(vcs, expected_status, optional_status)
+        # Dirty states are not displayed with ignore_dirty
+        status = _get_repo_status(
+            vcs,
+            expected_status,
+            optional_status,
+            params.get("changes_cache"),
+            tracking_only=params["ignore_dirty"],
+        )
         if status["error"]:
             stamp_utils.VMN_LOGGER.error("Error occured when getting the repo status")
             stamp_utils.VMN_LOGGER.debug(status, exc_info=True)
@@ -2418,10 +3010,9 @@ def show(vcs, params, verstr=None):
             raise RuntimeError()
 
         if tag_name in ver_infos:
-            dirty_states = list(get_dirty_states(optional_status, status))
-
-            if params["ignore_dirty"]:
-                dirty_states = None
+            dirty_states = None
+            if not params["ignore_dirty"]:
+                dirty_states = list(get_dirty_states(optional_status, status))
 
             vers = []
             for i in ver_infos.keys():
@@ -2442,7 +3033,19 @@ def show(vcs, params, verstr=None):
 
         raise RuntimeError()
 
-    # Done resolving ver_info. Move it to separate function
+    return tag_name, ver_info, dirty_states
+
+
+@stamp_utils.measure_runtime_decorator
+def show(vcs, params, verstr=None):
+    out = get_show_output(vcs, params, verstr)
+    print(out)
+
+    return out
+
+
+def get_show_output(vcs, params, verstr=None, structured=False):
+    tag_name, ver_info, dirty_states = get_show_info(vcs, params, verstr)
 
     data = {}
     if params["conf"]:
@@ -2463,18 +3066,18 @@ def show(vcs, params, verstr=None):
         data["type"] = ver_info["stamping"]["app"]["prerelease"]
 
     if vcs.root_context:
-        out = _handle_root_output_to_user(data, dirty_states, params, vcs, ver_info)
-    else:
-        out = _handle_output_to_user(
-            data, dirty_states, params, tag_name, vcs, ver_info
+        return _handle_root_output_to_user(
+            data, dirty_states, params, vcs, ver_info, structured
         )
 
-    print(out)
-
-    return out
+    return _handle_output_to_user(
+        data, dirty_states, params, tag_name, vcs, ver_info, structured
+    )
 
 
-def _handle_output_to_user(data, dirty_states, params, tag_name, vcs, ver_info):
+def _handle_output_to_user(
+    data, dirty_states, params, tag_name, vcs, ver_info, structured=False
+):
     data.update(ver_info["stamping"]["app"])
     props = stamp_utils.VMNBackend.deserialize_vmn_tag_name(tag_name)
     verstr = props["verstr"]
@@ -2487,6 +3090,9 @@ def _handle_output_to_user(data, dirty_states, params, tag_name, vcs, ver_info):
     if params.get("verbose"):
         if dirty_states:
             data["dirty"] = dirty_states
+        if structured:
+            return data
+
         out = yaml.dump(data)
     else:
         out = data["version"]
@@ -2523,13 +3129,19 @@ def _handle_output_to_user(data, dirty_states, params, tag_name, vcs, ver_info):
                 }
             )
 
+        if structured:
+            d_out["out"] = out
+            return d_out
+
         if d_out:
             out = yaml.safe_dump(d_out)
 
     return out
 
 
-def _handle_root_output_to_user(data, dirty_states, params, vcs, ver_info):
+def _handle_root_output_to_user(
+    data, dirty_states, params, vcs, ver_info, structured=False
+):
     if "root_app" not in ver_info["stamping"]:
         err_str = f"App {vcs.name} does not have a root app"
         stamp_utils.VMN_LOGGER.error(err_str)
@@ -2541,6 +3153,8 @@ def _handle_root_output_to_user(data, dirty_states, params, vcs, ver_info):
     if params.get("verbose"):
         if dirty_states:
             data["dirty"] = dirty_states
+        if structured:
+            return data
 
         out = yaml.dump(data)
     else:
@@ -2570,6 +3184,10 @@ def _handle_root_output_to_user(data, dirty_states, params, vcs, ver_info):
                 }
             )
 
+        if structured:
+            d_out["out"] = out
+            return d_out
+
         if d_out:
             out = yaml.safe_dump(d_out)
 
@@ -2672,11 +3290,121 @@ def gen(vcs, params, verstr=None):
         tmplt_value,
         params["jinja_template"],
         params["output"],
+        get_jinja2_cache_dir(vcs.vmn_root_path),
     )
 
     return 0
 
 
+def _name_numbered_backreferences(regex_sub):
+    # Escaped backslashes are matched as well so that the \1 in \\\1 is still
+    # found while \\1 is left as a literal backslash followed by 1
+    return _REGEX_SUB_ESCAPE.sub(
+        lambda m: m.group(0) if m.group(1) == "\\" else f"\\g<{m.group(1)}>",
+        regex_sub,
+    )
+
+
+def _stream_regex_sub(chunks, regex_selector, regex_sub, overlap):
+    # buf[:start] was already substituted and is only kept as context for
+    # anchors and lookbehinds. A match must be shorter than overlap
+    buf = ""
+    start = 0
+    for chunk in chunks:
+        buf += chunk
+        if len(buf) - start < 2 * overlap:
+            continue
+
+        out, cut = _regex_sub_buffer(
+            buf, start, len(buf) - overlap, regex_selector, regex_sub
+        )
+        yield out
+
+        keep = max(0, cut - overlap)
+        buf = buf[keep:]
+        start = cut - keep
+
+    out, _ = _regex_sub_buffer(buf, start, None, regex_selector, regex_sub)
+    yield out
+
+
+def _regex_sub_buffer(buf, start, safe, regex_selector, regex_sub):
+    # Substitute matches starting before safe (or all of them when safe is
+    # None) and return the substituted text along with the end of the part
+    # of buf it covers
+    parts = []
+    pos = start
+    for match in regex_selector.finditer(buf, start):
+        if safe is not None and match.start() >= safe:
+            break
+
+        parts.append(buf[pos : match.start()])
+        parts.append(match.expand(regex_sub))
+        pos = match.end()
+
+    cut = len(buf) if safe is None else max(safe, pos)
+    parts.append(buf[pos:cut])
+
+    return "".join(parts), cut
+
+
+def stream_regex_sub_file(
+    input_file_path,
+    output_file_path,
+    selectors,
+    chunk_size=STREAM_CHUNK_SIZE,
+    overlap=STREAM_OVERLAP,
+):
+    """
+    Apply the (compiled regex, replacement) selectors to input_file_path in
+    chunks and atomically replace output_file_path with the result. Line
+    endings are kept as is. Returns False if the output did not change
+    """
+    output_file_path = os.path.realpath(output_file_path)
+    fd, tmp_path = stamp_utils.make_sibling_tmp_file(output_file_path)
+    try:
+        with open(input_file_path, "r", newline="") as in_f, open(
+            fd, "w", newline=""
+        ) as out_f:
+            chunks = iter(lambda: in_f.read(chunk_size), "")
+            for regex_selector, regex_sub in selectors:
+                chunks = _stream_regex_sub(chunks, regex_selector, regex_sub, overlap)
+
+            for chunk in chunks:
+                out_f.write(chunk)
+
+        if os.path.exists(output_file_path) and filecmp.cmp(
+            tmp_path, output_file_path, shallow=False
+        ):
+            os.remove(tmp_path)
+            return False
+
+        stamp_utils.replace_file(tmp_path, output_file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return True
+
+
+def _are_independent_files(file_sections):
+    # Files can be processed concurrently unless a file is written twice or is
+    # read after another section writes it
+    outputs = [section["output_file_path"] for section in file_sections]
+    if len(set(outputs)) != len(outputs):
+        return False
+
+    for section in file_sections:
+        if section["input_file_path"] == section["output_file_path"]:
+            continue
+
+        if section["input_file_path"] in outputs:
+            return False
+
+    return True
+
+
 def create_data_dict_for_jinja2(ver_info, custom_values_path):
     tmplt_value = {}
     tmplt_value.update(ver_info["stamping"]["app"])
@@ -2693,29 +3421,108 @@ def create_data_dict_for_jinja2(ver_info, custom_values_path):
     return tmplt_value
 
 
-def gen_jinja2_template_from_data(data, jinja_template_path, output_path):
-    env = jinja2.Environment(keep_trailing_newline=True)
+# The source of the template being loaded on this thread, by the sha256 of its
+# content. Once compiled, the templates are kept by the environment's own
+# bounded cache so the sources are not kept here
+_JINJA2_LOADING = threading.local()
+_JINJA2_ENVIRONMENTS = {}
+
+
+def get_jinja2_cache_dir(vmn_root_path):
+    return os.path.join(vmn_root_path, ".vmn", JINJA2_CACHE_DIRNAME)
+
+
+def _load_jinja2_source(name):
+    # The name is the hash of the source so it can never be outdated
+    return _JINJA2_LOADING.sources.pop(name), None, lambda: True
+
+
+def _prune_jinja2_cache_dir(cache_dir, max_entries=JINJA2_CACHE_MAX_ENTRIES):
+    """
+    Keep only the max_entries most recently written bytecode files. A
+    template rendered after its file was removed is compiled and cached again
+    """
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.is_file()]
+        if len(entries) <= max_entries:
+            return
+
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[max_entries:]:
+            os.remove(entry.path)
+    except OSError:
+        stamp_utils.VMN_LOGGER.debug(
+            f"Failed to prune jinja2 cache directory {cache_dir}", exc_info=True
+        )
+
+
+def get_jinja2_environment(cache_dir=None):
+    """
+    Return the environment shared by all the renders with the same bytecode
+    cache directory. Templates are loaded by the hash of their content, so
+    each one is compiled once per process, and once per change when a cache
+    directory is given.
+    """
+    if cache_dir is not None:
+        # A long lived process may outlive the directory
+        try:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        except OSError:
+            stamp_utils.VMN_LOGGER.debug(
+                f"Failed to create jinja2 cache directory {cache_dir}",
+                exc_info=True,
+            )
+            cache_dir = None
+
+    env = _JINJA2_ENVIRONMENTS.get(cache_dir)
+    if env is not None:
+        return env
+
+    import jinja2
+
+    bytecode_cache = None
+    if cache_dir is not None:
+        bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+
+    env = jinja2.Environment(
+        keep_trailing_newline=True,
+        loader=jinja2.FunctionLoader(_load_jinja2_source),
+        bytecode_cache=bytecode_cache,
+    )
+    _JINJA2_ENVIRONMENTS[cache_dir] = env
 
+    return env
+
+
+def gen_jinja2_template_from_data(
+    data, jinja_template_path, output_path, cache_dir=None
+):
     with open(jinja_template_path) as file_:
         template_content = file_.read()
 
-    # Create a template from the content
-    template = env.from_string(template_content)
+    out = render_jinja2_template(data, template_content, cache_dir)
+
+    return stamp_utils.write_file_if_changed(output_path, out)
+
+
+def render_jinja2_template(data, template_content, cache_dir=None):
+    key = hashlib.sha256(template_content.encode("utf-8")).hexdigest()
+    _JINJA2_LOADING.sources = {key: template_content}
+    try:
+        template = get_jinja2_environment(cache_dir).get_template(key)
+        loaded = not _JINJA2_LOADING.sources
+    finally:
+        del _JINJA2_LOADING.sources
+
+    # Only a template that was not in memory may have added a bytecode file
+    if loaded and cache_dir is not None:
+        _prune_jinja2_cache_dir(cache_dir)
 
     stamp_utils.VMN_LOGGER.debug(
         f"Possible keywords for your Jinja template:\n" f"{pformat(data)}"
     )
-    out = template.render(data)
-
-    if os.path.exists(output_path):
-        with open(output_path) as file_:
-            current_out_content = file_.read()
 
-            if current_out_content == out:
-                return 0
-
-    with open(output_path, "w") as f:
-        f.write(out)
+    return template.render(data)
 
 
 def get_dirty_states(optional_status, status):
@@ -2850,7 +3657,12 @@ def goto_version(vcs, params, version, pull):
                     v["tag"] = None
                     v["hash"] = vcs.configured_deps[rel_path]["hash"]
         try:
-            _goto_version(deps, vcs.vmn_root_path, pull)
+            _goto_version(
+                deps,
+                vcs.vmn_root_path,
+                pull,
+                params.get("jobs", GOTO_DEFAULT_JOBS),
+            )
         except Exception as exc:
             stamp_utils.VMN_LOGGER.error(f"goto failed: {exc}")
             stamp_utils.VMN_LOGGER.debug("", exc_info=True)
@@ -2865,12 +3677,7 @@ def goto_version(vcs, params, version, pull):
 
 @stamp_utils.measure_runtime_decorator
 def _update_repo(args):
-    root_path = stamp_utils.resolve_root_path()
-    vmn_path = os.path.join(root_path, ".vmn")
-
-    stamp_utils.init_stamp_logger(os.path.join(vmn_path, LOG_FILENAME))
-
-    path, rel_path, branch_name, tag, changeset, pull = args
+    root_path, path, rel_path, branch_name, tag, changeset, pull = args
 
     client = None
     try:
@@ -2968,11 +3775,6 @@ def _update_repo(args):
 
 @stamp_utils.measure_runtime_decorator
 def _clone_repo(args):
-    root_path = stamp_utils.resolve_root_path()
-    vmn_path = os.path.join(root_path, ".vmn")
-
-    stamp_utils.init_stamp_logger(os.path.join(vmn_path, LOG_FILENAME))
-
     path, rel_path, remote, vcs_type = args
     if os.path.exists(path):
         return {"repo": rel_path, "status": 0, "description": None}
@@ -2997,8 +3799,24 @@ def _clone_repo(args):
     return {"repo": rel_path, "status": 0, "description": None}
 
 
+def _sync_repo(args):
+    # A repository is updated as soon as its own clone has finished
+    vmn_root_path, rel_path, remote, vcs_type, branch, tag, changeset, pull = args
+    path = os.path.join(vmn_root_path, rel_path)
+
+    res = _clone_repo((path, rel_path, remote, vcs_type))
+    if res["status"] == 1:
+        res["operation"] = "clone"
+        return res
+
+    res = _update_repo((vmn_root_path, path, rel_path, branch, tag, changeset, pull))
+    res["operation"] = "update"
+
+    return res
+
+
 @stamp_utils.measure_runtime_decorator
-def _goto_version(deps, vmn_root_path, pull):
+def _goto_version(deps, vmn_root_path, pull, jobs=GOTO_DEFAULT_JOBS):
     args = []
     for rel_path, v in deps.items():
         if "remote" not in v or not v["remote"]:
@@ -3011,40 +3829,6 @@ def _goto_version(deps, vmn_root_path, pull):
         if v["remote"].startswith("."):
             v["remote"] = os.path.join(vmn_root_path, v["remote"])
 
-        args.append(
-            (
-                os.path.join(vmn_root_path, rel_path),
-                rel_path,
-                v["remote"],
-                v["vcs_type"],
-            )
-        )
-    with Pool(min(len(args), 10)) as p:
-        results = p.map(_clone_repo, args)
-
-    err = False
-    failed_repos = set()
-    for res in results:
-        if res["status"] == 1:
-            err = True
-
-            if res["repo"] is None and res["description"] is None:
-                continue
-
-            msg = "Failed to clone "
-            if res["repo"] is not None:
-                failed_repos.add(res["repo"])
-                msg += "from {0} ".format(res["repo"])
-            if res["description"] is not None:
-                msg += "because {0}".format(res["description"])
-
-            stamp_utils.VMN_LOGGER.info(msg)
-
-    args = []
-    for rel_path, v in deps.items():
-        if rel_path in failed_repos:
-            continue
-
         branch = None
         if "branch" in v and v["branch"] is not None:
             branch = v["branch"]
@@ -3054,8 +3838,10 @@ def _goto_version(deps, vmn_root_path, pull):
 
         args.append(
             (
-                os.path.join(vmn_root_path, rel_path),
+                vmn_root_path,
                 rel_path,
+                v["remote"],
+                v["vcs_type"],
                 branch,
                 tag,
                 v["hash"],
@@ -3063,22 +3849,38 @@ def _goto_version(deps, vmn_root_path, pull):
             )
         )
 
-    with Pool(min(len(args), 20)) as p:
-        results = p.map(_update_repo, args)
+    from multiprocessing.pool import ThreadPool
+
+    err = False
+    with ThreadPool(min(len(args), jobs)) as p:
+        # Report every repository as soon as it is done
+        for done, res in enumerate(p.imap_unordered(_sync_repo, args), 1):
+            if res["status"] == 0:
+                stamp_utils.VMN_LOGGER.info(
+                    f"Synced {res['repo']} ({done}/{len(args)})"
+                )
+                continue
 
-    for res in results:
-        if res["status"] == 1:
             err = True
             if res["repo"] is None and res["description"] is None:
                 continue
 
-            msg = "Failed to update "
-            if res["repo"] is not None:
-                msg += " {0} ".format(res["repo"])
-            if res["description"] is not None:
-                msg += "because {0}".format(res["description"])
+            if res["operation"] == "clone":
+                msg = "Failed to clone "
+                if res["repo"] is not None:
+                    msg += "from {0} ".format(res["repo"])
+                if res["description"] is not None:
+                    msg += "because {0}".format(res["description"])
 
-            stamp_utils.VMN_LOGGER.warning(msg)
+                stamp_utils.VMN_LOGGER.info(msg)
+            else:
+                msg = "Failed to update "
+                if res["repo"] is not None:
+                    msg += " {0} ".format(res["repo"])
+                if res["description"] is not None:
+                    msg += "because {0}".format(res["description"])
+
+                stamp_utils.VMN_LOGGER.warning(msg)
 
     if err:
         stamp_utils.VMN_LOGGER.error(
@@ -3108,6 +3910,19 @@ def vmn_run(command_line=None):
         stamp_utils.VMN_LOGGER.error("Logged exception: ", exc_info=True)
         return 1, None
 
+    if args.profile is None:
+        return _vmn_run_command(args, command_line)
+
+    # Resolved now as the command may change the working directory
+    trace_path = os.path.abspath(args.profile)
+    stamp_utils.start_trace()
+    try:
+        return _vmn_run_command(args, command_line)
+    finally:
+        stamp_utils.stop_trace(trace_path)
+
+
+def _vmn_run_command(args, command_line):
     try:
         if args.command == "show":
             stamp_utils.init_stamp_logger(debug=args.debug, supress_stdout=True)
@@ -3127,8 +3942,25 @@ def vmn_run(command_line=None):
 
         return 1, None
 
+    if args.command == "serve":
+        return serve(root_path), None
+
+    # A profiled command has to run in this process
+    if args.command in DAEMON_COMMANDS and args.profile is None:
+        if command_line is None:
+            command_line = sys.argv[1:]
+
+        err = forward_to_daemon(vmn_path, command_line)
+        if err is not None:
+            return err, None
+
+    return _vmn_run_locked(args, root_path, vmn_path, command_line)
+
+
+def _vmn_run_locked(args, root_path, vmn_path, command_line, backend=None):
     err = 0
     vmnc = None
+    lock = None
     try:
         lock_file_path = os.path.join(vmn_path, LOCK_FILENAME)
         if LOCK_FILE_ENV in os.environ:
@@ -3163,11 +3995,7 @@ def vmn_run(command_line=None):
         )
 
         # Call the actual function
-        err, vmnc = _vmn_run(args, root_path)
-        # We only need it here. In other, Exception cases -
-        # the unlock will happen naturally because the process will exit
-        lock.release()
-
+        err, vmnc = _vmn_run(args, root_path, backend)
     except Exception:
         stamp_utils.VMN_LOGGER.error(
             "vmn_run raised exception. Run vmn --debug for details"
@@ -3179,14 +4007,23 @@ def vmn_run(command_line=None):
         stamp_utils.VMN_LOGGER.debug("Exception info: ", exc_info=True)
         err = 1
 
+    # Also after a failure, what was cached until then is still valid
+    if vmnc is not None and vmnc.vcs is not None:
+        vmnc.vcs.backend.flush_caches()
+
+    if lock is not None and lock.is_locked:
+        # Released also after a failure as vmn serve does not exit
+        lock.release()
+
     stamp_utils.VMN_LOGGER.debug(pformat(stamp_utils.call_count))
 
     return err, vmnc
 
 
 @stamp_utils.measure_runtime_decorator
-def _vmn_run(args, root_path):
-    vmnc = VMNContainer(args, root_path)
+def _vmn_run(args, root_path, backend=None):
+    vmnc = VMNContainer(args, root_path, backend)
+    _exclude_unignored_vmn_files(vmnc.vcs)
     if vmnc.args.command not in VMN_ARGS:
         stamp_utils.VMN_LOGGER.info("Run vmn -h for help")
         return 1, vmnc
@@ -3230,6 +4067,165 @@ def _vmn_run(args, root_path):
     return err, vmnc
 
 
+def forward_to_daemon(vmn_path, command_line):
+    """
+    Run the command by a vmn serve daemon if one is running for this repository.
+    Returns None when the command has to be run locally
+    """
+    if DAEMON_DISABLE_ENV in os.environ or not hasattr(socket, "AF_UNIX"):
+        return None
+
+    socket_path = os.path.join(vmn_path, SOCKET_FILENAME)
+    if not os.path.exists(socket_path):
+        return None
+
+    request = {"command_line": list(command_line), "cwd": os.getcwd()}
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(f"{json.dumps(request)}\n".encode())
+
+            with client.makefile("rb") as f:
+                response = json.loads(f.readline())
+    except (OSError, ValueError):
+        stamp_utils.VMN_LOGGER.debug(
+            f"Failed to run the command by the daemon at {socket_path}. "
+            "Running locally",
+            exc_info=True,
+        )
+        return None
+
+    sys.stdout.write(response["stdout"])
+    sys.stdout.flush()
+    sys.stderr.write(response["stderr"])
+    sys.stderr.flush()
+
+    return response["err"]
+
+
+class VMNDaemonRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        daemon = self.server.vmn_daemon
+        response = daemon.run_command(
+            request["command_line"], request.get("cwd", daemon.root_path)
+        )
+        self.wfile.write(f"{json.dumps(response)}\n".encode())
+
+
+class VMNDaemon(object):
+    """
+    Serves read only vmn commands for a single repository while keeping
+    the git backend, and with it the tag index and the object reader, warm
+    between requests. The backend is recreated whenever HEAD, the branches
+    or the git configuration change.
+    """
+
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self.vmn_path = os.path.join(root_path, ".vmn")
+        self.socket_path = os.path.join(self.vmn_path, SOCKET_FILENAME)
+        self.requests_served = 0
+        self._backend = None
+        self._backend_fingerprint = None
+
+        if os.path.exists(self.socket_path):
+            # Leftover of a daemon that did not exit cleanly
+            os.remove(self.socket_path)
+
+        self._server = socketserver.UnixStreamServer(
+            self.socket_path, VMNDaemonRequestHandler
+        )
+        self._server.vmn_daemon = self
+
+    def get_backend(self):
+        if self._backend is not None:
+            fingerprint = self._backend.refs_state_fingerprint()
+            if fingerprint == self._backend_fingerprint:
+                return self._backend
+
+            self._backend = None
+
+        self._backend, err = stamp_utils.get_client(
+            self.root_path, stamp_utils.VMN_BE_TYPE_GIT, inherit_env=True
+        )
+        if err:
+            stamp_utils.VMN_LOGGER.debug(err)
+            return None
+
+        self._backend_fingerprint = self._backend.refs_state_fingerprint()
+
+        return self._backend
+
+    def run_command(self, command_line, cwd):
+        out = io.StringIO()
+        err_out = io.StringIO()
+        prev_cwd = os.getcwd()
+
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err_out):
+            try:
+                os.chdir(cwd)
+                stamp_utils.init_stamp_logger()
+                args = parse_user_commands(command_line)
+
+                if args.command not in DAEMON_COMMANDS:
+                    raise RuntimeError(f"{args.command} is not served by the daemon")
+
+                err, _ = _vmn_run_locked(
+                    args,
+                    self.root_path,
+                    self.vmn_path,
+                    command_line,
+                    backend=self.get_backend(),
+                )
+            except BaseException:
+                stamp_utils.VMN_LOGGER.error("Logged exception: ", exc_info=True)
+                err = 1
+            finally:
+                os.chdir(prev_cwd)
+
+        self.requests_served += 1
+
+        return {"err": err, "stdout": out.getvalue(), "stderr": err_out.getvalue()}
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.shutdown()
+
+    def server_close(self):
+        self._server.server_close()
+
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+
+def serve(root_path):
+    if not hasattr(socket, "AF_UNIX"):
+        stamp_utils.VMN_LOGGER.error("vmn serve requires Unix domain sockets")
+        return 1
+
+    daemon = VMNDaemon(root_path)
+    stamp_utils.VMN_LOGGER.info(f"Serving vmn commands on {daemon.socket_path}")
+
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server_close()
+
+    return 0
+
+
 def validate_app_name(args):
     if args.name.startswith("/"):
         stamp_utils.VMN_LOGGER.error("App name cannot start with /")
@@ -3240,25 +4236,38 @@ def validate_app_name(args):
 
 
 def parse_user_commands(command_line):
+    parser = create_arg_parser()
+    args = parser.parse_args(command_line)
+
+    verify_user_input_version(args, "version")
+    verify_user_input_version(args, "ov")
+    verify_user_input_version(args, "orv")
+
+    return args
+
+
+def create_arg_parser():
     parser = argparse.ArgumentParser("vmn")
     parser.add_argument(
         "--version", "-v", action="version", version=version_mod.version
     )
     parser.add_argument("--debug", required=False, action="store_true")
     parser.set_defaults(debug=False)
+    parser.add_argument(
+        "--profile",
+        required=False,
+        default=None,
+        metavar="TRACE_FILE",
+        help="Write a Chrome trace event file of the vmn functions and git "
+        "commands of this run to TRACE_FILE",
+    )
     subprasers = parser.add_subparsers(dest="command")
 
     for arg in VMN_ARGS.keys():
         arg = arg.replace("-", "_")
         getattr(sys.modules[__name__], f"add_arg_{arg}")(subprasers)
 
-    args = parser.parse_args(command_line)
-
-    verify_user_input_version(args, "version")
-    verify_user_input_version(args, "ov")
-    verify_user_input_version(args, "orv")
-
-    return args
+    return parser
 
 
 def add_arg_gen(subprasers):
@@ -3319,6 +4328,13 @@ def add_arg_goto(subprasers):
     pgoto.add_argument("name", help="The application's name")
     pgoto.add_argument("--pull", dest="pull", action="store_true")
     pgoto.set_defaults(pull=False)
+    pgoto.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=GOTO_DEFAULT_JOBS,
+        help="The maximal number of dependency repositories to sync concurrently",
+    )
 
 
 def add_arg_stamp(subprasers):
@@ -3368,6 +4384,13 @@ def add_arg_stamp(subprasers):
     pstamp.add_argument("--dry-run", dest="dry", action="store_true")
     pstamp.set_defaults(dry=False)
     pstamp.add_argument("name", help="The application's name")
+    pstamp.add_argument(
+        "names",
+        nargs="*",
+        default=[],
+        help="Additional applications to stamp. All the applications are "
+        "published with a single commit and a single push",
+    )
     pstamp.add_argument(
         "-e",
         "--extra-commit-message",
@@ -3380,7 +4403,33 @@ def add_arg_stamp(subprasers):
 
 def add_arg_show(subprasers):
     pshow = subprasers.add_parser("show", help="show app version")
-    pshow.add_argument("name", help="The application's name to show the version for")
+    pshow.add_argument(
+        "name",
+        nargs="?",
+        default=None,
+        help="The application's name to show the version for",
+    )
+    pshow.add_argument(
+        "names",
+        nargs="*",
+        default=[],
+        help="Additional applications to show the versions for. "
+        "The output will be a single document keyed by the application's name",
+    )
+    pshow.add_argument(
+        "--all",
+        dest="all",
+        action="store_true",
+        help="Show the versions of all the applications tracked in the repository",
+    )
+    pshow.set_defaults(all=False)
+    pshow.add_argument(
+        "--format",
+        dest="output_format",
+        choices=["yaml", "json"],
+        default="yaml",
+        help="The output format when showing multiple applications",
+    )
     pshow.add_argument(
         "-v",
         "--version",
@@ -3430,6 +4479,14 @@ def add_arg_init_app(subprasers):
     )
 
 
+def add_arg_serve(subprasers):
+    subprasers.add_parser(
+        "serve",
+        help="serve show and gen commands for the repository from a long "
+        f"running process listening on .vmn/{SOCKET_FILENAME}",
+    )
+
+
 def add_arg_init(subprasers):
     subprasers.add_parser(
         "init",